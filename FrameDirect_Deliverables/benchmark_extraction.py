@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import gc
+import time
+import argparse
+import tracemalloc
+from extraction_engine import extract_page, available_backends, FRAMESDIRECT, GLASSES
+from fixture_corpus import FIXTURES, FIXTURES_DIR, load_fixture, build_page
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+BASELINES_PATH = os.path.join(FIXTURES_DIR, "benchmark_baselines.json")
+SIZES = [1000, 10000]     # synthetic tiles per page
+REPEATS = 3               # minimum timed parses per case (the fastest counts)
+MIN_SECONDS = 1.0         # keep repeating fast cases until this much time was measured
+TOLERANCE = 0.30          # allowed slowdown / memory growth before --check fails
+SITES = {"framesdirect": FRAMESDIRECT, "glasses": GLASSES}
+
+
+# -----------------------------
+# CORRECTNESS
+# -----------------------------
+
+def check_fixtures(backends):
+    """Parse every fixture with every backend and compare with the expected records."""
+    failures = []
+    for name in FIXTURES:
+        site, html, expected, expected_next = load_fixture(name)
+        for backend in backends:
+            products, next_url = extract_page(html, site, backend=backend)
+            if products != expected or next_url != expected_next:
+                failures.append(f"{name} [{backend}] does not match {name}.expected.json")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print(f"✅ {len(FIXTURES)} fixtures match with {', '.join(backends)}")
+    return failures
+
+
+# -----------------------------
+# MEASUREMENTS
+# -----------------------------
+
+def measure(html, site, backend, num_tiles, repeats):
+    """Return tiles/sec, peak memory (KB) and allocation count for one parse path."""
+    # Best of several runs with the garbage collector off, like timeit: other
+    # load on the machine only ever makes a run slower
+    timings = []
+    gc.disable()
+    try:
+        while len(timings) < repeats or sum(timings) < MIN_SECONDS:
+            start = time.perf_counter()
+            products, next_url = extract_page(html, site, backend=backend)
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    assert len(products) == num_tiles and next_url, f"{backend} returned a wrong result"
+
+    # Separate run under tracemalloc (it slows the parse, so it is not timed)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = extract_page(html, site, backend=backend)
+    after = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # Memory blocks allocated by the parse that are still alive (mostly the result)
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    del result
+
+    return {
+        "tiles_per_sec": round(num_tiles / min(timings)),
+        "peak_kb": round(peak / 1024),
+        "alloc_blocks": blocks,
+    }
+
+
+def run_benchmarks(backends, sizes, repeats):
+    """Measure every site x backend x size case; returns {case: metrics}."""
+    results = {}
+    for site_name, site in SITES.items():
+        for size in sizes:
+            html = build_page(site, size)
+            print(f"\n{site_name}: {size} tiles, {len(html) / 1024:.0f} KB page")
+            for backend in backends:
+                case = f"{site_name}/{backend}/{size}"
+                results[case] = measure(html, site, backend, size, repeats)
+                m = results[case]
+                print(f"  {backend:<12} {m['tiles_per_sec']:>10,} tiles/sec"
+                      f"  {m['peak_kb']:>9,} KB peak  {m['alloc_blocks']:>9,} blocks")
+    return results
+
+
+# -----------------------------
+# BASELINES
+# -----------------------------
+
+def load_baselines():
+    if not os.path.exists(BASELINES_PATH):
+        return {}
+    with open(BASELINES_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_with_baselines(results, baselines, tolerance):
+    """Return a list of regressions against the recorded baselines."""
+    regressions = []
+    for case, metrics in results.items():
+        base = baselines.get(case)
+        if base is None:
+            print(f"⚠ No baseline for {case}")
+            continue
+        if metrics["tiles_per_sec"] < base["tiles_per_sec"] * (1 - tolerance):
+            regressions.append(f"{case}: {metrics['tiles_per_sec']:,} tiles/sec "
+                               f"(baseline {base['tiles_per_sec']:,})")
+        if metrics["peak_kb"] > base["peak_kb"] * (1 + tolerance):
+            regressions.append(f"{case}: {metrics['peak_kb']:,} KB peak (baseline {base['peak_kb']:,})")
+        if metrics["alloc_blocks"] > base["alloc_blocks"] * (1 + tolerance):
+            regressions.append(f"{case}: {metrics['alloc_blocks']:,} blocks (baseline {base['alloc_blocks']:,})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the extraction backends on the fixture corpus.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="synthetic tiles per page")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="timed parses per case")
+    parser.add_argument("--backends", nargs="+", default=available_backends(), help="backends to measure")
+    parser.add_argument("--check", action="store_true",
+                        help="exit with an error if any case is slower/heavier than its baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed regression (0.30 = 30%%)")
+    parser.add_argument("--update-baselines", action="store_true", help="record these results as the baselines")
+    args = parser.parse_args()
+
+    failures = check_fixtures(args.backends)
+    results = run_benchmarks(args.backends, args.sizes, args.repeats)
+
+    if args.update_baselines:
+        baselines = load_baselines()
+        baselines.update(results)
+        with open(BASELINES_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=4, sort_keys=True)
+        print(f"\n✅ Baselines written to {BASELINES_PATH}")
+
+    if args.check:
+        regressions = compare_with_baselines(results, load_baselines(), args.tolerance)
+        for regression in regressions:
+            print(f"❌ {regression}")
+        if failures or regressions:
+            sys.exit(1)
+        print("\n✅ All cases within the baselines")
@@ -0,0 +1,341 @@
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import socket
+import argparse
+import subprocess
+import urllib.request
+from datetime import datetime, timedelta
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+from jsonl_store import atomic_write
+
+# psutil lets a session be recycled on memory growth; without it only the
+# page count is used
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+CACHE_DIR = os.environ.get(
+    "BROWSER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "eyewear-scraper")
+)
+DRIVER_CACHE_FILE = os.path.join(CACHE_DIR, "chromedriver.json")
+DRIVER_MAX_AGE_DAYS = 7        # re-resolve the driver (online) after this long
+BASE_PORT = 9300               # remote-debugging port of warm session slot 0
+LAUNCH_TIMEOUT = 15            # seconds to wait for a launched Chrome to answer
+RECYCLE_AFTER_PAGES = 200      # restart a warm Chrome after this many page loads
+RECYCLE_MEMORY_MB = 1024       # ... or when its processes grew by this much since launch
+CHROME_CANDIDATES = [
+    "google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome",
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+]
+
+
+# -----------------------------
+# DRIVER RESOLUTION
+# -----------------------------
+
+def resolve_driver_path():
+    """Path of the chromedriver binary, resolved once and cached on disk.
+
+    ChromeDriverManager is only asked (which may download) when there is no
+    cached path or it is older than DRIVER_MAX_AGE_DAYS. If that fails, e.g.
+    offline, a stale cached driver is used anyway.
+    """
+    cached = None
+    if os.path.exists(DRIVER_CACHE_FILE):
+        with open(DRIVER_CACHE_FILE, encoding="utf-8") as f:
+            cached = json.load(f)
+        if not os.path.exists(cached["path"]):
+            cached = None
+    if cached is not None:
+        age = datetime.now() - datetime.fromisoformat(cached["resolved_at"])
+        if age < timedelta(days=DRIVER_MAX_AGE_DAYS):
+            return cached["path"]
+
+    try:
+        path = ChromeDriverManager().install()
+    except Exception as e:
+        if cached is None:
+            raise
+        print(f"⚠ Could not refresh chromedriver ({e}); using the cached {cached['path']}")
+        return cached["path"]
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    entry = {"path": path, "resolved_at": datetime.now().isoformat(timespec="seconds")}
+    atomic_write(DRIVER_CACHE_FILE, lambda f: json.dump(entry, f, indent=4))
+    return path
+
+
+def chrome_service():
+    """Service for the cached chromedriver."""
+    return Service(resolve_driver_path())
+
+
+def find_chrome():
+    """Path of the Chrome binary (CHROME_BINARY overrides the search)."""
+    if os.environ.get("CHROME_BINARY"):
+        return os.environ["CHROME_BINARY"]
+    for candidate in CHROME_CANDIDATES:
+        path = shutil.which(candidate) or (candidate if os.path.isfile(candidate) else None)
+        if path:
+            return path
+    raise RuntimeError("Chrome not found; set CHROME_BINARY to its path")
+
+
+# -----------------------------
+# WARM SESSIONS
+# -----------------------------
+
+def _debugger_alive(port):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/json/version", timeout=1) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def _port_free(port):
+    with socket.socket() as s:
+        return s.connect_ex(("127.0.0.1", port)) != 0
+
+
+def _command_line_argument(argument):
+    """Options.add_argument() also takes "user-agent=..."; on a command line it needs the "--"."""
+    return argument if argument.startswith("-") else f"--{argument}"
+
+
+def _write_preferences(user_data_dir, prefs):
+    """Merge Options prefs ({"a.b.c": value}) into the profile's Preferences file.
+
+    chromedriver does this for the browsers it starts; a Chrome launched from
+    the command line reads them from the profile instead.
+    """
+    path = os.path.join(user_data_dir, "Default", "Preferences")
+    preferences = {}
+    if os.path.exists(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                preferences = json.load(f)
+        except ValueError:
+            pass
+    for name, value in prefs.items():
+        *parents, leaf = name.split(".")
+        node = preferences
+        for parent in parents:
+            if not isinstance(node.get(parent), dict):
+                node[parent] = {}
+            node = node[parent]
+        node[leaf] = value
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    atomic_write(path, lambda f: json.dump(preferences, f))
+
+
+def _process_tree_mb(pid):
+    """RSS of a Chrome process and its children (renderers, GPU, ...) in MB, or None."""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / 1024 / 1024
+
+
+class BrowserSession:
+    """A Chrome kept running between pages and between runs, attached to over its debugging port.
+
+    The first run launches Chrome (with the arguments and prefs of
+    ``options_factory()``) as a separate process and records it in
+    ``<CACHE_DIR>/sessions/``; later runs find it there and attach through
+    ``debuggerAddress`` instead of starting a new browser. Each ``slot`` is its own Chrome, so a pool of
+    workers uses slots 0..N-1. The browser is restarted after
+    RECYCLE_AFTER_PAGES page loads, or when its memory grew by more than
+    RECYCLE_MEMORY_MB. ``release()`` detaches and leaves Chrome running;
+    ``shutdown()`` stops it.
+    """
+
+    def __init__(self, name, options_factory, slot=0, on_attach=None,
+                 recycle_after_pages=RECYCLE_AFTER_PAGES, recycle_memory_mb=RECYCLE_MEMORY_MB):
+        self.name = name
+        self.options_factory = options_factory
+        self.slot = slot
+        self.on_attach = on_attach
+        self.recycle_after_pages = recycle_after_pages
+        self.recycle_memory_mb = recycle_memory_mb
+        self.state_path = os.path.join(CACHE_DIR, "sessions", f"{name}-{slot}.json")
+        self.state = self._load_state()
+        self._driver = None
+
+    # -- state file --
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return None
+        with open(self.state_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        atomic_write(self.state_path, lambda f: json.dump(self.state, f, indent=4))
+
+    # -- browser process --
+
+    def _launch(self):
+        """Start a detached Chrome with a remote-debugging port and record it."""
+        port = BASE_PORT + self.slot
+        while not _port_free(port):
+            port += 100
+        user_data_dir = os.path.join(CACHE_DIR, "profiles", f"{self.name}-{self.slot}")
+        options = self.options_factory()
+        prefs = options.experimental_options.get("prefs")
+        if prefs:
+            _write_preferences(user_data_dir, prefs)
+        command = [find_chrome(), f"--remote-debugging-port={port}", f"--user-data-dir={user_data_dir}",
+                   "--no-first-run", "--no-default-browser-check",
+                   *map(_command_line_argument, options.arguments), "about:blank"]
+        detach = ({"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if sys.platform == "win32"
+                  else {"start_new_session": True})
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **detach)
+
+        deadline = time.monotonic() + LAUNCH_TIMEOUT
+        while not _debugger_alive(port):
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f"Chrome did not open its debugging port {port}")
+            time.sleep(0.1)
+        self.state = {
+            "pid": process.pid,
+            "port": port,
+            "pages": 0,
+            "launched_at": datetime.now().isoformat(timespec="seconds"),
+            "baseline_mb": _process_tree_mb(process.pid),
+        }
+        self._save_state()
+        print(f"✅ Launched warm Chrome (slot {self.slot}, port {port})")
+
+    def _attach(self):
+        options = Options()
+        options.debugger_address = f"127.0.0.1:{self.state['port']}"
+        driver = webdriver.Chrome(service=chrome_service(), options=options)
+        if self.on_attach is not None:
+            self.on_attach(driver)
+        return driver
+
+    def driver(self):
+        """The WebDriver for this slot, attaching to (or launching) the warm Chrome."""
+        if self._driver is None:
+            if self.state is None or not _debugger_alive(self.state["port"]):
+                self._launch()
+            else:
+                print(f"Attaching to warm Chrome (slot {self.slot}, {self.state['pages']} pages so far)")
+            self._driver = self._attach()
+        return self._driver
+
+    @property
+    def attached(self):
+        return self._driver is not None
+
+    def page_done(self):
+        """Count a page load; recycles the browser when it is due."""
+        self.state["pages"] += 1
+        reason = None
+        if self.state["pages"] >= self.recycle_after_pages:
+            reason = f"{self.state['pages']} pages"
+        else:
+            baseline, current = self.state.get("baseline_mb"), _process_tree_mb(self.state["pid"])
+            if baseline is not None and current is not None and current - baseline > self.recycle_memory_mb:
+                reason = f"memory grew {current - baseline:.0f} MB"
+        if reason:
+            print(f"Recycling warm Chrome (slot {self.slot}) after {reason}")
+            self.shutdown()
+        else:
+            self._save_state()
+
+    def release(self):
+        """Detach from Chrome but leave it running for the next run."""
+        if self._driver is not None:
+            # quit() would end the browser session; only stop our chromedriver
+            self._driver.service.stop()
+            self._driver = None
+        if self.state is not None:
+            self._save_state()
+
+    def quit(self):
+        """PageFetcher calls driver.quit(); for a warm session that means release()."""
+        self.release()
+
+    def shutdown(self):
+        """Stop the warm Chrome and forget it."""
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+            self._driver = None
+        if self.state is not None:
+            try:
+                os.kill(self.state["pid"], signal.SIGTERM)
+            except OSError:
+                pass
+            self.state = None
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+
+def running_sessions():
+    """State of every recorded warm session: [(name-slot, state, alive)]."""
+    folder = os.path.join(CACHE_DIR, "sessions")
+    if not os.path.isdir(folder):
+        return []
+    sessions = []
+    for file_name in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, file_name), encoding="utf-8") as f:
+            state = json.load(f)
+        sessions.append((file_name[:-len(".json")], state, _debugger_alive(state["port"])))
+    return sessions
+
+
+# -----------------------------
+# RUN SCRIPT
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the cached chromedriver and warm Chrome sessions.")
+    parser.add_argument("command", choices=["status", "stop", "resolve"],
+                        help="list warm sessions, stop them all, or resolve and cache the driver now")
+    args = parser.parse_args()
+
+    if args.command == "resolve":
+        print(f"✅ chromedriver: {resolve_driver_path()}")
+    elif args.command == "status":
+        sessions = running_sessions()
+        if not sessions:
+            print("No warm Chrome sessions.")
+        for key, state, alive in sessions:
+            memory = _process_tree_mb(state["pid"]) if alive else None
+            print(f"{key}: {'running' if alive else 'gone'} on port {state['port']}, "
+                  f"{state['pages']} pages since {state['launched_at']}"
+                  + (f", {memory:.0f} MB" if memory is not None else ""))
+    else:
+        for key, state, alive in running_sessions():
+            name, slot = key.rsplit("-", 1)
+            BrowserSession(name, Options, slot=int(slot)).shutdown()
+            print(f"Stopped {key}")
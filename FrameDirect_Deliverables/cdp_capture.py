@@ -0,0 +1,191 @@
+import re
+import json
+import time
+import base64
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+# Candidate keys used by the retailers' catalogue APIs, in order of preference
+BRAND_KEYS = ("brand", "brandName", "brand_name", "manufacturer", "designer")
+NAME_KEYS = ("name", "productName", "product_name", "modelName", "model", "title")
+FORMER_PRICE_KEYS = ("listPrice", "list_price", "originalPrice", "regularPrice", "retailPrice", "msrp")
+CURRENT_PRICE_KEYS = ("offerPrice", "offer_price", "salePrice", "finalPrice", "currentPrice", "price")
+DISCOUNT_KEYS = ("discount", "discountPercent", "discountPercentage", "percentOff")
+SKU_KEYS = ("sku", "partNumber", "upc", "productId", "product_id", "id")
+AVAILABILITY_KEYS = ("availability", "inStock", "in_stock", "stockStatus", "available")
+
+CAPTURE_POLL_SECONDS = 0.5
+
+
+# -----------------------------
+# DRIVER SETUP
+# -----------------------------
+
+def enable_network_capture(chrome_options):
+    """Turn on Chrome performance logging so network events can be read back."""
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return chrome_options
+
+
+def start_capture(driver):
+    """Enable the CDP Network domain and drop any events from earlier pages."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.get_log("performance")
+
+
+# -----------------------------
+# RESPONSE COLLECTION
+# -----------------------------
+
+def collect_json_responses(driver, pending):
+    """Return the decoded bodies of the JSON responses that finished loading since the last call.
+
+    A JSON response's requestId is noted in ``pending`` when its headers
+    arrive (Network.responseReceived); the body is only fetched once
+    Network.loadingFinished says Chrome has all of it. Pass the same set
+    on every call for one page.
+    """
+    payloads = []
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        method = message.get("method")
+        params = message.get("params", {})
+        if method == "Network.responseReceived":
+            if "json" in params["response"].get("mimeType", ""):
+                pending.add(params["requestId"])
+            continue
+        if method == "Network.loadingFailed":
+            pending.discard(params.get("requestId"))
+            continue
+        if method != "Network.loadingFinished" or params.get("requestId") not in pending:
+            continue
+        pending.discard(params["requestId"])
+
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+        except Exception:
+            # Body already evicted from Chrome's buffer (e.g. redirects, preflights)
+            continue
+
+        text = body.get("body", "")
+        if body.get("base64Encoded"):
+            text = base64.b64decode(text).decode("utf-8", errors="replace")
+        try:
+            payloads.append(json.loads(text))
+        except ValueError:
+            continue
+    return payloads
+
+
+def find_product_lists(payload):
+    """Walk a JSON payload and yield every list that looks like a list of products."""
+    if isinstance(payload, list):
+        items = [item for item in payload if isinstance(item, dict)]
+        if items and any(_first(item, NAME_KEYS) is not None and
+                         _first(item, CURRENT_PRICE_KEYS + FORMER_PRICE_KEYS) is not None
+                         for item in items):
+            yield items
+            return
+        for item in payload:
+            yield from find_product_lists(item)
+    elif isinstance(payload, dict):
+        for value in payload.values():
+            yield from find_product_lists(value)
+
+
+# -----------------------------
+# MAPPING TO RECORDS
+# -----------------------------
+
+def _first(item, keys):
+    """Return the value of the first key present in the item (or None)."""
+    for key in keys:
+        if key in item and item[key] not in (None, ""):
+            return item[key]
+    return None
+
+
+def _text(value):
+    """Flatten nested values like {"name": "Ray-Ban"} to a plain string."""
+    if isinstance(value, dict):
+        value = _first(value, ("name", "value", "label", "text"))
+    return str(value).strip() if value is not None else None
+
+
+def _price(value):
+    """Convert 189, "189.00", "$1,189.00" or {"value": 189} to a float."""
+    if isinstance(value, dict):
+        value = _first(value, ("value", "amount", "price"))
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace("$", "").replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def _discount(value):
+    """Convert 30, "30% off" or 0.3 to an integer percent."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(round(value * 100)) if 0 < value < 1 else int(value)
+    match = re.search(r"(\d+)", str(value))
+    return int(match.group(1)) if match else None
+
+
+def _availability(value):
+    """Normalise booleans and stock-status strings."""
+    if isinstance(value, bool):
+        return "InStock" if value else "OutOfStock"
+    return _text(value)
+
+
+def map_product(item):
+    """Map one product object from the retailer's JSON to our record layout."""
+    return {
+        "Brand": _text(_first(item, BRAND_KEYS)),
+        "Product_Name": _text(_first(item, NAME_KEYS)),
+        "Former_Price": _price(_first(item, FORMER_PRICE_KEYS)),
+        "Current_Price": _price(_first(item, CURRENT_PRICE_KEYS)),
+        "Discount": _discount(_first(item, DISCOUNT_KEYS)),
+        "SKU": _text(_first(item, SKU_KEYS)),
+        "Availability": _availability(_first(item, AVAILABILITY_KEYS)),
+    }
+
+
+def capture_products(driver, url, timeout=60):
+    """Load a page and return the products found in its JSON (XHR) responses.
+
+    Returns an empty list when no product JSON arrived within the timeout, or
+    when the page finished loading without any JSON response (a
+    server-rendered page), so the caller can fall back to parsing the
+    rendered HTML.
+    """
+    start_capture(driver)
+    driver.get(url)
+
+    products = []
+    pending = set()
+    any_json = False
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        payloads = collect_json_responses(driver, pending)
+        any_json = any_json or bool(payloads) or bool(pending)
+        for payload in payloads:
+            for product_list in find_product_lists(payload):
+                products.extend(map_product(item) for item in product_list)
+        # Stop once products arrived and the grid's XHRs have gone quiet
+        if products and not payloads:
+            break
+        if not any_json and driver.execute_script("return document.readyState") == "complete":
+            print("⚠ Page loaded without any JSON response")
+            break
+        time.sleep(CAPTURE_POLL_SECONDS)
+
+    print(f"✅ Captured {len(products)} products from JSON responses")
+    return products
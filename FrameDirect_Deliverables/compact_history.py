@@ -0,0 +1,228 @@
+import os
+import csv
+import gzip
+import json
+import heapq
+import zlib
+import argparse
+import tempfile
+from jsonl_store import (atomic_write, read_jsonl, iter_json_array, write_pretty_json,
+                         detect_compression, zstandard, COPY_CHUNK)
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+MEMORY_MB = 256            # rough budget for the records of one partition
+BYTES_IN_MEMORY = 4        # a parsed record takes ~4x its size on disk
+MAX_PARTITIONS = 512
+KEY_FIELDS = {
+    "framesdirect": ("Brand", "Product_Name"),
+    "glasses": ("brand", "name"),
+}
+LATEST, DISTINCT = "latest", "distinct"
+
+
+# -----------------------------
+# READING / WRITING HISTORY FILES
+# -----------------------------
+
+def file_format(path):
+    """"csv", "json" or "jsonl" (optionally .gz/.zst) from the file name."""
+    name = path[:-len(".gz")] if path.endswith(".gz") else path[:-len(".zst")] if path.endswith(".zst") else path
+    for fmt in ("csv", "jsonl", "json"):
+        if name.endswith("." + fmt):
+            return fmt
+    raise ValueError(f"Don't know how to compact {path} (expected .csv, .json or .jsonl)")
+
+
+def read_history(path):
+    """Returns (fields, records iterator); fields is None for JSON/JSONL."""
+    fmt = file_format(path)
+    if fmt == "jsonl":
+        return None, read_jsonl(path)
+    if fmt == "json":
+        return None, iter_json_array(path)
+    with open(path, newline="", encoding="utf-8") as f:
+        fields = next(csv.reader(f), [])
+
+    def rows():
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    return fields, rows()
+
+
+def write_history(path, fields, records):
+    """Rewrites a history file from a record iterator, atomically (temp file + rename)."""
+    fmt = file_format(path)
+    if fmt == "json":
+        write_pretty_json(path, records)
+        return
+    if fmt == "csv":
+        def write_csv(f):
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(records)
+        atomic_write(path, write_csv)
+        return
+
+    compression = detect_compression(path)
+
+    def write_jsonl(f):
+        if compression == "gzip":
+            stream = gzip.GzipFile(fileobj=f, mode="wb")
+        elif compression == "zstd":
+            stream = zstandard.ZstdCompressor().stream_writer(f, closefd=False)
+        else:
+            stream = f
+        for record in records:
+            stream.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        if stream is not f:
+            stream.close()
+    atomic_write(path, write_jsonl, mode="wb")
+
+
+# -----------------------------
+# COMPACTION
+# -----------------------------
+
+def detect_key_fields(fields):
+    """Product key for a file's columns: FramesDirect or glasses.com naming."""
+    for key_fields in KEY_FIELDS.values():
+        if all(field in fields for field in key_fields):
+            return key_fields
+    raise ValueError(f"No product key in columns {fields}; pass --key")
+
+
+def sort_key(key):
+    return tuple("" if value is None else str(value) for value in key)
+
+
+def num_partitions(path, memory_mb):
+    """Enough hash partitions for each one's records to fit the memory budget."""
+    size = os.path.getsize(path)
+    if detect_compression(path):
+        size *= 8   # compressed JSONL expands roughly this much
+    return max(1, min(MAX_PARTITIONS, -(-size * BYTES_IN_MEMORY // (memory_mb * 1024 * 1024))))
+
+
+def partition(records, key_fields, workdir, count):
+    """Pass 1: spread records over ``count`` files by hash of the product key.
+
+    Each line is [sequence number, record]; the sequence number is the row's
+    position in the history, i.e. its age. Returns (partition paths, rows read).
+    """
+    paths = [os.path.join(workdir, f"part-{i:03d}.jsonl") for i in range(count)]
+    files = [open(path, "w", encoding="utf-8") for path in paths]
+    rows = 0
+    try:
+        for seq, record in enumerate(records):
+            key = json.dumps([record.get(field) for field in key_fields], ensure_ascii=False)
+            files[zlib.crc32(key.encode("utf-8")) % count].write(json.dumps([seq, record], ensure_ascii=False) + "\n")
+            rows += 1
+    finally:
+        for f in files:
+            f.close()
+    return paths, rows
+
+
+def reduce_partition(path, key_fields, keep):
+    """Pass 2: de-dup one partition in memory; returns its records sorted by product, then age.
+
+    keep="latest" keeps the newest row per product; keep="distinct" keeps the
+    first row of every distinct price point (all columns) per product.
+    """
+    kept = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            seq, record = json.loads(line)
+            key = tuple(record.get(field) for field in key_fields)
+            if keep == DISTINCT:
+                key = (key, json.dumps(record, sort_keys=True, ensure_ascii=False))
+                if key in kept:
+                    continue
+            kept[key] = (seq, record)
+    rows = [(sort_key(record.get(field) for field in key_fields), seq, record) for seq, record in kept.values()]
+    rows.sort(key=lambda row: (row[0], row[1]))
+    return rows
+
+
+def compact_file(path, keep=LATEST, key_fields=None, memory_mb=MEMORY_MB):
+    """De-dup and sort a CSV/JSON/JSONL history file with bounded memory, then rewrite it atomically.
+
+    Records are hash-partitioned by product key into temp files next to the
+    history file; each partition is de-duplicated and sorted on its own, and
+    the sorted runs are merged (heapq.merge) straight into the new file.
+    Returns (rows before, rows after).
+    """
+    fields, records = read_history(path)
+    count = num_partitions(path, memory_mb)
+    with tempfile.TemporaryDirectory(prefix=".compact-", dir=os.path.dirname(os.path.abspath(path))) as workdir:
+        if key_fields is None:
+            # Peek at the first record to pick the naming convention
+            first = next(records, None)
+            if first is None:
+                print(f"{path} is empty, nothing to compact")
+                return 0, 0
+            key_fields = detect_key_fields(fields or list(first))
+            records = _chain_first(first, records)
+        parts, rows_before = partition(records, key_fields, workdir, count)
+
+        # Sorted runs, one per partition (they hold disjoint products)
+        runs = []
+        for i, part in enumerate(parts):
+            run_path = os.path.join(workdir, f"run-{i:03d}.jsonl")
+            with open(run_path, "w", encoding="utf-8") as f:
+                for key, seq, record in reduce_partition(part, key_fields, keep):
+                    f.write(json.dumps([key, seq, record], ensure_ascii=False) + "\n")
+            os.remove(part)
+            runs.append(run_path)
+
+        rows_after = 0
+
+        def merged():
+            nonlocal rows_after
+            streams = [_read_run(run_path) for run_path in runs]
+            for key, seq, record in heapq.merge(*streams, key=lambda row: (row[0], row[1])):
+                rows_after += 1
+                yield record
+
+        write_history(path, fields, merged())
+    print(f"✅ Compacted {path}: {rows_before} rows -> {rows_after} ({keep}, {count} partitions)")
+    return rows_before, rows_after
+
+
+def _chain_first(first, records):
+    yield first
+    yield from records
+
+
+def _read_run(path):
+    with open(path, encoding="utf-8", buffering=COPY_CHUNK) as f:
+        for line in f:
+            key, seq, record = json.loads(line)
+            yield tuple(key), seq, record
+
+
+# -----------------------------
+# RUN SCRIPT
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="De-dup and sort accumulated CSV/JSON/JSONL history files with bounded memory.")
+    parser.add_argument("files", nargs="+",
+                        help="history files, e.g. framesdirectdotcom_data.csv framesdirectdotcom.json")
+    parser.add_argument("--keep", choices=[LATEST, DISTINCT], default=LATEST,
+                        help="latest observation per product, or every distinct price point")
+    parser.add_argument("--key", default=None,
+                        help="comma-separated product key columns (default: Brand,Product_Name or brand,name)")
+    parser.add_argument("--memory-mb", type=int, default=MEMORY_MB,
+                        help="memory budget per partition; bigger files get more partitions")
+    args = parser.parse_args()
+
+    key_fields = tuple(args.key.split(",")) if args.key else None
+    for path in args.files:
+        if not os.path.exists(path):
+            print(f"❌ {path} not found")
+            continue
+        compact_file(path, args.keep, key_fields, args.memory_mb)
@@ -0,0 +1,121 @@
+import os
+import csv
+from contextlib import nullcontext
+from itertools import groupby
+from jsonl_store import JsonlWriter
+
+
+# -----------------------------
+# SINKS
+# -----------------------------
+# A sink takes one page's records at a time. write() returns only once the
+# records are stored, so the caller can advance its checkpoint afterwards.
+# "stage" names the run_metrics stage its write time is counted under.
+
+class CsvSink:
+    """Appends records to a CSV file (header written when the file is new)."""
+
+    name = "CSV"
+    stage = "file_save"
+
+    def __init__(self, path, fields):
+        self.path = path
+        self.fields = fields
+        self._file = None
+        self._writer = None
+
+    def write(self, records):
+        if self._file is None:
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            self._file = open(self.path, "a", newline="", encoding="utf-8")
+            # Extra fields (e.g. SKU/Availability from CDP capture) are kept in JSON only
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fields, extrasaction="ignore")
+            if new_file:
+                self._writer.writeheader()
+        self._writer.writerows(records)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return len(records)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class JsonlSink:
+    """Appends records to a JSONL file (compressed files are confirmed on close)."""
+
+    name = "JSONL"
+    stage = "file_save"
+
+    def __init__(self, path, compression=None):
+        self.writer = JsonlWriter(path, compression)
+
+    def write(self, records):
+        self.writer.write(records)
+        return len(records)
+
+    def close(self):
+        self.writer.close()
+
+
+class LoaderSink:
+    """Loads records through a PostgresLoader/SqliteLoader, one transaction per page."""
+
+    name = "database"
+    stage = "postgres"
+
+    def __init__(self, loader, scraped_at):
+        self.loader = loader
+        self.scraped_at = scraped_at
+
+    def write(self, records):
+        return self.loader.load_rows(records, self.scraped_at)
+
+    def close(self):
+        pass  # the loader (connection pool) is shared and closed by its owner
+
+
+# -----------------------------
+# PIPELINE
+# -----------------------------
+
+class PagePipeline:
+    """Sends each page's records to every sink as soon as the page is parsed.
+
+    Nothing is kept between pages, so memory stays flat however many pages a
+    crawl has. write() raises if a sink fails; callers only move their
+    checkpoint after write() returned. With ``metrics`` the time of each
+    sink goes to its stage (file_save / postgres).
+    """
+
+    def __init__(self, sinks, metrics=None):
+        self.sinks = list(sinks)
+        self.metrics = metrics
+        self.records_written = 0
+
+    def write(self, records):
+        """Store one page's records in every sink; returns the number of records."""
+        if not records:
+            return 0
+        # One timing per stage and page, however many sinks share the stage
+        for stage, sinks in groupby(self.sinks, key=lambda sink: sink.stage):
+            with self.metrics.stage(stage) if self.metrics is not None else nullcontext():
+                for sink in sinks:
+                    sink.write(records)
+        self.records_written += len(records)
+        if self.metrics is not None:
+            self.metrics.count("records", len(records))
+        print(f"✅ Saved {len(records)} records to {', '.join(sink.name for sink in self.sinks)}")
+        return len(records)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
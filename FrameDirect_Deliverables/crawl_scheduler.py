@@ -0,0 +1,254 @@
+import time
+import queue
+import random
+import asyncio
+import threading
+from collections import deque
+from urllib.parse import urlparse
+
+
+# -----------------------------
+# CONFIGURATION (politeness budget per domain)
+# -----------------------------
+MAX_IN_FLIGHT_PER_DOMAIN = 2    # fetches allowed at the same time on one site
+REQUESTS_PER_SECOND = 0.5       # long-run request rate per site (token refill)
+BURST = 2                       # tokens that can be spent back to back
+SLOW_RESPONSE_SECONDS = 10      # a fetch slower than this counts as "site is struggling"
+BASE_BACKOFF_SECONDS = 2
+MAX_BACKOFF_SECONDS = 60
+
+
+# -----------------------------
+# RATE LIMITING
+# -----------------------------
+
+class TokenBucket:
+    """Token-bucket rate limiter usable from threads and from asyncio."""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Take a token if one is available; otherwise return the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire_blocking(self):
+        """Block the calling thread until a token is available."""
+        wait = self._take()
+        while wait > 0:
+            time.sleep(wait)
+            wait = self._take()
+
+    async def acquire(self):
+        """Wait (without blocking the event loop) until a token is available."""
+        wait = self._take()
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self._take()
+
+
+class SlowResponseBackoff:
+    """Adds a jittered, exponentially growing pause while a site responds slowly."""
+
+    def __init__(self, slow_threshold=SLOW_RESPONSE_SECONDS,
+                 base_delay=BASE_BACKOFF_SECONDS, max_delay=MAX_BACKOFF_SECONDS):
+        self.slow_threshold = slow_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.level = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        """Record how long a fetch took: slow fetches raise the level, fast ones lower it."""
+        with self._lock:
+            if seconds > self.slow_threshold:
+                self.level += 1
+                print(f"⚠ Slow response ({seconds:.1f}s), backing off (level {self.level})")
+            elif self.level > 0:
+                self.level -= 1
+
+    def delay(self):
+        """Seconds to pause before the next fetch (0 while the site is healthy)."""
+        if self.level == 0:
+            return 0
+        ceiling = min(self.max_delay, self.base_delay * 2 ** self.level)
+        return random.uniform(ceiling / 2, ceiling)  # "equal jitter"
+
+
+# -----------------------------
+# SCHEDULER
+# -----------------------------
+
+class CrawlScheduler:
+    """Asyncio crawl scheduler that keeps several fetches in flight per domain.
+
+    Fetch functions are ordinary blocking callables (requests / Selenium); they
+    run in worker threads while the event loop enforces, per domain, a limit on
+    concurrent fetches, a token-bucket rate and a slow-response backoff.
+    """
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT_PER_DOMAIN, rate=REQUESTS_PER_SECOND, burst=BURST):
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.burst = burst
+        self._domains = {}
+
+    def _domain_state(self, url):
+        """Return (semaphore, bucket, backoff) for the URL's domain."""
+        domain = urlparse(url).netloc
+        if domain not in self._domains:
+            self._domains[domain] = (
+                asyncio.Semaphore(self.max_in_flight),
+                TokenBucket(self.rate, self.burst),
+                SlowResponseBackoff(),
+            )
+        return self._domains[domain]
+
+    async def fetch(self, url, fetch_fn):
+        """Run fetch_fn(url) in a worker thread under the domain's politeness budget."""
+        semaphore, bucket, backoff = self._domain_state(url)
+        async with semaphore:
+            await bucket.acquire()
+            pause = backoff.delay()
+            if pause:
+                await asyncio.sleep(pause)
+
+            loop = asyncio.get_event_loop()
+            start = time.monotonic()
+            try:
+                return await loop.run_in_executor(None, fetch_fn, url)
+            finally:
+                backoff.observe(time.monotonic() - start)
+
+    async def crawl_pages(self, urls, fetch_fn, handle_result):
+        """Fetch URLs concurrently and hand results over in URL order.
+
+        handle_result(url, result, error) is called once per URL, in order; if it
+        returns False the remaining fetches are cancelled. Only max_in_flight
+        pages are scheduled ahead of the one being handed over, so a slow page
+        cannot make finished pages pile up in memory behind it. ``urls`` is
+        consumed lazily, so it can be an open-ended generator (e.g. load-more
+        offsets) that the handler stops.
+        """
+        async def run(url):
+            try:
+                return await self.fetch(url, fetch_fn), None
+            except Exception as e:
+                return None, e
+
+        urls = iter(urls)
+        pending = deque()  # (url, task), in URL order
+        try:
+            while True:
+                while len(pending) < self.max_in_flight:
+                    url = next(urls, None)
+                    if url is None:
+                        break
+                    pending.append((url, asyncio.ensure_future(run(url))))
+                if not pending:
+                    break
+                url, task = pending.popleft()
+                result, error = await task
+                if handle_result(url, result, error) is False:
+                    break
+        finally:
+            tasks = [task for _, task in pending]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def crawl_chain(self, start_url, fetch_fn, handle_result):
+        """Follow a chain of pages where each page reveals the next URL.
+
+        handle_result(url, result, error) returns the next URL, or None to stop.
+        """
+        url = start_url
+        while url:
+            try:
+                result, error = await self.fetch(url, fetch_fn), None
+            except Exception as e:
+                result, error = None, e
+            url = handle_result(url, result, error)
+
+    def run(self, coroutine):
+        """Run a crawl coroutine to completion."""
+        return asyncio.run(coroutine)
+
+    # -----------------------------
+    # GENERATOR INTERFACE
+    # -----------------------------
+
+    def iter_pages(self, urls, fetch_fn):
+        """Generator version of crawl_pages: yields (url, result, error) in URL order.
+
+        Breaking out of the loop stops the crawl.
+        """
+        return self._iterate(lambda handle: self.crawl_pages(urls, fetch_fn, handle),
+                             lambda url, result, error: True, stop_value=False)
+
+    def iter_chain(self, start_url, fetch_fn, next_url_fn):
+        """Generator version of crawl_chain: yields (url, result, error) page by page.
+
+        next_url_fn(url, result, error) returns the URL to fetch next (None ends the chain).
+        """
+        return self._iterate(lambda handle: self.crawl_chain(start_url, fetch_fn, handle),
+                             next_url_fn, stop_value=None)
+
+    def _iterate(self, make_crawl, on_item, stop_value):
+        """Run a crawl on a background thread and yield its results as they are handed over.
+
+        At most max_in_flight results wait in the queue: when the consumer
+        (e.g. the output sinks) falls behind, the crawl waits for it instead of
+        buffering pages.
+        """
+        items = queue.Queue(maxsize=self.max_in_flight)
+        stop = threading.Event()
+        done = object()
+        failure = []
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    items.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def handle(url, result, error):
+            if not put((url, result, error)):
+                return stop_value
+            return on_item(url, result, error)
+
+        def crawl():
+            try:
+                self.run(make_crawl(handle))
+            except BaseException as e:
+                failure.append(e)
+            finally:
+                put(done)
+
+        thread = threading.Thread(target=crawl, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = items.get()
+                if item is done:
+                    break
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+        if failure:
+            raise failure[0]
@@ -0,0 +1,165 @@
+import math
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+BLOOM_CAPACITY = 100_000      # minimum number of records the filter is sized for
+BLOOM_ERROR_RATE = 0.01       # false positives only cost one SQLite lookup
+
+
+def record_digest(record):
+    """16-byte hash of a record's fields and values (the de-dup key)."""
+    data = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).digest()
+
+
+# -----------------------------
+# BLOOM FILTER
+# -----------------------------
+
+class BloomFilter:
+    """Bit array answering "definitely not seen" without touching the disk.
+
+    Positions come from the record digest itself (double hashing), so adding
+    and checking a record costs no extra hashing.
+    """
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, digest):
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, digest):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+# -----------------------------
+# INDEX
+# -----------------------------
+
+class DedupIndex:
+    """On-disk set of every record written, with a Bloom filter in front.
+
+    One SQLite file can be shared by several retailers and by every run: rows
+    are keyed on (retailer, record digest) and remember the run that last
+    wrote them. ``drop_duplicates()`` checks each record once as it streams
+    in, so a page costs O(page) lookups however long the history is.
+
+    By default only duplicates within the current run are skipped, which keeps
+    each run's output complete. With ``across_runs`` a record already written
+    by any earlier run is skipped too, so the output only grows by records
+    (price points) never seen before.
+
+    Nothing is stored until ``commit()``, so the index only advances once the
+    records were saved.
+    """
+
+    def __init__(self, path, retailer, run_id=None, across_runs=False):
+        self.retailer = retailer
+        self.run_id = run_id or datetime.now().isoformat(timespec="microseconds")
+        self.across_runs = across_runs
+        self.counts = {"written": 0, "this_run": 0, "earlier_runs": 0}
+        self._committed_counts = dict(self.counts)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL lets scrapers for other retailers use the same file concurrently
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen_records ("
+                "retailer TEXT NOT NULL, digest BLOB NOT NULL, "
+                "first_seen TIMESTAMP NOT NULL, last_run TEXT NOT NULL, "
+                "PRIMARY KEY (retailer, digest)) WITHOUT ROWID"
+            )
+        (stored,) = self.conn.execute(
+            "SELECT COUNT(*) FROM seen_records WHERE retailer = ?", (retailer,)
+        ).fetchone()
+        self.bloom = BloomFilter(max(BLOOM_CAPACITY, 2 * stored))
+        for (digest,) in self.conn.execute("SELECT digest FROM seen_records WHERE retailer = ?", (retailer,)):
+            self.bloom.add(digest)
+
+    def _is_duplicate(self, digest):
+        if digest not in self.bloom:
+            # Never seen by any run: no lookup needed
+            self.bloom.add(digest)
+            self.conn.execute(
+                "INSERT INTO seen_records (retailer, digest, first_seen, last_run) VALUES (?, ?, ?, ?)",
+                (self.retailer, digest, self.run_id, self.run_id),
+            )
+            return False
+        row = self.conn.execute(
+            "SELECT last_run FROM seen_records WHERE retailer = ? AND digest = ?", (self.retailer, digest)
+        ).fetchone()
+        if row is None:
+            # Bloom false positive
+            self.conn.execute(
+                "INSERT INTO seen_records (retailer, digest, first_seen, last_run) VALUES (?, ?, ?, ?)",
+                (self.retailer, digest, self.run_id, self.run_id),
+            )
+            return False
+        if row[0] == self.run_id:
+            self.counts["this_run"] += 1
+            return True
+        self.conn.execute(
+            "UPDATE seen_records SET last_run = ? WHERE retailer = ? AND digest = ?",
+            (self.run_id, self.retailer, digest),
+        )
+        if self.across_runs:
+            self.counts["earlier_runs"] += 1
+            return True
+        return False
+
+    def drop_duplicates(self, records):
+        """Returns the records not already written (order kept)."""
+        fresh = []
+        with self._lock:
+            for record in records:
+                if not self._is_duplicate(record_digest(record)):
+                    fresh.append(record)
+            self.counts["written"] += len(fresh)
+        return fresh
+
+    @property
+    def skipped(self):
+        return self.counts["this_run"] + self.counts["earlier_runs"]
+
+    def report(self):
+        counts = self.counts
+        detail = f"{counts['this_run']} repeated within this run"
+        if self.across_runs:
+            detail += f", {counts['earlier_runs']} already written by earlier runs"
+        print(f"Dedup: {counts['written']} records kept, {self.skipped} duplicates skipped ({detail})")
+
+    def commit(self):
+        """Store this page's records in the index (call once they were saved)."""
+        with self._lock:
+            self.conn.commit()
+            self._committed_counts = dict(self.counts)
+
+    def rollback(self):
+        """Forget the records checked since the last commit (e.g. the save failed).
+
+        The counters go back to their values at the last commit. The Bloom
+        filter keeps the forgotten digests, which only costs a lookup.
+        """
+        with self._lock:
+            self.conn.rollback()
+            self.counts = dict(self._committed_counts)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,182 @@
+import json
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+CHANGE_FIELD = "Change_Type"
+NEW, CHANGED, DISAPPEARED = "new", "changed", "disappeared"
+
+
+class DeltaIndex:
+    """On-disk last-seen state per product, used to emit only what changed.
+
+    Products are keyed on (retailer, brand, product name). Several listings
+    can share a key (colours and sizes of one frame, or rows without a
+    brand/name), so each key stores the prices of all its variants. Records
+    are compared with the key's state as it was at the start of the run: a
+    record whose prices match one of the stored variants is unchanged, any
+    other is "changed" (or "new" when the key was not known). ``changes()``
+    returns the new and changed records tagged with a Change_Type;
+    ``disappeared()`` returns the products (and variants) a complete crawl no
+    longer saw. Nothing is written to the index until ``commit()``, so it
+    only advances once the changes were saved.
+    """
+
+    def __init__(self, path, retailer, key_fields=("Brand", "Product_Name"),
+                 value_fields=("Former_Price", "Current_Price", "Discount")):
+        self.retailer = retailer
+        self.key_fields = key_fields
+        self.value_fields = value_fields
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.seen = {}       # key -> variant states seen this run
+        self.counts = {NEW: 0, CHANGED: 0, DISAPPEARED: 0, "unchanged": 0}
+        self._start = {}     # key -> variant states stored at the start of the run
+        self._unmatched = {} # key -> Counter of those not matched by a record yet
+        self._changed = Counter()  # key -> records tagged "changed" this run
+        self._pending = {}   # key -> variant states to store (None = remove)
+        self._lock = threading.Lock()
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS last_seen ("
+                "retailer TEXT NOT NULL, brand TEXT NOT NULL, product_name TEXT NOT NULL, "
+                "state TEXT NOT NULL, changed_at TIMESTAMP, "
+                "PRIMARY KEY (retailer, brand, product_name))"
+            )
+
+    def _key(self, record):
+        # Missing brand/name are folded to '' so they still match next run
+        return tuple(record.get(field) or "" for field in self.key_fields)
+
+    def _state(self, record):
+        return {field: record.get(field) for field in self.value_fields}
+
+    @staticmethod
+    def _variants(state):
+        """Stored variant states of a key (older indexes hold a single state)."""
+        variants = json.loads(state)
+        return variants if isinstance(variants, list) else [variants]
+
+    @staticmethod
+    def _fingerprint(state):
+        return json.dumps(state, sort_keys=True)
+
+    def _load(self, key):
+        """Read the key's stored variants once per run, before this run writes them."""
+        if key not in self._start:
+            row = self.conn.execute(
+                "SELECT state FROM last_seen WHERE retailer = ? AND brand = ? AND product_name = ?",
+                (self.retailer, *key),
+            ).fetchone()
+            self._start[key] = self._variants(row[0]) if row else []
+            self._unmatched[key] = Counter(self._fingerprint(v) for v in self._start[key])
+
+    def changes(self, records):
+        """Return the new or changed records, each tagged with Change_Type."""
+        delta = []
+        with self._lock:
+            for record in records:
+                key = self._key(record)
+                self._load(key)
+                state = self._state(record)
+                self.seen.setdefault(key, []).append(state)
+                unmatched = self._unmatched[key]
+                fingerprint = self._fingerprint(state)
+                if unmatched[fingerprint] > 0:
+                    unmatched[fingerprint] -= 1
+                    self.counts["unchanged"] += 1
+                    if self._changed[key]:
+                        self._pending[key] = self._current(key)
+                    continue
+                change = CHANGED if self._start[key] else NEW
+                self.counts[change] += 1
+                self._changed[key] += change == CHANGED
+                self._pending[key] = self._current(key)
+                delta.append({**record, CHANGE_FIELD: change})
+        return delta
+
+    def _current(self, key):
+        """Variants to store for the key: those seen so far, then the stored ones not seen yet.
+
+        The latter may still come on a later page; one of them is left out
+        per "changed" record, which took its place.
+        """
+        return self.seen[key] + list(self._remaining(key))[self._changed[key]:]
+
+    def _remaining(self, key):
+        """Stored variants of the key no record of this run has matched yet."""
+        unmatched = Counter(self._unmatched[key])
+        for variant in self._start[key]:
+            fingerprint = self._fingerprint(variant)
+            if unmatched[fingerprint] > 0:
+                unmatched[fingerprint] -= 1
+                yield variant
+
+    def disappeared(self):
+        """Products in the index that this run did not see, tagged "disappeared".
+
+        Only call this after a complete crawl; a partial run would report
+        every product it did not reach.
+        """
+        gone = []
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT brand, product_name, state FROM last_seen WHERE retailer = ?", (self.retailer,)
+            ).fetchall()
+            for brand, product_name, state in rows:
+                key = (brand, product_name)
+                if key not in self.seen:
+                    variants = self._variants(state)
+                    self._pending[key] = None
+                else:
+                    # Variants no record matched, less those a "changed" record replaced
+                    variants = list(self._remaining(key))[self._changed[key]:]
+                    if not variants and not self._changed[key]:
+                        continue
+                    self._pending[key] = self.seen[key]
+                for variant in variants:
+                    record = dict(zip(self.key_fields, (brand or None, product_name or None)))
+                    record.update(variant)
+                    record[CHANGE_FIELD] = DISAPPEARED
+                    gone.append(record)
+            self.counts[DISAPPEARED] += len(gone)
+        return gone
+
+    def run_delta(self, records, crawl_complete):
+        """Changes for one run: new/changed records, plus disappeared ones if the crawl was complete."""
+        delta = self.changes(records)
+        gone = self.disappeared() if crawl_complete else []
+        self.report(crawl_complete)
+        return delta + gone
+
+    def report(self, crawl_complete):
+        counts = self.counts
+        print(f"Delta: {counts[NEW]} new, {counts[CHANGED]} changed, {counts[DISAPPEARED]} disappeared, "
+              f"{counts['unchanged']} unchanged"
+              + ("" if crawl_complete else " (partial crawl, disappearances not checked)"))
+
+    def commit(self, changed_at=None):
+        """Write the pending state changes in one transaction."""
+        changed_at = (changed_at or datetime.now()).isoformat(sep=" ", timespec="seconds")
+        with self._lock, self.conn:
+            for key, state in self._pending.items():
+                if state is None:
+                    self.conn.execute(
+                        "DELETE FROM last_seen WHERE retailer = ? AND brand = ? AND product_name = ?",
+                        (self.retailer, *key),
+                    )
+                else:
+                    self.conn.execute(
+                        "INSERT INTO last_seen (retailer, brand, product_name, state, changed_at) "
+                        "VALUES (?, ?, ?, ?, ?) ON CONFLICT (retailer, brand, product_name) "
+                        "DO UPDATE SET state = excluded.state, changed_at = excluded.changed_at",
+                        (self.retailer, *key, json.dumps(state), changed_at),
+                    )
+            self._pending.clear()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,230 @@
+import re
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Fast parsers are optional; html.parser (pure Python) is always available
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401  (only needed as a BeautifulSoup tree builder)
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+
+# -----------------------------
+# VALUE CONVERTERS
+# -----------------------------
+
+def parse_price(text):
+    """Convert "$1,189.00" to 1189.0 (None when missing or not a number)."""
+    if not text:
+        return None
+    try:
+        return float(text.replace("$", "").replace(",", ""))
+    except ValueError:
+        return None
+
+
+def parse_discount(text):
+    """Pull the first integer out of text like "30% Off"."""
+    if not text:
+        return None
+    match = re.search(r"(\d+)", text)
+    return int(match.group(1)) if match else None
+
+
+# -----------------------------
+# SITE SPECIFICATIONS
+# -----------------------------
+# Each field is a path of (tag, class) steps searched from the product tile.
+# "strip" is "nodes" for get_text(strip=True) or "outer" for .text.strip().
+# "version" is bumped whenever a spec change alters the output, so parse
+# results cached for the old version are not reused (see page_cache.py).
+
+FRAMESDIRECT = {
+    "name": "framesdirect",
+    "version": 1,
+    "tile": ("div", "prod-holder"),
+    "require": None,
+    "fields": {
+        "Brand": [("span", "prodBrand d-none")],
+        "Product_Name": [("div", "product_name")],
+        "Former_Price": [("div", "prod-bot"), ("div", "prod-catalog-retail-price")],
+        "Current_Price": [("div", "prod-bot"), ("div", "prod-aslowas")],
+        "Discount": [("div", "prod-bot"), ("div", "frame-discount size-11")],
+    },
+    "converters": {
+        "Former_Price": parse_price,
+        "Current_Price": parse_price,
+        "Discount": parse_discount,
+    },
+    "strip": "nodes",
+    # (tag, attribute to match, value to match, attribute holding the URL)
+    "next": ("a", "aria-label", "next page", "href"),
+}
+
+GLASSES = {
+    "name": "glasses",
+    "version": 2,
+    "tile": ("a", "product-tile"),
+    # Tiles without a product-info block are skipped
+    "require": [("div", "product-info")],
+    "fields": {
+        "Brand": [("div", "product-info"), ("div", "product-brand")],
+        "Product_Name": [("div", "product-info"), ("div", "product-code")],
+        "Former_Price": [("div", "product-info"), ("div", "product-prices"), ("div", "product-list-price")],
+        "Current_Price": [("div", "product-info"), ("div", "product-prices"), ("div", "product-offer-price")],
+        # Any discount badge; the extra class names the amount ("thirty", "twenty", ...)
+        "Discount": [("div", "discount-badge")],
+    },
+    "converters": {},
+    "strip": "outer",
+    "next": ("div", "class", "load-more-wrapper", "data-filter-url"),
+}
+
+
+# -----------------------------
+# BACKENDS
+# -----------------------------
+
+def available_backends():
+    """Return the usable backends, fastest first."""
+    backends = []
+    if LexborHTMLParser is not None:
+        backends.append("selectolax")
+    if HAS_LXML:
+        backends.append("lxml")
+    backends.append("html.parser")
+    return backends
+
+
+DEFAULT_BACKEND = available_backends()[0]
+
+
+def _css(path):
+    """Turn [("div", "a b"), ("span", "c")] into "div.a.b span.c"."""
+    return " ".join(tag + "".join("." + cls for cls in classes.split()) for tag, classes in path)
+
+
+def _has_class(attrs, cls):
+    value = attrs.get("class") or ""
+    classes = value.split() if isinstance(value, str) else value
+    return cls in classes
+
+
+def _strainer(site):
+    """SoupStrainer that keeps only the product tiles and the next-page element."""
+    tile_tag, tile_class = site["tile"]
+    next_tag, match_attr, match_value, _ = site["next"]
+
+    def wanted(name, attrs):
+        if name == tile_tag and _has_class(attrs, tile_class):
+            return True
+        if name == next_tag:
+            if match_attr == "class":
+                return _has_class(attrs, match_value)
+            return attrs.get(match_attr) == match_value
+        return False
+
+    return SoupStrainer(wanted)
+
+
+def _extract_soup(html, site, parser):
+    """Extract with BeautifulSoup (lxml or html.parser), parsing only the tile subtrees."""
+    soup = BeautifulSoup(html, parser, parse_only=_strainer(site))
+    tile_tag, tile_class = site["tile"]
+    products = []
+
+    for tile in soup.find_all(tile_tag, class_=tile_class):
+        if site["require"] and _find_path_soup(tile, site["require"]) is None:
+            continue
+        record = {}
+        for field, path in site["fields"].items():
+            node = _find_path_soup(tile, path)
+            if node is None:
+                record[field] = None
+            elif site["strip"] == "nodes":
+                record[field] = node.get_text(strip=True)
+            else:
+                record[field] = node.text.strip()
+        products.append(record)
+
+    next_tag, match_attr, match_value, url_attr = site["next"]
+    if match_attr == "class":
+        next_el = soup.find(next_tag, class_=match_value, attrs={url_attr: True})
+    else:
+        next_el = soup.find(next_tag, attrs={match_attr: match_value})
+    next_url = next_el.get(url_attr) if next_el is not None else None
+    return products, next_url
+
+
+def _find_path_soup(node, path):
+    for tag, cls in path:
+        node = node.find(tag, class_=cls)
+        if node is None:
+            return None
+    return node
+
+
+def _extract_selectolax(html, site):
+    """Extract with selectolax's Lexbor parser (C, CSS selectors)."""
+    tree = LexborHTMLParser(html)
+    tile_tag, tile_class = site["tile"]
+    require_css = _css(site["require"]) if site["require"] else None
+    field_css = {field: _css(path) for field, path in site["fields"].items()}
+    products = []
+
+    for tile in tree.css(f"{tile_tag}.{tile_class}"):
+        if require_css and tile.css_first(require_css) is None:
+            continue
+        record = {}
+        for field, css in field_css.items():
+            node = tile.css_first(css)
+            if node is None:
+                record[field] = None
+            elif site["strip"] == "nodes":
+                record[field] = node.text(strip=True)
+            else:
+                record[field] = node.text().strip()
+        products.append(record)
+
+    next_tag, match_attr, match_value, url_attr = site["next"]
+    if match_attr == "class":
+        next_css = f"{next_tag}.{match_value}[{url_attr}]"
+    else:
+        next_css = f'{next_tag}[{match_attr}="{match_value}"]'
+    next_el = tree.css_first(next_css)
+    next_url = next_el.attributes.get(url_attr) if next_el is not None else None
+    return products, next_url
+
+
+# -----------------------------
+# PUBLIC API
+# -----------------------------
+
+def extract_page(html, site, backend=None, base_url=None):
+    """Parse a page once and return (products, next_url).
+
+    ``backend`` is "selectolax", "lxml" or "html.parser" (default: the fastest
+    one installed). A relative next URL is made absolute with ``base_url``.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend == "selectolax":
+        raw_products, next_url = _extract_selectolax(html, site)
+    else:
+        raw_products, next_url = _extract_soup(html, site, backend)
+
+    converters = site["converters"]
+    products = [
+        {field: converters[field](value) if field in converters else value
+         for field, value in record.items()}
+        for record in raw_products
+    ]
+
+    if next_url and base_url:
+        next_url = urljoin(base_url, next_url)
+    return products, next_url
@@ -0,0 +1,242 @@
+import re
+import json
+import time
+import threading
+from contextlib import nullcontext
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from load_profile import wait_until_ready
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.265 Safari/537.36"
+)
+HTTP_TIMEOUT = 20      # seconds for a plain HTTP request
+POOL_SIZE = 10         # keep-alive connections kept open per host
+# Sent with load-more / filter requests so the site answers with the tile
+# fragment its own "Load more" button would insert, not a full page
+FRAGMENT_HEADERS = {"X-Requested-With": "XMLHttpRequest", "Accept": "text/html, */*; q=0.01"}
+
+
+# -----------------------------
+# FETCHER
+# -----------------------------
+
+class FetchError(Exception):
+    """Raised when the HTTP fetch fails and the Chrome fallback is switched off."""
+
+
+class PageFetcher:
+    """Fetches pages over a pooled HTTP session and only starts Chrome when a page needs JavaScript.
+
+    A page is accepted from the HTTP path when its HTML already holds an element
+    whose class is one of the ready markers (e.g. "prod-holder" or
+    "product-tile"). Otherwise the
+    page is loaded in Chrome and we wait for ``wait_class`` as before, or,
+    with a ``load_profile`` (see load_profile.py), until the tile count is
+    stable or the network is idle.
+    With a ``browser_session`` (browser_session.BrowserSession) Chrome is a warm
+    browser kept between runs instead of one started by ``driver_factory``.
+    With use_browser=False Chrome is never started and such pages raise
+    FetchError instead (e.g. load tests against the local mock server).
+    With ``metrics`` (run_metrics.RunMetrics) the driver setup, get and wait
+    stages are timed and each page's size is recorded.
+    """
+
+    def __init__(self, driver_factory, ready_markers, wait_class, wait_timeout=60, use_http=True,
+                 use_browser=True, load_profile=None, browser_session=None, metrics=None):
+        self.driver_factory = driver_factory
+        self.ready_markers = tuple(ready_markers)
+        # A class attribute naming one of the markers as a whole class, not the word anywhere in the page
+        self._tile_pattern = re.compile(
+            r"""class\s*=\s*["'][^"']*(?<![\w-])(?:%s)(?![\w-])""" % "|".join(map(re.escape, self.ready_markers))
+        )
+        self.wait_class = wait_class
+        self.wait_timeout = wait_timeout
+        self.use_http = use_http
+        self.use_browser = use_browser
+        self.load_profile = load_profile
+        self.browser_session = browser_session
+        self.metrics = metrics
+        self.fetch_log = []
+        self._driver = None
+        self._driver_lock = threading.Lock()
+        self._log_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+
+    @property
+    def driver(self):
+        """The fallback WebDriver, started on first use."""
+        if self.browser_session is not None:
+            return self.browser_session.driver()
+        if self._driver is None:
+            print("Starting Chrome for pages that need JavaScript...")
+            self._driver = self.driver_factory()
+        return self._driver
+
+    def _stage(self, name):
+        return self.metrics.stage(name) if self.metrics is not None else nullcontext()
+
+    def _driver_started(self):
+        if self.browser_session is not None:
+            return self.browser_session.attached
+        return self._driver is not None
+
+    def has_products(self, html):
+        """Return True when the HTML already holds a product tile element."""
+        return self._tile_pattern.search(html) is not None
+
+    def fetch_http(self, url):
+        """Fetch a page over the pooled HTTP session; return (HTML, bytes on the wire) or (None, bytes)."""
+        try:
+            with self._stage("get"):
+                response = self.session.get(url, timeout=HTTP_TIMEOUT)
+        except requests.RequestException as e:
+            print(f"⚠ HTTP fetch failed for {url}: {e}")
+            return None, 0
+        transferred = _transferred(response)
+        if response.status_code != 200:
+            print(f"⚠ HTTP {response.status_code} for {url}")
+            return None, transferred
+        return response.text, transferred
+
+    def fetch_fragment(self, url):
+        """Fetch a load-more / filter endpoint as an XHR fragment over HTTP (never Chrome).
+
+        Returns the fragment HTML; raises FetchError when the request fails.
+        """
+        start = time.perf_counter()
+        try:
+            with self._stage("get"):
+                response = self.session.get(url, timeout=HTTP_TIMEOUT, headers=FRAGMENT_HEADERS)
+        except requests.RequestException as e:
+            raise FetchError(f"Fragment fetch failed for {url}: {e}")
+        if response.status_code != 200:
+            raise FetchError(f"HTTP {response.status_code} for fragment {url}")
+        html = response.text
+        if self.metrics is not None:
+            self.metrics.fetched(len(html))
+        self._record(url, "fragment", len(html), time.perf_counter() - start,
+                     {"transferred_bytes": _transferred(response)})
+        return html
+
+    def fetch_selenium(self, url):
+        """Load a page in Chrome and wait for the product grid (raises TimeoutException).
+
+        Returns (HTML, readiness stats); the stats are empty without a load profile.
+        """
+        with self._driver_lock:
+            if self._driver_started():
+                driver = self.driver
+            else:
+                with self._stage("driver_setup"):
+                    driver = self.driver
+            with self._stage("get"):
+                driver.get(url)
+            with self._stage("wait"):
+                if self.load_profile is not None:
+                    stats = wait_until_ready(driver, self.load_profile)
+                else:
+                    WebDriverWait(driver, self.wait_timeout).until(
+                        EC.presence_of_element_located((By.CLASS_NAME, self.wait_class))
+                    )
+                    stats = {}
+            html = driver.page_source
+            if self.browser_session is not None:
+                self.browser_session.page_done()
+            return html, stats
+
+    def fetch(self, url):
+        """Fetch a page, trying plain HTTP first and falling back to Chrome."""
+        start = time.perf_counter()
+        html, transferred = self.fetch_http(url) if self.use_http else (None, 0)
+        method = "http"
+        stats = {"transferred_bytes": transferred}
+        if html is None or not self.has_products(html):
+            if not self.use_browser:
+                raise FetchError(f"No product markup over HTTP for {url}")
+            method = "selenium"
+            if self.use_http and self.metrics is not None:
+                self.metrics.count("fallbacks")
+            html, browser_stats = self.fetch_selenium(url)
+            # The failed HTTP attempt's bytes count too (unknown if its size was)
+            if transferred is not None:
+                transferred += browser_stats.get("transferred_bytes", 0)
+            stats = {**browser_stats, "transferred_bytes": transferred}
+
+        if self.metrics is not None:
+            self.metrics.fetched(len(html))
+        self._record(url, method, len(html), time.perf_counter() - start, stats)
+        return html
+
+    def _record(self, url, method, num_bytes, seconds, stats=None):
+        """Remember which path was used for a page, how long it took and what it transferred."""
+        entry = {
+            "url": url,
+            "method": method,
+            "bytes": num_bytes,
+            "seconds": round(seconds, 3),
+            **(stats or {}),
+        }
+        with self._log_lock:
+            self.fetch_log.append(entry)
+        ready = f", {entry['tiles']} tiles, {entry['ready']}" if "ready" in entry else ""
+        transferred = entry.get("transferred_bytes", 0)
+        print(f"Fetched {url} via {method} ({num_bytes} bytes, "
+              f"{'unknown' if transferred is None else transferred} transferred, {seconds:.2f}s{ready})")
+
+    def save_fetch_log(self, path):
+        """Write the per-page fetch log to a JSON file."""
+        save_fetch_log(self.fetch_log, path)
+
+    def close(self):
+        """Close the HTTP session and quit Chrome if it was started."""
+        self.session.close()
+        if self.browser_session is not None:
+            self.browser_session.release()
+        if self._driver is not None:
+            self._driver.quit()
+            self._driver = None
+
+
+def _transferred(response):
+    """Bytes on the wire: Content-Length (compressed size), or None when the server does not send it.
+
+    response.content is the decompressed body, so its length is no measure
+    of the transfer.
+    """
+    length = response.headers.get("Content-Length", "")
+    return int(length) if length.isdigit() else None
+
+
+def save_fetch_log(fetch_log, path):
+    """Write a per-page fetch log (list of entries) to a JSON file."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fetch_log, f, indent=4)
+    used_http = sum(1 for entry in fetch_log if entry["method"] != "selenium")
+    sizes = [entry.get("transferred_bytes", 0) for entry in fetch_log]
+    transferred = sum(size for size in sizes if size is not None)
+    unknown = sizes.count(None)
+    seconds = sum(entry["seconds"] for entry in fetch_log)
+    average = seconds / len(fetch_log) if fetch_log else 0
+    print(f"✅ Fetch log saved to {path} ({used_http}/{len(fetch_log)} pages via HTTP, "
+          f"{transferred / 1024:.0f} KB transferred"
+          + (f" + {unknown} pages of unknown size" if unknown else "")
+          + f", {average:.2f}s per page)")
@@ -0,0 +1,195 @@
+import os
+import csv
+import json
+import argparse
+from html import escape
+from itertools import cycle, islice
+from extraction_engine import FRAMESDIRECT, GLASSES
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(HERE, "fixtures")
+FRAMESDIRECT_CSV = os.path.join(HERE, "framesdirectdotcom_data.csv")
+GLASSES_CSV = os.path.join(HERE, "..", "GlassesDotCom_Deliverables", "glassesdotcom_data.csv")
+
+FRAMESDIRECT_PAGE_SIZE = 24
+GLASSES_PAGE_SIZE = 26
+
+# Fixture pages rebuilt from rows the scrapers collected, in the sites' markup
+FIXTURES = {
+    "framesdirect_eyeglasses_p1": (FRAMESDIRECT, FRAMESDIRECT_PAGE_SIZE),
+    "glasses_eyeglasses_p1": (GLASSES, GLASSES_PAGE_SIZE),
+}
+
+
+# -----------------------------
+# MARKUP
+# -----------------------------
+
+def _slug(*parts):
+    return "-".join(str(p or "").lower().replace(" ", "-") for p in parts if p)
+
+
+def framesdirect_tile(record):
+    """One FramesDirect prod-holder tile; missing fields are left out like on the site."""
+    brand, name = record["Brand"], record["Product_Name"]
+    slug = escape(_slug(brand, name))
+    alt = escape(" ".join(p for p in (brand, name) if p))
+    parts = [
+        f'<div class="prod-holder" data-prod-id="{slug}">',
+        f'<div class="prod-top"><a href="/{slug}-eyeglasses.html">'
+        f'<img src="/images/{slug}.jpg" alt="{alt}" loading="lazy" width="280" height="140"></a></div>',
+    ]
+    if brand or name:
+        parts.append('<div class="prod-mid">')
+        if brand:
+            parts.append(f'<span class="prodBrand d-none">{escape(brand)}</span>')
+        if name:
+            parts.append(f'<div class="product_name">{escape(name)}</div>')
+        parts.append('<div class="prod-colors"><span class="swatch"></span><span class="swatch"></span></div></div>')
+    if record["Current_Price"] is not None or record["Former_Price"] is not None:
+        parts.append('<div class="prod-bot">')
+        if record["Former_Price"] is not None:
+            parts.append(f'<div class="prod-catalog-retail-price">${record["Former_Price"]:,.2f}</div>')
+        if record["Current_Price"] is not None:
+            parts.append(f'<div class="prod-aslowas">${record["Current_Price"]:,.2f}</div>')
+        if record["Discount"] is not None:
+            parts.append(f'<div class="frame-discount size-11">{record["Discount"]}% OFF</div>')
+        parts.append('</div>')
+    parts.append('</div>')
+    return "\n".join(parts)
+
+
+def glasses_tile(record):
+    """One glasses.com product-tile anchor."""
+    brand, name = record["Brand"], record["Product_Name"]
+    slug = escape(_slug(brand, name))
+    alt = escape(" ".join(p for p in (brand, name) if p))
+    parts = [f'<a class="product-tile" href="/gl-us/{slug}" data-position="1">']
+    if record["Discount"]:
+        parts.append(f'<div class="product-badge discount-badge thirty">{escape(record["Discount"])}</div>')
+    parts.append(f'<div class="product-image"><img src="/images/{slug}.png" alt="{alt}" loading="lazy"></div>')
+    parts.append('<div class="product-info">')
+    parts.append(f'<div class="product-brand">{escape(brand or "")}</div>')
+    parts.append(f'<div class="product-code">{escape(name or "")}</div>')
+    parts.append('<div class="product-prices">')
+    if record["Former_Price"]:
+        parts.append(f'<div class="product-list-price">{escape(record["Former_Price"])}</div>')
+    if record["Current_Price"]:
+        parts.append(f'<div class="product-offer-price">{escape(record["Current_Price"])}</div>')
+    parts.append('</div></div></a>')
+    return "\n".join(parts)
+
+
+# Header/footer/script noise so pages have the weight of the real ones
+PAGE_HEAD = (
+    "<!DOCTYPE html><html lang='en'><head><meta charset='utf-8'><title>Eyeglasses</title>"
+    + "<link rel='stylesheet' href='/static/site.css'>" * 5
+    + "<script>window.dataLayer = window.dataLayer || [];" + "dataLayer.push({'event': 'view'});" * 50 + "</script>"
+    + "</head><body><header><nav class='main-menu'>"
+    + "".join(f"<a class='menu-link' href='/c/{i}'>Category {i}</a>" for i in range(150))
+    + "</nav></header>"
+)
+PAGE_FOOT = (
+    "<footer>" + "".join(f"<p class='footer-link'><a href='/f/{i}'>Link {i}</a></p>" for i in range(100))
+    + "</footer><script src='/static/app.js'></script></body></html>"
+)
+
+
+def framesdirect_page(records, page_number=1, has_next=True):
+    """A FramesDirect catalogue page with ?p=N&type=pagestate pagination."""
+    tiles = "\n".join(framesdirect_tile(r) for r in records)
+    pager = f'<a aria-label="next page" href="/eyeglasses/?p={page_number + 1}&amp;type=pagestate">Next</a>' if has_next else ""
+    return f"{PAGE_HEAD}<main><div class='prod-list'>{tiles}</div><div class='pager'>{pager}</div></main>{PAGE_FOOT}"
+
+
+def glasses_fragment(records, next_url=None):
+    """The tile grid and load-more wrapper that a glasses.com "Load more" request returns."""
+    tiles = "\n".join(glasses_tile(r) for r in records)
+    load_more = f'<div class="load-more-wrapper" data-filter-url="{escape(next_url)}"><button>Load more</button></div>' if next_url else ""
+    return f"<div class='product-grid'>{tiles}</div>{load_more}"
+
+
+def glasses_page(records, next_url=None):
+    """A glasses.com catalogue page with a data-filter-url load-more wrapper."""
+    return f"{PAGE_HEAD}<main class='catalog-page'>{glasses_fragment(records, next_url)}</main>{PAGE_FOOT}"
+
+
+# -----------------------------
+# RECORDS
+# -----------------------------
+
+def load_rows(site, limit=None):
+    """Read the collected rows for a site, converted like the extractor returns them."""
+    path = FRAMESDIRECT_CSV if site is FRAMESDIRECT else GLASSES_CSV
+    rows = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in islice(csv.DictReader(f), limit):
+            record = {key: (value or None) for key, value in row.items()}
+            if site is FRAMESDIRECT:
+                for key in ("Former_Price", "Current_Price"):
+                    record[key] = float(record[key]) if record[key] else None
+                record["Discount"] = int(record["Discount"]) if record["Discount"] else None
+            rows.append(record)
+    return rows
+
+
+def build_page(site, num_tiles, page_number=1):
+    """Synthetic page with num_tiles tiles, cycling through the collected rows."""
+    records = list(islice(cycle(load_rows(site, 500)), num_tiles))
+    if site is FRAMESDIRECT:
+        return framesdirect_page(records, page_number)
+    return glasses_page(records, f"/gl-us/eyeglasses?begin={page_number * num_tiles}")
+
+
+def expected_records(site, records):
+    """What the extractor should return for the given rows."""
+    if site is FRAMESDIRECT:
+        return records
+    # glasses.com tiles always carry a product-info block, so empty fields come back as ""
+    return [
+        {**r, "Brand": r["Brand"] or "", "Product_Name": r["Product_Name"] or ""}
+        for r in records
+    ]
+
+
+def fixture_path(name, suffix):
+    return os.path.join(FIXTURES_DIR, f"{name}{suffix}")
+
+
+def load_fixture(name):
+    """Return (site, html, expected_records, expected_next_url) for a fixture."""
+    site = FIXTURES[name][0]
+    with open(fixture_path(name, ".html"), encoding="utf-8") as f:
+        html = f.read()
+    with open(fixture_path(name, ".expected.json"), encoding="utf-8") as f:
+        expected = json.load(f)
+    return site, html, expected["products"], expected["next_url"]
+
+
+def write_fixtures():
+    """(Re)write the fixture pages and their expected extraction results."""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for name, (site, page_size) in FIXTURES.items():
+        records = load_rows(site, page_size)
+        if site is FRAMESDIRECT:
+            html = framesdirect_page(records, 1)
+            next_url = "/eyeglasses/?p=2&type=pagestate"
+        else:
+            next_url = f"/gl-us/eyeglasses?begin={page_size}&pageSize={page_size}"
+            html = glasses_page(records, next_url)
+
+        with open(fixture_path(name, ".html"), "w", encoding="utf-8") as f:
+            f.write(html)
+        with open(fixture_path(name, ".expected.json"), "w", encoding="utf-8") as f:
+            json.dump({"products": expected_records(site, records), "next_url": next_url}, f, indent=4)
+        print(f"✅ Wrote {name} ({len(records)} tiles, {len(html) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the offline HTML fixture corpus.")
+    parser.parse_args()
+    write_fixtures()
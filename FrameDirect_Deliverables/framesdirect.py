@@ -6,16 +6,17 @@ import json
 import os
 import re 
 from datetime import datetime
-import psycopg2
 from bs4 import BeautifulSoup
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import TimeoutException
+from crawl_scheduler import TokenBucket, SlowResponseBackoff
+from jsonl_store import append_jsonl
+from parquet_store import write_parquet
+from postgres_loader import create_loader
+from load_profile import FRAMESDIRECT_LOAD, apply_load_profile, enable_resource_blocking, wait_until_ready
+from browser_session import chrome_service
+from run_metrics import RunMetrics
+from retry_policy import RetryPolicy, RetryError, DeadLetterList
 
 
 # -----------------------------------------------------
@@ -23,23 +24,41 @@ from selenium.common.exceptions import TimeoutException
 # -----------------------------------------------------
 
 # Base URL
-base_url = "https://www.framesdirect.com"
+base_url = os.environ.get("FRAMESDIRECT_BASE_URL", "https://www.framesdirect.com")
 
 # Safety stop so that scraper does not run forever when there is endless next page looping
-MAX_PAGES = 10
+MAX_PAGES = int(os.environ.get("FRAMESDIRECT_MAX_PAGES", 10))
 
 # Checkpoint file
 CHECKPOINT_FILE = "checkpoint.json"
 
+# Politeness budget: page loads allowed per minute (token bucket). Time spent
+# loading and parsing a page counts towards the wait, unlike a fixed sleep.
+REQUESTS_PER_MINUTE = 2
+politeness = TokenBucket(rate=REQUESTS_PER_MINUTE / 60, capacity=1)
+backoff = SlowResponseBackoff()
+
+# Per-stage timings of this run, saved next to the data as a JSON report and a Prometheus textfile
+metrics = RunMetrics("framesdirect_linear")
+
+# Slow or failed pages are retried with backoff; pages that still fail are
+# listed in dead_letters.json, which framesdirect_webscrapping_model.py re-queues
+retry = RetryPolicy(metrics=metrics)
+
 
 
 # Output folder for CSV and JSON
-OUTPUT_FOLDER = r"C:\Users\Admin\Documents\Smart_Eyewear_Choices\FrameDirect_Deliverables"
+OUTPUT_FOLDER = os.environ.get(
+    "FRAMESDIRECT_OUTPUT_FOLDER", r"C:\Users\Admin\Documents\Smart_Eyewear_Choices\FrameDirect_Deliverables"
+)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
 # File paths
 CSV_PATH = os.path.join(OUTPUT_FOLDER, "framesdirectdotcom_data.csv")
-JSON_PATH = os.path.join(OUTPUT_FOLDER, "framesdirectdotcom.json")
+JSON_PATH = os.path.join(OUTPUT_FOLDER, "framesdirectdotcom.json")  # legacy file, rebuilt by jsonl_export.py
+JSONL_PATH = os.path.join(OUTPUT_FOLDER, "framesdirectdotcom.jsonl")
+PARQUET_DIR = os.path.join(OUTPUT_FOLDER, "parquet")  # typed columnar copy, partitioned by retailer and date
+dead_letters = DeadLetterList(os.path.join(OUTPUT_FOLDER, "dead_letters.json"))
 
 
 # CHECKPOINT HANDLING
@@ -63,14 +82,15 @@ chrome_options = Options()
 chrome_options.add_argument("--headless")   
 chrome_options.add_argument("--disable-gpu")    
 chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.265 Safari/537.36")
-driver = webdriver.Chrome(options=chrome_options)
+# Block images, fonts, styles and trackers (not needed to read the product grid)
+apply_load_profile(chrome_options, FRAMESDIRECT_LOAD)
 print("done setting up..")
 
-# Installing Chrome WebDriver
-print("Installing Chrome WD")
-service = Service(ChromeDriverManager().install())
+# Chrome WebDriver (path resolved once and cached by browser_session.py)
 print("Final Setup")
-driver = webdriver.Chrome(service=service, options=chrome_options)
+with metrics.stage("driver_setup"):
+    driver = webdriver.Chrome(service=chrome_service(), options=chrome_options)
+    enable_resource_blocking(driver, FRAMESDIRECT_LOAD)
 print("Selenium setup complete.")
 
 
@@ -78,9 +98,18 @@ print("Selenium setup complete.")
 # STEP 2: DATA FETCHING/EXTRACTION
 # --------------------------------
 
+def load_page(url):
+    """Open a catalogue page and wait until its tiles are loaded (raises TimeoutException)."""
+    with metrics.stage("get"):
+        driver.get(url)
+    with metrics.stage("wait"):
+        return wait_until_ready(driver, FRAMESDIRECT_LOAD)
+
+
 # Defining & Lauching Start URL
-start_url = f"{base_url}/eyeglasses/?p={start_page}&type=pagestate"
-driver.get(start_url)
+page_url = f"{base_url}/eyeglasses/?p={start_page}&type=pagestate"
+politeness.acquire_blocking()
+page_start = time.monotonic()
 
 # Storage for extracted products & extraction page track
 eye_glasses_data = []
@@ -90,21 +119,33 @@ while True:
     current_page = start_page + page_count
     print(f"\n--- Scraping page {current_page} ---")
 
-    # === Wait for product tiles to load ===
+    # === Wait until the tile count is stable or the network is idle ===
     try:
         print("Waiting for product tiles to load...")
-        WebDriverWait(driver,60).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "prod-holder"))
-        )
-        print("Done...Proceed to parse the data")
-    except TimeoutException as e:
-        print(f"Error waiting for {driver.current_url}: {e}")
-        driver.quit()
-        print("Browser closed due to timeout")
-        break
+        load = retry.call(load_page, page_url)
+        dead_letters.remove(page_url)
+        backoff.observe(time.monotonic() - page_start)
+        print(f"Done ({load['tiles']} tiles, {load['ready']}, {time.monotonic() - page_start:.2f}s, "
+              f"{load['transferred_bytes']} bytes transferred)...Proceed to parse the data")
+    except RetryError as e:
+        print(f"❌ {e}")
+        dead_letters.add(page_url, e.error, e.attempts, page=current_page)
+        metrics.count("failed_pages")
+        if page_count + 1 >= MAX_PAGES:
+            print(f"Reached MAX_PAGES ({MAX_PAGES}). Stopping.")
+            break
+        # The page number is in the URL, so the crawl goes on with the next page
+        page_url = f"{base_url}/eyeglasses/?p={current_page + 1}&type=pagestate"
+        politeness.acquire_blocking()
+        page_start = time.monotonic()
+        page_count += 1
+        continue
 
     # PARSE EXTRACTED DATA WITH BEAUTIFUL SOUP & FILTER ALL PRODUCT-HOLDER CLASS
-    soup = BeautifulSoup(driver.page_source, "html.parser")
+    extract_start = time.perf_counter()
+    page_source = driver.page_source
+    metrics.fetched(len(page_source))
+    soup = BeautifulSoup(page_source, "html.parser")
     product_tiles = soup.find_all("div", class_="prod-holder")
     print(f"Found {len(product_tiles)} products on this page")
 
@@ -174,6 +215,9 @@ while True:
         # === Append saved product's dictionary to the data storage list. ===
         eye_glasses_data.append(data)
 
+    metrics.observe("extract", time.perf_counter() - extract_start)
+    metrics.extracted(len(product_tiles))
+    metrics.count("pages")
     
     
     # ------------------------------
@@ -200,9 +244,12 @@ while True:
         if not next_url.startswith("http"):
             next_url = base_url + next_url
         print(f"Going to next page: {next_url}")
-        driver.get(next_url)
+        # Wait for a request token (plus a jittered backoff if the site is slow)
+        politeness.acquire_blocking()
+        time.sleep(backoff.delay())
+        page_start = time.monotonic()
+        page_url = next_url
         page_count += 1
-        time.sleep(30)
     else:
         print("No more pages. Stopping.")
         break
@@ -212,6 +259,7 @@ while True:
 # ---------------------------------------------
 
 if eye_glasses_data:
+    save_start = time.perf_counter()
     # ---- CSV ----
     if os.path.exists(CSV_PATH):
         # Append without headers
@@ -226,17 +274,18 @@ if eye_glasses_data:
             dict_writer.writerows(eye_glasses_data)
     print(f"✅ Saved {len(eye_glasses_data)} records to CSV at {CSV_PATH}")
 
-    # ---- JSON ----
-    if os.path.exists(JSON_PATH):
-        with open(JSON_PATH, "r", encoding="utf-8") as f:
-            existing_data = json.load(f)
-        existing_data.extend(eye_glasses_data)
-        with open(JSON_PATH, "w", encoding="utf-8") as f:
-            json.dump(existing_data, f, indent=4)
-    else:
-        with open(JSON_PATH, "w", encoding="utf-8") as f:
-            json.dump(eye_glasses_data, f, indent=4)
-    print(f"✅ Saved {len(eye_glasses_data)} records to JSON at {JSON_PATH}")
+    # ---- JSON Lines (append-only) ----
+    append_jsonl(JSONL_PATH, eye_glasses_data)
+    print(f"✅ Saved {len(eye_glasses_data)} records to JSONL at {JSONL_PATH}")
+
+    # ---- Parquet (one file per run) ----
+    try:
+        parquet_file = write_parquet(PARQUET_DIR, "framesdirect", eye_glasses_data, datetime.now())
+        print(f"✅ Saved {len(eye_glasses_data)} records to Parquet at {parquet_file}")
+    except Exception as e:
+        print(f"⚠ Parquet copy not written: {e}")
+    metrics.observe("file_save", time.perf_counter() - save_start)
+    metrics.count("records", len(eye_glasses_data))
 else:
     print("⚠ No data collected. Nothing saved.")
 
@@ -248,35 +297,11 @@ else:
 # -----------------------
 if eye_glasses_data:
     try:
-        # Connect to PostgreSQL
-        conn = psycopg2.connect(
-            dbname="EyeWearChoices_DB",
-            user="postgres",
-            password="Eng0802097@",
-            host="localhost",   # e.g., "localhost" or your warehouse endpoint
-            port="5432"         # default Postgres port
-        )
-        cur = conn.cursor()
-
-        # Insert each product into the table
-        for product in eye_glasses_data:
-            cur.execute("""
-                INSERT INTO framesdirect.eyewear_products
-                (brand, product_name, former_price, current_price, discount, scraped_at)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (
-                product["Brand"],
-                product["Product_Name"],
-                product["Former_Price"],
-                product["Current_Price"],
-                product["Discount"],
-                datetime.now()
-            ))
-
-        # Commit and close connection
-        conn.commit()
-        cur.close()
-        conn.close()
+        # Load all rows with one COPY batch (pooled connection, one run timestamp)
+        with metrics.stage("postgres"):
+            loader = create_loader()
+            loader.load_rows(eye_glasses_data, datetime.now())
+            loader.close()
         print(f"✅ Saved {len(eye_glasses_data)} records to PostgreSQL")
 
     except Exception as e:
@@ -289,3 +314,4 @@ else:
 # close the browser
 driver.quit()
 print("Extraction completed, Browser Closed!")
+metrics.save(OUTPUT_FOLDER)
@@ -1,40 +1,77 @@
 
 import os
-import re
-import csv
 import json
 import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import psycopg2
-from bs4 import BeautifulSoup
+from urllib.parse import urlsplit, parse_qs
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager
+from fetch_engine import PageFetcher, save_fetch_log
+from cdp_capture import enable_network_capture, capture_products
+from load_profile import FRAMESDIRECT_LOAD, apply_load_profile, enable_resource_blocking
+from browser_session import BrowserSession, chrome_service
+from postgres_loader import create_loader
+from jsonl_store import jsonl_path
+from crawl_pipeline import PagePipeline, CsvSink, JsonlSink, LoaderSink
+from parquet_store import ParquetSink
+from extraction_engine import extract_page, FRAMESDIRECT
+from page_cache import PageCache
+from parse_pool import ParsePool, completed_future
+from run_metrics import RunMetrics
+from run_profiler import create_profiler, MODES as PROFILE_MODES, SAMPLE_RATE
+from delta_index import DeltaIndex, CHANGE_FIELD
+from retry_policy import RetryPolicy, RetryError, DeadLetterList, requeue
+from crawl_scheduler import (CrawlScheduler, TokenBucket, SlowResponseBackoff,
+                             MAX_IN_FLIGHT_PER_DOMAIN, REQUESTS_PER_SECOND)
 
 
 # -----------------------------
 # CONFIGURATION & GLOBALS
 # -----------------------------
-BASE_URL = "https://www.framesdirect.com"
+BASE_URL = os.environ.get("FRAMESDIRECT_BASE_URL", "https://www.framesdirect.com")  # e.g. the mock server
 MAX_PAGES = 10
+NUM_DRIVERS = 4  # WebDriver instances used by the parallel (sharded) mode
 CHECKPOINT_FILE = "checkpoint.json"
-OUTPUT_FOLDER = r"C:\Users\Admin\Documents\Smart_Eyewear_Choices\FrameDirect_Deliverables"
+OUTPUT_FOLDER = os.environ.get(
+    "FRAMESDIRECT_OUTPUT_FOLDER", r"C:\Users\Admin\Documents\Smart_Eyewear_Choices\FrameDirect_Deliverables"
+)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 CSV_PATH = os.path.join(OUTPUT_FOLDER, "framesdirectdotcom_data.csv")
-JSON_PATH = os.path.join(OUTPUT_FOLDER, "framesdirectdotcom.json")
+JSON_PATH = os.path.join(OUTPUT_FOLDER, "framesdirectdotcom.json")  # legacy file, rebuilt by jsonl_export.py
+JSONL_COMPRESSION = None  # None, "gzip" or "zstd" (one compressed frame per run)
+JSONL_PATH = jsonl_path(os.path.join(OUTPUT_FOLDER, "framesdirectdotcom.jsonl"), JSONL_COMPRESSION)
+CSV_FIELDS = ["Brand", "Product_Name", "Former_Price", "Current_Price", "Discount"]
+FETCH_LOG_PATH = os.path.join(OUTPUT_FOLDER, "fetch_log.json")
+DEAD_LETTER_PATH = os.path.join(OUTPUT_FOLDER, "dead_letters.json")  # pages that failed all retries
+PARQUET_DIR = os.path.join(OUTPUT_FOLDER, "parquet")  # typed columnar copy (parquet_store.py); None disables it
+METRICS_DIR = OUTPUT_FOLDER  # run report (JSON) and Prometheus textfile (run_metrics.py)
+DB_SQLITE_PATH = None  # path to a local SQLite file to use instead of PostgreSQL
+DB_UPSERT = False      # merge rows on (retailer, brand, product_name, scraped date)
+PAGE_CACHE_DIR = os.path.join(OUTPUT_FOLDER, "page_cache")  # raw HTML cache; None disables it
+DELTA_MODE = False     # save only new/changed/disappeared products
+DELTA_INDEX_PATH = os.path.join(OUTPUT_FOLDER, "delta_index.sqlite")
+LOAD_PROFILE = FRAMESDIRECT_LOAD  # resource blocking and readiness timeouts (load_profile.py)
+BLOCK_RESOURCES = True  # skip images, fonts, styles and trackers in Chrome
+WARM_BROWSER = False    # keep Chrome running between runs (browser_session.py)
+PARSE_WORKERS = 0       # parser processes in pipeline mode (0 parses in the fetch threads)
+PARSE_QUEUE = None      # pages allowed to wait for a parser (default 2 per worker)
+PROFILE_RATE = SAMPLE_RATE  # share of runs profiled with profile="sample" (run_profiler.py)
 
 
 # -----------------------------
 # FUNCTIONS
 # -----------------------------
 
-def setup_webdriver():
-    """Sets up and returns a configured Selenium WebDriver."""
+def build_chrome_options(capture_network=False):
+    """Chrome options shared by fresh and warm browsers.
+
+    With capture_network=True Chrome keeps a performance log, so the product
+    JSON behind the catalogue grid can be read back over CDP.
+    """
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--disable-gpu")
@@ -42,12 +79,88 @@ def setup_webdriver():
         "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
         "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.265 Safari/537.36"
     )
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    if capture_network:
+        enable_network_capture(chrome_options)
+    if BLOCK_RESOURCES:
+        apply_load_profile(chrome_options, LOAD_PROFILE)
+    return chrome_options
+
+
+def block_resources(driver):
+    """Turns on CDP resource blocking for a new or attached driver (unless BLOCK_RESOURCES is off)."""
+    if BLOCK_RESOURCES:
+        enable_resource_blocking(driver, LOAD_PROFILE)
+
+
+def setup_webdriver(capture_network=False):
+    """Sets up and returns a configured Selenium WebDriver.
+
+    The chromedriver path is resolved once and cached (browser_session.py),
+    so no download check runs on every start. Unless BLOCK_RESOURCES is off,
+    resources the scraper does not need are blocked.
+    """
+    driver = webdriver.Chrome(service=chrome_service(), options=build_chrome_options(capture_network))
+    block_resources(driver)
     print("✅ Selenium WebDriver setup complete.")
     return driver
 
 
+def create_fetcher(use_http=True, use_browser=True, slot=0):
+    """Returns a PageFetcher that tries plain HTTP first and falls back to Chrome.
+
+    With WARM_BROWSER the fallback Chrome is the warm session for ``slot``
+    (one per parallel worker) instead of a fresh browser.
+    """
+    browser_session = None
+    if WARM_BROWSER and use_browser:
+        browser_session = BrowserSession("framesdirect", build_chrome_options, slot=slot, on_attach=block_resources)
+    return PageFetcher(
+        driver_factory=setup_webdriver,
+        ready_markers=("prod-holder",),
+        wait_class="prod-holder",
+        wait_timeout=LOAD_PROFILE["timeout"],
+        use_http=use_http,
+        use_browser=use_browser,
+        load_profile=LOAD_PROFILE,
+        browser_session=browser_session,
+        metrics=get_metrics(),
+    )
+
+
+def scrape_page_via_cdp(driver, url):
+    """Read one page's products from the captured JSON responses.
+
+    Returns (products, has_next_page). Falls back to parsing the rendered
+    HTML only when no product JSON was seen.
+    """
+    products = capture_products(driver, url, timeout=60)
+    if not products:
+        print("⚠ No product JSON captured, parsing the rendered page instead")
+        products = extract_product_data(driver.page_source)
+    has_next = bool(driver.find_elements(By.CSS_SELECTOR, 'a[aria-label="next page"][href]'))
+    return products, has_next
+
+
+_checkpoint_lock = threading.Lock()
+
+
+def read_checkpoint():
+    """Contents of the checkpoint file ({} when there is none yet)."""
+    if not os.path.exists(CHECKPOINT_FILE):
+        return {}
+    with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_completed_pages():
+    """Load the set of page numbers that already finished from the checkpoint file."""
+    checkpoint = read_checkpoint()
+    if "completed_pages" in checkpoint:
+        return set(checkpoint["completed_pages"])
+    # Older checkpoints only store "last_page": every page up to it is done
+    return set(range(1, checkpoint.get("last_page", 0) + 1))
+
+
 def load_checkpoint():
     """Load the last scraped page number from checkpoint file."""
     if os.path.exists(CHECKPOINT_FILE):
@@ -61,180 +174,584 @@ def load_checkpoint():
     return start_page
 
 
+def parse_page(html_source):
+    """Single parse of a FramesDirect page: (products, next_page_url)."""
+    return extract_page(html_source, FRAMESDIRECT, base_url=BASE_URL)
+
+
+def extract_page_data(html_source, url=None):
+    """Parses the HTML source once and returns (products, next_page_url).
+
+    When a url is given and the page cache is on, the raw HTML is cached and
+    a page whose content was already parsed is not parsed again.
+    """
+    cache = get_page_cache() if url else None
+    if cache is None:
+        with get_metrics().stage("extract"):
+            products, next_url = parse_page(html_source)
+        get_metrics().extracted(len(products))
+        print(f"✅ Extracted {len(products)} products from this page")
+        return products, next_url
+
+    with get_metrics().stage("extract"):
+        products, next_url, reused = cache.extract(url, html_source, FRAMESDIRECT, parse_page)
+    get_metrics().extracted(len(products))
+    if reused:
+        print(f"✅ Page unchanged, reused the cached parse ({len(products)} products)")
+    else:
+        print(f"✅ Extracted {len(products)} products from this page")
+    return products, next_url
+
+
+def queue_page_parse(parse_pool, html_source, url):
+    """Pipeline mode: cache the raw HTML and hand it to a parser process.
+
+    Returns (future of (products, next_url), cache digest); the future is
+    already done when this content was parsed before, and the digest is
+    None then (nothing left to cache).
+    """
+    cache = get_page_cache()
+    if cache is None:
+        return parse_pool.submit(html_source), None
+    digest = cache.store(url, html_source)
+    cached = cache.load_result(digest, FRAMESDIRECT)
+    if cached is not None:
+        print(f"✅ Page unchanged, reused the cached parse ({len(cached[0])} products)")
+        return completed_future(cached), None
+    return parse_pool.submit(html_source), digest
+
+
+def collect_page_parse(pending):
+    """Wait for a page queued by queue_page_parse(); returns (products, next_page_url)."""
+    future, digest = pending
+    products, next_url = future.result()
+    get_metrics().extracted(len(products))
+    if digest is not None:
+        get_page_cache().save_result(digest, FRAMESDIRECT, products, next_url)
+        print(f"✅ Extracted {len(products)} products from this page")
+    return products, next_url
+
+
 def extract_product_data(html_source):
     """Parses the HTML source and extracts product data."""
-    soup = BeautifulSoup(html_source, "html.parser")
-    product_tiles = soup.find_all("div", class_="prod-holder")
-    products = []
+    return extract_page_data(html_source)[0]
 
-    for tile in product_tiles:
-        brand_tag = tile.find("span", class_="prodBrand d-none")
-        brand = brand_tag.get_text(strip=True) if brand_tag else None
 
-        name_tag = tile.find("div", class_="product_name")
-        name = name_tag.get_text(strip=True) if name_tag else None
+def update_checkpoint(page_number, end=False):
+    """Mark a page as finished in the checkpoint file.
 
-        prices = tile.find("div", class_="prod-bot")
-        if prices:
-            # Original Price
-            orig_price_tag = prices.find("div", class_="prod-catalog-retail-price")
-            try:
-                original_price = float(orig_price_tag.get_text(strip=True).replace("$", "").replace(",", "")) if orig_price_tag else None
-            except ValueError:
-                original_price = None
+    Every finished page gets its own entry in "completed_pages"; "last_page"
+    is kept as the end of the unbroken run of finished pages from page 1, so
+    the sequential mode still resumes right after it. end=True records the
+    page as the catalogue's last one ("end_page"), where a resumed run stops.
+    """
+    with _checkpoint_lock:
+        checkpoint = read_checkpoint()
+        completed = load_completed_pages()
+        completed.add(page_number)
+        last_page = 0
+        while last_page + 1 in completed:
+            last_page += 1
+        checkpoint.update(last_page=last_page, completed_pages=sorted(completed))
+        if end:
+            checkpoint["end_page"] = page_number
+        with open(CHECKPOINT_FILE, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+    print(f"Checkpoint updated: page {page_number} done (last_page = {last_page})")
 
-            # Current Price
-            curr_price_tag = prices.find("div", class_="prod-aslowas")
-            try:
-                current_price = float(curr_price_tag.get_text(strip=True).replace("$", "").replace(",", "")) if curr_price_tag else None
-            except ValueError:
-                current_price = None
-
-            # Discount
-            discount_tag = prices.find("div", class_="frame-discount size-11")
-            if discount_tag:
-                match = re.search(r"(\d+)", discount_tag.get_text(strip=True))
-                discount = int(match.group(1)) if match else None
-            else:
-                discount = None
-        else:
-            original_price = current_price = discount = None
-
-        products.append({
-            "Brand": brand,
-            "Product_Name": name,
-            "Former_Price": original_price,
-            "Current_Price": current_price,
-            "Discount": discount
-        })
-
-    print(f"✅ Extracted {len(products)} products from this page")
-    return products
-
-
-def update_checkpoint(page_number):
-    """Update checkpoint file with last scraped page."""
-    with open(CHECKPOINT_FILE, "w", encoding="utf-8") as f:
-        json.dump({"last_page": page_number}, f)
-    print(f"Checkpoint updated: last_page = {page_number}")
-
-
-def save_data_to_files(data):
-    """Save extracted data to CSV and JSON."""
-    if not data:
-        print("⚠ No data collected. Nothing saved.")
-        return
 
-    # Save CSV
-    if os.path.exists(CSV_PATH):
-        with open(CSV_PATH, "a", newline="", encoding="utf-8") as csv_file:
-            writer = csv.DictWriter(csv_file, fieldnames=data[0].keys())
-            writer.writerows(data)
-    else:
-        with open(CSV_PATH, "w", newline="", encoding="utf-8") as csv_file:
-            writer = csv.DictWriter(csv_file, fieldnames=data[0].keys())
-            writer.writeheader()
-            writer.writerows(data)
-    print(f"✅ Saved {len(data)} records to CSV")
-
-    # Save JSON
-    if os.path.exists(JSON_PATH):
-        with open(JSON_PATH, "r", encoding="utf-8") as f:
-            existing_data = json.load(f)
-        existing_data.extend(data)
-        with open(JSON_PATH, "w", encoding="utf-8") as f:
-            json.dump(existing_data, f, indent=4)
-    else:
-        with open(JSON_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
-    print(f"✅ Saved {len(data)} records to JSON")
+_page_cache = None
 
 
-def save_data_to_postgres(data):
-    """Save extracted data to PostgreSQL."""
-    if not data:
-        print("⚠ No data collected. Nothing saved to PostgreSQL.")
-        return
+def get_page_cache():
+    """Return the shared raw-page cache (None when PAGE_CACHE_DIR is None)."""
+    global _page_cache
+    if _page_cache is None and PAGE_CACHE_DIR:
+        _page_cache = PageCache(PAGE_CACHE_DIR)
+    return _page_cache
+
+
+_metrics = None
+
+
+def get_metrics():
+    """Return this run's RunMetrics (stage timings and counters), created on first use."""
+    global _metrics
+    if _metrics is None:
+        _metrics = RunMetrics("framesdirect")
+    return _metrics
+
+
+def save_metrics():
+    """Write the run report and Prometheus textfile, then start afresh for the next run."""
+    global _metrics
+    if _metrics is not None:
+        _metrics.save(METRICS_DIR)
+        _metrics = None
 
+
+_loader = None
+
+
+def get_loader():
+    """Return the shared database loader (connection pool), creating it on first use."""
+    global _loader
+    if _loader is None:
+        _loader = create_loader(sqlite_path=DB_SQLITE_PATH, retailer="framesdirect", upsert=DB_UPSERT)
+    return _loader
+
+
+def close_loader():
+    """Close the shared loader's connections."""
+    global _loader
+    if _loader is not None:
+        _loader.close()
+        _loader = None
+
+
+def open_pipeline(scraped_at):
+    """Output pipeline for a run: CSV, JSONL, Parquet and the database (when it can be reached)."""
+    sinks = [CsvSink(CSV_PATH, CSV_FIELDS), JsonlSink(JSONL_PATH, JSONL_COMPRESSION)]
+    if PARQUET_DIR:
+        try:
+            sinks.append(ParquetSink(PARQUET_DIR, "framesdirect", scraped_at))
+        except RuntimeError as e:
+            print(f"⚠ {e}, skipping the Parquet copy")
     try:
-        conn = psycopg2.connect(
-            dbname="EyeWearChoices_DB",
-            user="postgres",
-            password="Eng0802097@",
-            host="localhost",
-            port="5432"
-        )
-        cur = conn.cursor()
-
-        for product in data:
-            cur.execute("""
-                INSERT INTO framesdirect.eyewear_products
-                (brand, product_name, former_price, current_price, discount, scraped_at)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (
-                product["Brand"],
-                product["Product_Name"],
-                product["Former_Price"],
-                product["Current_Price"],
-                product["Discount"],
-                datetime.now()
-            ))
-
-        conn.commit()
-        cur.close()
-        conn.close()
-        print(f"✅ Saved {len(data)} records to PostgreSQL")
+        sinks.append(LoaderSink(get_loader(), scraped_at))
     except Exception as e:
-        print(f"❌ Error saving to PostgreSQL: {e}")
+        print(f"❌ Error connecting to PostgreSQL, saving to files only: {e}")
+    return PagePipeline(sinks, metrics=get_metrics())
 
 
-def scrape_framesdirect():
-    """Main scraping workflow."""
-    driver = setup_webdriver()
-    start_page = load_checkpoint()
-    all_data = []
-    page_count = 0
+def open_delta_index():
+    """Return the last-seen product index in delta mode, otherwise None."""
+    return DeltaIndex(DELTA_INDEX_PATH, retailer="framesdirect") if DELTA_MODE else None
+
+
+def save_page(pipeline, page_data, delta_index, scraped_at):
+    """Send one page's records to the sinks (only the changes in delta mode).
 
+    Returns once every sink stored them; the delta index advances after that.
+    """
+    if delta_index is not None:
+        page_data = delta_index.changes(page_data)
+    pipeline.write(page_data)
+    if delta_index is not None:
+        delta_index.commit(scraped_at)
+
+
+def save_run(all_data, run_started_at, delta_index=None, crawl_complete=False):
+    """Save a whole run's records at once; in delta mode only the changes, then advance the index."""
+    if delta_index is not None:
+        all_data = delta_index.run_delta(all_data, crawl_complete)
+    if not all_data:
+        print("⚠ No data collected. Nothing saved.")
+    with open_pipeline(run_started_at) as pipeline:
+        pipeline.write(all_data)
+    if delta_index is not None:
+        delta_index.commit(run_started_at)
+        delta_index.close()
+
+
+def scrape_framesdirect(use_http=True, capture=False, concurrency=MAX_IN_FLIGHT_PER_DOMAIN,
+                        rate=None, max_pages=MAX_PAGES, use_browser=True, parse_workers=0, profile=None):
+    """Main scraping workflow.
+
+    Pages are fetched by the asyncio CrawlScheduler, which keeps up to
+    ``concurrency`` fetches in flight under a token-bucket rate limit instead
+    of sleeping between pages. Results are handed over in page order, and
+    each page goes straight to CSV/JSONL/database; the checkpoint only moves
+    once those writes returned, and no records are kept between pages.
+    A resumed run starts after the last unbroken page of the checkpoint and
+    skips the later pages it lists as finished. With capture=True products are read from the site's JSON responses over
+    CDP instead of parsing the rendered HTML (one page at a time, as there is
+    a single browser).
+
+    With parse_workers > 0 the run is a producer/consumer pipeline: fetch
+    threads only download pages and queue the raw HTML (bounded by
+    PARSE_QUEUE) for a pool of parser processes, and this loop merges the
+    parsed pages back in page order.
+
+    Timeouts and fetch errors are retried (retry_policy.py); a page that
+    still fails goes to the dead-letter list and the crawl moves on. A
+    re-queue pass at the end tries the dead-lettered pages (this run's and
+    earlier ones') once more.
+
+    profile="full" runs every stage under cProfile and tracemalloc, and
+    profile="sample" profiles PROFILE_RATE of the runs, and in those only
+    some of the pages (run_profiler.SAMPLE_EVERY); the pstats files and the
+    allocation report go to METRICS_DIR/profile.
+    """
+    get_metrics().profiler = create_profiler("framesdirect", profile, PROFILE_RATE)
+    fetcher = create_fetcher(use_http, use_browser)
+    policy = RetryPolicy(metrics=get_metrics())
+    dead_letters = DeadLetterList(DEAD_LETTER_PATH)
+    parse_pool = None
+    if parse_workers and not capture:
+        parse_pool = ParsePool(FRAMESDIRECT, workers=parse_workers, max_queue=PARSE_QUEUE, base_url=BASE_URL,
+                               metrics=get_metrics())
+    driver = setup_webdriver(capture_network=True) if capture else None
+    scheduler = CrawlScheduler(max_in_flight=1 if capture else concurrency, rate=rate or REQUESTS_PER_SECOND)
+    run_started_at = datetime.now()
+    start_page = load_checkpoint()
+    reached_end = False
+
+    # Pages past a dead-lettered one may already be saved; those are not fetched again,
+    # and neither is anything past the catalogue's last page if an earlier run reached it
+    completed = load_completed_pages()
+    end_page = read_checkpoint().get("end_page")
+    pages = []
+    page = start_page
+    while len(pages) < max_pages and (end_page is None or page <= end_page):
+        if page not in completed:
+            pages.append(page)
+        page += 1
+    if len(pages) < page - start_page:
+        print(f"Skipping {page - start_page - len(pages)} pages finished in an earlier run")
+    pages_by_url = {f"{BASE_URL}/eyeglasses/?p={page}&type=pagestate": page for page in pages}
+
+    def fetch_page(url):
+        """Fetch and parse one page; returns (products, has_next_page).
+
+        In pipeline mode it returns as soon as the page is queued for a
+        parser, with the pending parse in place of the products.
+        """
+        print(f"\n--- Scraping page {page_number(url)}: {url} ---")
+        if capture:
+            return scrape_page_via_cdp(driver, url)
+
+        html_source = fetcher.fetch(url)
+        if parse_pool is not None:
+            return queue_page_parse(parse_pool, html_source, url), None
+        page_data, next_url = extract_page_data(html_source, url)
+        return page_data, next_url is not None
+
+    delta_index = open_delta_index()
+    pipeline = open_pipeline(run_started_at)
     try:
-        for page_count in range(MAX_PAGES):
-            current_page = start_page + page_count
-            url = f"{BASE_URL}/eyeglasses/?p={current_page}&type=pagestate"
-            print(f"\n--- Scraping page {current_page}: {url} ---")
-            driver.get(url)
+        for url, result, error in scheduler.iter_pages(list(pages_by_url), policy.wrap(fetch_page)):
+            if isinstance(error, RetryError):
+                print(f"❌ {error}")
+                dead_letters.add(url, error.error, error.attempts, page=pages_by_url[url])
+                get_metrics().count("failed_pages")
+                continue
+            if error is not None:
+                raise error
+
+            page_data, has_next = result
+            if parse_pool is not None:
+                page_data, next_url = collect_page_parse(page_data)
+                has_next = next_url is not None
+            save_page(pipeline, page_data, delta_index, run_started_at)
+            # The sinks have the page now, so the checkpoint can move past it
+            update_checkpoint(pages_by_url[url], end=not has_next)
+            dead_letters.remove(url)  # a page that failed in an earlier run is done now
+            get_metrics().count("pages")
+
+            if not has_next:
+                print("No more pages. Stopping.")
+                reached_end = True
+                break
 
-            try:
-                WebDriverWait(driver, 60).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "prod-holder"))
-                )
-            except TimeoutException:
-                print(f"❌ Timeout waiting for {url}")
+        for entry, (page_data, has_next) in requeue(dead_letters, policy, lambda entry: fetch_page(entry["url"])):
+            if parse_pool is not None:
+                page_data, next_url = collect_page_parse(page_data)
+                has_next = next_url is not None
+            save_page(pipeline, page_data, delta_index, run_started_at)
+            update_checkpoint(page_number(entry["url"]), end=not has_next)
+            get_metrics().count("pages")
+
+        if delta_index is not None:
+            # A run from page 1 to the last page, with no page skipped or left behind, is complete
+            crawl_complete = start_page == 1 and not completed and reached_end and not len(dead_letters)
+            if crawl_complete:
+                save_page(pipeline, delta_index.disappeared(), None, run_started_at)
+                delta_index.commit(run_started_at)
+            delta_index.report(crawl_complete)
+        print(f"✅ Saved {pipeline.records_written} records in total")
+        if parse_pool is not None:
+            parse_pool.report()
+
+    finally:
+        if parse_pool is not None:
+            parse_pool.close()
+        pipeline.close()
+        if delta_index is not None:
+            delta_index.close()
+        close_loader()
+        fetcher.save_fetch_log(FETCH_LOG_PATH)
+        fetcher.close()
+        if driver is not None:
+            driver.quit()
+        save_metrics()
+        print("✅ Scraping complete. Browser closed.")
+
+
+def split_page_ranges(pages, num_workers):
+    """Split a sorted list of page numbers into contiguous ranges, one per worker."""
+    num_workers = max(1, min(num_workers, len(pages)))
+    size, extra = divmod(len(pages), num_workers)
+    ranges = []
+    start = 0
+    for i in range(num_workers):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(pages[start:end])
+        start = end
+    return [r for r in ranges if r]
+
+
+def scrape_page_range(pages, stop_state, politeness, save, use_http=True, use_browser=True, slot=0):
+    """Scrape one range of pages with a dedicated fetcher/WebDriver.
+
+    ``politeness`` is a (TokenBucket, SlowResponseBackoff, RetryPolicy,
+    DeadLetterList) tuple shared by all workers, so the whole pool stays
+    within one request budget and one circuit breaker for the site.
+    Each page is handed to save(page, products) as soon as it is parsed.
+    Returns (pages saved, fetch_log).
+    """
+    bucket, backoff, policy, dead_letters = politeness
+    fetcher = create_fetcher(use_http, use_browser, slot)
+    saved = []
+
+    try:
+        for current_page in pages:
+            # Another worker already found the end of the catalogue
+            if stop_state["last_page"] is not None and current_page > stop_state["last_page"]:
                 break
 
-            page_data = extract_product_data(driver.page_source)
-            all_data.extend(page_data)
-            update_checkpoint(current_page)
+            url = f"{BASE_URL}/eyeglasses/?p={current_page}&type=pagestate"
+            print(f"\n--- [worker] Scraping page {current_page}: {url} ---")
 
-            # Look for "next page"
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            next_btn = soup.find("a", {"aria-label": "next page"})
-            if not next_btn or "href" not in next_btn.attrs:
-                print("No more pages. Stopping.")
+            bucket.acquire_blocking()
+            time.sleep(backoff.delay())
+            start = time.monotonic()
+            try:
+                html_source = policy.call(fetcher.fetch, url)
+            except RetryError as e:
+                print(f"❌ {e}")
+                dead_letters.add(url, e.error, e.attempts, page=current_page)
+                get_metrics().count("failed_pages")
+                continue
+            finally:
+                backoff.observe(time.monotonic() - start)
+
+            page_data, next_url = extract_page_data(html_source, url)
+            if next_url is None:
+                print(f"Page {current_page} is the last page.")
+                with _checkpoint_lock:
+                    if stop_state["last_page"] is None or current_page < stop_state["last_page"]:
+                        stop_state["last_page"] = current_page
+            if save(current_page, page_data):
+                saved.append(current_page)
+            dead_letters.remove(url)
+
+            if next_url is None:
                 break
+    finally:
+        fetcher.close()
+
+    return saved, fetcher.fetch_log
+
+
+def scrape_framesdirect_parallel(num_drivers=NUM_DRIVERS, max_pages=MAX_PAGES, use_http=True, rate=None,
+                                 use_browser=True):
+    """Scrape pages with a pool of WebDrivers, each one working on its own page range.
+
+    Only pages missing from the checkpoint are scraped, so a resumed run picks
+    up exactly the pages that did not finish last time. Workers send each page
+    through the shared output pipeline as they finish it (so pages are saved
+    in completion order, not page order), and a page is only checkpointed once
+    the sinks stored it.
+    """
+    run_started_at = datetime.now()
+    get_metrics()  # the run's clock starts here
+    completed = load_completed_pages()
+    pages = []
+    page = 1
+    while len(pages) < max_pages:
+        if page not in completed:
+            pages.append(page)
+        page += 1
+    print(f"Scraping {len(pages)} pages with {num_drivers} WebDrivers (skipping {len(completed)} finished pages)")
+
+    stop_state = {"last_page": None}
+    bucket = TokenBucket(rate) if rate else TokenBucket()
+    dead_letters = DeadLetterList(DEAD_LETTER_PATH)
+    policy = RetryPolicy(metrics=get_metrics())
+    politeness = (bucket, SlowResponseBackoff(), policy, dead_letters)
+    saved = set()
+    fetch_log = []
+    delta_index = open_delta_index()
+    pipeline = open_pipeline(run_started_at)
+    save_lock = threading.Lock()
+
+    def save(page, page_data):
+        """Write one page through the shared pipeline, then checkpoint it; False for a page past the end."""
+        with save_lock:
+            if stop_state["last_page"] is not None and page > stop_state["last_page"]:
+                return False
+            save_page(pipeline, page_data, delta_index, run_started_at)
+            saved.add(page)
+        # The sinks have the page now, so the checkpoint can move past it
+        update_checkpoint(page)
+        get_metrics().count("pages")
+        return True
 
-            page_count += 1
-            time.sleep(5)
+    try:
+        with ThreadPoolExecutor(max_workers=num_drivers) as executor:
+            futures = [
+                executor.submit(scrape_page_range, page_range, stop_state, politeness, save,
+                                use_http, use_browser, slot)
+                for slot, page_range in enumerate(split_page_ranges(pages, num_drivers))
+            ]
+            for future in futures:
+                _, worker_log = future.result()
+                fetch_log.extend(worker_log)
+
+        # Re-queue pass over the pages the workers gave up on
+        if len(dead_letters):
+            fetcher = create_fetcher(use_http, use_browser)
+            try:
+                for entry, html_source in requeue(dead_letters, policy, lambda entry: fetcher.fetch(entry["url"])):
+                    save(page_number(entry["url"]), extract_page_data(html_source, entry["url"])[0])
+            finally:
+                fetch_log.extend(fetcher.fetch_log)
+                fetcher.close()
+
+        if delta_index is not None:
+            last_page = stop_state["last_page"]
+            crawl_complete = last_page is not None and all(p in saved for p in range(1, last_page + 1))
+            if crawl_complete:
+                save_page(pipeline, delta_index.disappeared(), None, run_started_at)
+                delta_index.commit(run_started_at)
+            delta_index.report(crawl_complete)
+        print(f"✅ Saved {pipeline.records_written} records in total")
 
-        # Save final collected data
-        save_data_to_files(all_data)
-        save_data_to_postgres(all_data)
+    finally:
+        pipeline.close()
+        if delta_index is not None:
+            delta_index.close()
+        save_fetch_log(fetch_log, FETCH_LOG_PATH)
+        close_loader()
+        save_metrics()
+    print(f"✅ Parallel scraping complete. {len(saved)} pages scraped.")
+
+
+def page_number(url):
+    """The ?p= page number of a catalogue URL."""
+    return int(parse_qs(urlsplit(url).query).get("p", ["1"])[0])
+
+
+def replay_from_cache(fetch_date=None):
+    """Re-extract cached pages and send them through the save path, without a browser or network.
+
+    Each fetch date is replayed as one run: its pages are parsed in page
+    order and saved with that run's timestamp (through the delta index in
+    delta mode).
+    """
+    cache = get_page_cache()
+    if cache is None:
+        print("❌ The page cache is disabled (PAGE_CACHE_DIR is None)")
+        return
+    runs = cache.runs(f"{BASE_URL}/eyeglasses/", fetch_date)
+    if not runs:
+        print("⚠ No cached pages to replay.")
+        return
 
+    try:
+        for date, entries in runs.items():
+            print(f"\n--- Replaying {len(entries)} pages fetched on {date} ---")
+            data = []
+            entries.sort(key=lambda e: page_number(e["url"]))
+            for entry in entries:
+                products, next_url = extract_page_data(cache.load_html(entry["sha256"]))
+                data.extend(products)
+            # Complete when the run covered pages 1..N and page N had no next link
+            pages = [page_number(e["url"]) for e in entries]
+            crawl_complete = pages == list(range(1, len(pages) + 1)) and next_url is None
+            save_run(data, datetime.fromisoformat(min(e["fetched_at"] for e in entries)),
+                     open_delta_index(), crawl_complete)
     finally:
-        driver.quit()
-        print("✅ Scraping complete. Browser closed.")
+        close_loader()
+    print(f"✅ Replay complete. {len(runs)} runs re-extracted.")
 
 
 # -----------------------------
 # RUN SCRIPT
 # -----------------------------
 if __name__ == "__main__":
-    scrape_framesdirect()
+    parser = argparse.ArgumentParser(description="Scrape eyeglasses from FramesDirect.")
+    parser.add_argument("--parallel", action="store_true",
+                        help="split page ranges across a pool of WebDrivers")
+    parser.add_argument("--workers", type=int, default=NUM_DRIVERS,
+                        help="number of WebDriver instances in parallel mode")
+    parser.add_argument("--browser-only", action="store_true",
+                        help="skip the plain HTTP attempt and load every page in Chrome")
+    parser.add_argument("--capture", action="store_true",
+                        help="read products from the site's JSON responses over CDP")
+    parser.add_argument("--concurrency", type=int, default=MAX_IN_FLIGHT_PER_DOMAIN,
+                        help="fetches kept in flight at once (sequential mode)")
+    parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS,
+                        help="parse pages in this many processes, fed through a bounded queue (sequential mode)")
+    parser.add_argument("--parse-queue", type=int, default=PARSE_QUEUE,
+                        help="pages allowed to wait for a parser before fetching pauses (default 2 per worker)")
+    parser.add_argument("--http-only", action="store_true",
+                        help="never start Chrome; pages without product markup count as failed")
+    parser.add_argument("--max-pages", type=int, default=MAX_PAGES,
+                        help="maximum number of pages per run")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="requests per second allowed for the site")
+    parser.add_argument("--sqlite", default=None,
+                        help="load rows into this SQLite file instead of PostgreSQL")
+    parser.add_argument("--upsert", action="store_true",
+                        help="merge rows on (retailer, brand, product_name, scraped date)")
+    parser.add_argument("--delta", action="store_true",
+                        help="save only new, changed and disappeared products (tagged Change_Type)")
+    parser.add_argument("--no-blocking", action="store_true",
+                        help="let Chrome load images, fonts, styles and trackers (to compare page times)")
+    parser.add_argument("--warm-browser", action="store_true",
+                        help="reuse a Chrome kept running between runs (stop it with browser_session.py stop)")
+    parser.add_argument("--no-parquet", action="store_true",
+                        help="do not write the partitioned Parquet copy of the records")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="do not keep raw HTML in the page cache")
+    parser.add_argument("--cache-dir", default=PAGE_CACHE_DIR,
+                        help="folder of the raw-page cache")
+    parser.add_argument("--replay", action="store_true",
+                        help="re-extract cached pages and save them again (no browser, no network)")
+    parser.add_argument("--replay-date", default=None,
+                        help="only replay pages fetched on this date (YYYY-MM-DD)")
+    parser.add_argument("--profile", nargs="?", const="full", choices=PROFILE_MODES, default=None,
+                        help="profile each stage with cProfile and tracemalloc (sequential mode); "
+                             "'sample' profiles only some runs and pages")
+    parser.add_argument("--profile-rate", type=float, default=PROFILE_RATE,
+                        help="share of runs profiled with --profile sample")
+    args = parser.parse_args()
+    DB_SQLITE_PATH = args.sqlite
+    DB_UPSERT = args.upsert
+    BLOCK_RESOURCES = not args.no_blocking
+    WARM_BROWSER = args.warm_browser
+    PAGE_CACHE_DIR = None if args.no_cache else args.cache_dir
+    if args.no_parquet:
+        PARQUET_DIR = None
+    PARSE_QUEUE = args.parse_queue
+    PROFILE_RATE = args.profile_rate
+    if args.delta:
+        # Change records get their own files; the full-history CSV keeps its five columns
+        DELTA_MODE = True
+        CSV_PATH = os.path.join(OUTPUT_FOLDER, "framesdirectdotcom_changes.csv")
+        JSONL_PATH = jsonl_path(os.path.join(OUTPUT_FOLDER, "framesdirectdotcom_changes.jsonl"), JSONL_COMPRESSION)
+        CSV_FIELDS = CSV_FIELDS + [CHANGE_FIELD]
+        PARQUET_DIR = None  # the Parquet dataset holds full observations only
+
+    if args.replay:
+        replay_from_cache(args.replay_date)
+    elif args.parallel:
+        scrape_framesdirect_parallel(num_drivers=args.workers, max_pages=args.max_pages,
+                                     use_http=not args.browser_only, rate=args.rate,
+                                     use_browser=not args.http_only)
+    else:
+        scrape_framesdirect(use_http=not args.browser_only, capture=args.capture, concurrency=args.concurrency,
+                            rate=args.rate, max_pages=args.max_pages, use_browser=not args.http_only,
+                            parse_workers=args.parse_workers, profile=args.profile)
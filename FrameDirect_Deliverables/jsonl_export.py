@@ -0,0 +1,56 @@
+import os
+import json
+import argparse
+from jsonl_store import read_jsonl, write_pretty_json, append_jsonl
+
+
+# -----------------------------
+# COMMANDS
+# -----------------------------
+
+def export_legacy_json(jsonl_files, json_path):
+    """Build the legacy pretty-printed JSON array from one or more JSONL files."""
+    count = 0
+
+    def records():
+        nonlocal count
+        for path in jsonl_files:
+            for record in read_jsonl(path):
+                count += 1
+                yield record
+
+    write_pretty_json(json_path, records())
+    print(f"✅ Exported {count} records to {json_path}")
+
+
+def import_legacy_json(json_path, jsonl_path, compression=None):
+    """Convert an existing pretty-printed JSON array into JSONL (one-off migration)."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    append_jsonl(jsonl_path, records, compression)
+    print(f"✅ Imported {len(records)} records from {json_path} into {jsonl_path}")
+
+
+# -----------------------------
+# RUN SCRIPT
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert between JSONL output and the legacy JSON file.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="build the pretty-printed JSON from JSONL")
+    export_cmd.add_argument("jsonl", nargs="+", help="JSONL file(s), .gz/.zst allowed")
+    export_cmd.add_argument("--out", required=True, help="JSON file to (re)write")
+
+    import_cmd = commands.add_parser("import-legacy", help="append a legacy JSON array to a JSONL file")
+    import_cmd.add_argument("json", help="legacy JSON file (e.g. framesdirectdotcom.json)")
+    import_cmd.add_argument("--out", required=True, help="JSONL file to append to")
+    import_cmd.add_argument("--compression", choices=["gzip", "zstd"], default=None)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_legacy_json(args.jsonl, args.out)
+    elif not os.path.exists(args.json):
+        print(f"❌ {args.json} not found")
+    else:
+        import_legacy_json(args.json, args.out, args.compression)
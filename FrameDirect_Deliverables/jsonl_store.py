@@ -0,0 +1,246 @@
+import os
+import io
+import gzip
+import json
+
+# zstd support is optional (pip install zstandard)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+COPY_CHUNK = 1024 * 1024
+NEW_FILE_MODE = 0o666   # before the umask, as for any file open() creates
+
+
+def jsonl_path(base_path, compression=None):
+    """Return the file name used for a given compression ("x.jsonl" -> "x.jsonl.gz")."""
+    return base_path + SUFFIXES[compression]
+
+
+def detect_compression(path):
+    """Guess the compression from the file name."""
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return None
+
+
+# -----------------------------
+# ATOMIC WRITES
+# -----------------------------
+
+def _create_temp(folder):
+    """Create a new temp file in folder; returns (fd, path).
+
+    Unlike mkstemp (always 0600) the file gets the usual permissions of a
+    new file, i.e. NEW_FILE_MODE less the process umask.
+    """
+    while True:
+        tmp_path = os.path.join(folder, f".tmp-{os.urandom(6).hex()}")
+        try:
+            flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+            return os.open(tmp_path, flags, NEW_FILE_MODE), tmp_path
+        except FileExistsError:
+            continue
+
+
+def atomic_write(path, write_fn, mode="w", encoding="utf-8"):
+    """Write a file through a temp file in the same folder, then rename it into place.
+
+    A crash mid-write leaves the old file untouched instead of a half-written one.
+    An existing file keeps its permissions.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = _create_temp(folder)
+    try:
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding,
+                       newline=None if "b" in mode else "") as f:
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _fsync_append(path, data):
+    """Append bytes with a single write and fsync them."""
+    with open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def repair_tail(path):
+    """Cut off a half-written last line left by a crash (plain JSONL only)."""
+    if not os.path.exists(path) or detect_compression(path):
+        return
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        # Walk back to the last complete line
+        pos = size
+        while pos > 0:
+            step = min(COPY_CHUNK, pos)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                pos = pos - step + newline + 1
+                break
+            pos -= step
+        f.truncate(pos)
+        print(f"⚠ Removed a partial record at the end of {path}")
+
+
+# -----------------------------
+# WRITER
+# -----------------------------
+
+def _encode(records):
+    return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+
+
+class JsonlWriter:
+    """Append-only newline-delimited JSON writer.
+
+    Each batch is appended with one fsync'd write, so records are durable as
+    soon as write() returns. With compression="gzip"/"zstd" every batch is
+    compressed on its own and appended as one gzip member / zstd frame
+    (concatenated members and frames are read back as one stream).
+    """
+
+    def __init__(self, path, compression=None):
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("zstd compression needs the 'zstandard' package")
+        self.path = path
+        self.compression = compression
+        self.records_written = 0
+        repair_tail(path)
+
+    def write(self, records):
+        """Append a batch of records."""
+        if not records:
+            return
+        data = _encode(records)
+        if self.compression == "gzip":
+            data = gzip.compress(data)
+        elif self.compression == "zstd":
+            data = zstandard.ZstdCompressor().compress(data)
+        _fsync_append(self.path, data)
+        self.records_written += len(records)
+
+    def close(self):
+        """Nothing is buffered between batches; kept for the sink interface."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def append_jsonl(path, records, compression=None):
+    """Append one batch of records to a JSONL file (one frame when compressed)."""
+    with JsonlWriter(path, compression) as writer:
+        writer.write(records)
+    return len(records)
+
+
+# -----------------------------
+# READER
+# -----------------------------
+
+def _open_text(path):
+    compression = detect_compression(path)
+    if compression == "gzip":
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8")
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("reading .zst files needs the 'zstandard' package")
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True)
+        return io.TextIOWrapper(raw, encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def read_jsonl(path):
+    """Yield records from a (possibly compressed) JSONL file.
+
+    A truncated last line or frame (crash during an append) is skipped.
+    """
+    if not os.path.exists(path):
+        return
+    with _open_text(path) as f:
+        try:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                if line.strip():
+                    yield json.loads(line)
+        except (EOFError, zstandard.ZstdError if zstandard else EOFError):
+            print(f"⚠ {path} ends with an incomplete frame; it was skipped")
+
+
+# -----------------------------
+# LEGACY PRETTY JSON
+# -----------------------------
+
+def write_pretty_json(path, records):
+    """Write records as a json.dump(indent=4) style array, streaming and atomically."""
+    def write_array(f):
+        first = True
+        for record in records:
+            f.write("[\n" if first else ",\n")
+            text = json.dumps(record, indent=4)
+            f.write("\n".join("    " + line for line in text.split("\n")))
+            first = False
+        f.write("[]" if first else "\n]")
+
+    atomic_write(path, write_array)
+
+
+def iter_json_array(path):
+    """Yield the records of a JSON array file one at a time, reading it in chunks.
+
+    Used instead of json.load() for history files too large to hold in memory.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = f.read(COPY_CHUNK).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path} is not a JSON array")
+        pos = 1
+        eof = False
+        while True:
+            # Skip whitespace and the comma between records
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(COPY_CHUNK)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield record
+            pos = end
@@ -0,0 +1,137 @@
+import time
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+# URL patterns blocked over CDP (Network.setBlockedURLs), by resource type.
+# Product data comes from the HTML (or the catalogue XHR in --capture mode),
+# so none of these are needed to read a page.
+BLOCKED_PATTERNS = {
+    "image": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico"],
+    "font": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "media": ["*.mp4", "*.webm", "*.mp3", "*.m3u8"],
+    "stylesheet": ["*.css"],
+    "tracker": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*facebook.net*",
+        "*hotjar.com*", "*bing.com/bat*", "*pinterest.com/ct*", "*tiktok.com*", "*criteo.*",
+        "*klaviyo.com*", "*quantummetric.com*", "*clarity.ms*",
+    ],
+}
+
+# Per-site load profiles. The tile count is polled every poll_seconds; the
+# page is ready once it has min_tiles tiles and either the count has not
+# changed for stable_seconds, or no new network request started for
+# idle_seconds after the document finished loading.
+FRAMESDIRECT_LOAD = {
+    "name": "framesdirect",
+    "tile_selector": ".prod-holder",
+    "timeout": 60,
+    "min_tiles": 1,
+    "stable_seconds": 1.0,
+    "idle_seconds": 0.5,
+    "poll_seconds": 0.25,
+    # Server-rendered grid: styles are not needed to read it
+    "block": ("image", "font", "media", "stylesheet", "tracker"),
+}
+GLASSES_LOAD = {
+    "name": "glasses",
+    "tile_selector": ".product-tile",
+    "timeout": 20,
+    "min_tiles": 1,
+    "stable_seconds": 1.5,
+    "idle_seconds": 0.75,
+    "poll_seconds": 0.25,
+    # Tiles are rendered client-side and lazy-loaded, which needs the layout (CSS)
+    "block": ("image", "font", "media", "tracker"),
+}
+
+# Counters read from the page on every poll
+_READINESS_SCRIPT = """
+const tiles = document.querySelectorAll(arguments[0]).length;
+const resources = performance.getEntriesByType('resource');
+const nav = performance.getEntriesByType('navigation')[0];
+let transferred = nav ? nav.transferSize : 0;
+for (const entry of resources) { transferred += entry.transferSize || 0; }
+return [tiles, resources.length, document.readyState, transferred];
+"""
+
+
+# -----------------------------
+# RESOURCE BLOCKING
+# -----------------------------
+
+def blocked_patterns(profile):
+    return [pattern for kind in profile["block"] for pattern in BLOCKED_PATTERNS[kind]]
+
+
+def apply_load_profile(chrome_options, profile):
+    """Chrome prefs for a profile: images off at the renderer, before any page loads."""
+    if "image" in profile["block"]:
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_experimental_option(
+            "prefs", {"profile.managed_default_content_settings.images": 2}
+        )
+    return chrome_options
+
+
+def enable_resource_blocking(driver, profile):
+    """Block the profile's resource types over CDP for every later page load in this driver."""
+    patterns = blocked_patterns(profile)
+    if not patterns:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except WebDriverException as e:
+        print(f"⚠ Could not block resources over CDP: {e}")
+
+
+# -----------------------------
+# ADAPTIVE READINESS
+# -----------------------------
+
+def wait_until_ready(driver, profile, timeout=None):
+    """Wait until the product grid has stopped growing or the network went idle.
+
+    Returns {"tiles", "ready", "wait_seconds", "transferred_bytes"}, where
+    "ready" is "stable" (tile count unchanged for stable_seconds), "idle" (no
+    new requests for idle_seconds) or "timeout" (tiles present but still
+    changing when the timeout ran out). Raises TimeoutException when no tiles
+    appeared at all.
+    """
+    timeout = timeout or profile["timeout"]
+    start = time.monotonic()
+    last_tiles = last_resources = None
+    tiles_since = resources_since = start
+    while True:
+        tiles, resources, ready_state, transferred = driver.execute_script(
+            _READINESS_SCRIPT, profile["tile_selector"]
+        )
+        now = time.monotonic()
+        if tiles != last_tiles:
+            last_tiles, tiles_since = tiles, now
+        if resources != last_resources:
+            last_resources, resources_since = resources, now
+
+        ready = None
+        if tiles >= profile["min_tiles"]:
+            if now - tiles_since >= profile["stable_seconds"]:
+                ready = "stable"
+            elif (ready_state == "complete" and now - resources_since >= profile["idle_seconds"]
+                  and tiles_since < now):  # not while tiles are still being added
+                ready = "idle"
+            elif now - start >= timeout:
+                ready = "timeout"
+        elif now - start >= timeout:
+            raise TimeoutException(f"No '{profile['tile_selector']}' tiles after {timeout}s")
+
+        if ready:
+            return {
+                "tiles": tiles,
+                "ready": ready,
+                "wait_seconds": round(now - start, 3),
+                "transferred_bytes": transferred,
+            }
+        time.sleep(profile["poll_seconds"])
@@ -0,0 +1,223 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from mock_retailer_server import start_server, NUM_PRODUCTS
+from fixture_corpus import FRAMESDIRECT_PAGE_SIZE, GLASSES_PAGE_SIZE
+
+# psutil gives the crawler's peak RSS on every platform; without it the
+# resource module is used (Linux/macOS only)
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+HERE = os.path.dirname(os.path.abspath(__file__))
+GLASSES_DIR = os.path.join(HERE, "..", "GlassesDotCom_Deliverables")
+RATE = 50.0              # requests/second given to the crawler (the mock server does not need politeness)
+CONCURRENCY = 2
+MEMORY_POLL_SECONDS = 0.1
+PERCENTILES = [50, 90, 95, 99]
+
+# Crawl loops that can be pointed at the mock server
+TARGETS = {
+    "framesdirect": "framesdirect_webscrapping_model.py (scheduler crawl, HTTP only)",
+    "glasses": "glasses_pagination.py (load-more chain, HTTP only)",
+    "glasses-fragments": "glasses_pagination.py --fragments (concurrent load-more fragments)",
+    "framesdirect-linear": "framesdirect.py (while True loop, needs Chrome)",
+}
+
+
+# -----------------------------
+# CRAWLER PROCESS
+# -----------------------------
+
+def crawler_command(target, num_pages, rate, concurrency, workdir):
+    """Command line that runs one crawl loop against the mock server."""
+    if target == "framesdirect":
+        return [sys.executable, os.path.join(HERE, "framesdirect_webscrapping_model.py"),
+                "--http-only", "--max-pages", str(num_pages), "--rate", str(rate),
+                "--concurrency", str(concurrency), "--sqlite", os.path.join(workdir, "eyewear.db")]
+    if target.startswith("glasses"):
+        command = [sys.executable, os.path.join(GLASSES_DIR, "glasses_pagination.py"),
+                   "--http-only", "--rate", str(rate)]
+        if target == "glasses-fragments":
+            command += ["--fragments", "--concurrency", str(concurrency)]
+        return command
+    return [sys.executable, os.path.join(HERE, "framesdirect.py")]
+
+
+def run_crawler(command, env, workdir, log_path):
+    """Run the crawler to completion; returns (exit code, seconds, peak RSS in MB or None)."""
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        process = subprocess.Popen(command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+        peak = 0
+        if psutil is not None:
+            watched = psutil.Process(process.pid)
+            while process.poll() is None:
+                try:
+                    peak = max(peak, watched.memory_info().rss)
+                except psutil.Error:
+                    break
+                time.sleep(MEMORY_POLL_SECONDS)
+        process.wait()
+    seconds = time.perf_counter() - start
+
+    if psutil is not None:
+        peak_mb = peak / 1024 / 1024
+    elif resource is not None:
+        # ru_maxrss is KB on Linux and bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        peak_mb = maxrss / 1024 / (1024 if sys.platform == "darwin" else 1)
+    else:
+        peak_mb = None
+    return process.returncode, seconds, peak_mb
+
+
+# -----------------------------
+# REPORT
+# -----------------------------
+
+def percentiles(values):
+    """Nearest-rank percentiles in milliseconds."""
+    if not values:
+        return {}
+    values = sorted(values)
+    return {
+        f"p{p}": round(values[min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))] * 1000, 1)
+        for p in PERCENTILES
+    }
+
+
+def count_records(target, workdir):
+    """Number of records the crawler saved."""
+    if target.startswith("glasses"):
+        path = os.path.join(workdir, "extracted_data", "glasses_data.json")
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding="utf-8") as f:
+            return len(json.load(f))
+    path = os.path.join(workdir, "output", "framesdirectdotcom.jsonl")
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def client_fetch_log(target, workdir):
+    """The crawler's own per-page fetch log (not written by framesdirect.py)."""
+    if target.startswith("glasses"):
+        path = os.path.join(workdir, "extracted_data", "fetch_log.json")
+    else:
+        path = os.path.join(workdir, "output", "fetch_log.json")
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_test(target, num_products, latency_ms, jitter_ms, error_rate, rate, concurrency, seed=None):
+    """Serve a catalogue, crawl all of it with one crawl loop and return the measurements."""
+    server = start_server(port=0, num_products=num_products, latency_ms=latency_ms,
+                          jitter_ms=jitter_ms, error_rate=error_rate, seed=seed)
+    page_size = GLASSES_PAGE_SIZE if target.startswith("glasses") else FRAMESDIRECT_PAGE_SIZE
+    expected_pages = -(-num_products // page_size)
+
+    with tempfile.TemporaryDirectory(prefix="load-test-") as workdir:
+        os.makedirs(os.path.join(workdir, "extracted_data"))
+        env = dict(
+            os.environ,
+            FRAMESDIRECT_BASE_URL=server.base_url,
+            GLASSES_BASE_URL=server.base_url,
+            FRAMESDIRECT_OUTPUT_FOLDER=os.path.join(workdir, "output"),
+            FRAMESDIRECT_MAX_PAGES=str(expected_pages),
+            PYTHONIOENCODING="utf-8",
+        )
+        log_path = os.path.join(workdir, "crawler.log")
+        command = crawler_command(target, expected_pages, rate, concurrency, workdir)
+        print(f"Crawling {num_products} products ({expected_pages} pages) from {server.base_url} "
+              f"with {TARGETS[target]}...")
+        exit_code, seconds, peak_mb = run_crawler(command, env, workdir, log_path)
+
+        records = count_records(target, workdir)
+        fetch_log = client_fetch_log(target, workdir)
+        if exit_code != 0:
+            with open(log_path, encoding="utf-8") as f:
+                print(f.read()[-3000:])
+    server.shutdown()
+    server.server_close()
+
+    served = [entry for entry in server.request_log if entry["path"] != "/healthz"]
+    pages_ok = sum(1 for entry in served if entry["status"] == 200)
+    return {
+        "target": target,
+        "products": num_products,
+        "expected_pages": expected_pages,
+        "latency_ms": latency_ms,
+        "jitter_ms": jitter_ms,
+        "error_rate": error_rate,
+        "exit_code": exit_code,
+        "wall_seconds": round(seconds, 2),
+        "requests": len(served),
+        "errors_served": sum(1 for entry in served if entry["status"] != 200),
+        "pages_fetched": pages_ok,
+        "pages_per_min": round(pages_ok / seconds * 60, 1) if seconds else None,
+        "records_saved": records,
+        "complete": records == num_products,
+        "client_latency_ms": percentiles([entry["seconds"] for entry in fetch_log]),
+        "server_latency_ms": percentiles([entry["seconds"] for entry in served]),
+        "bytes_served": sum(entry["bytes"] for entry in served),
+        "peak_rss_mb": round(peak_mb, 1) if peak_mb is not None else None,
+    }
+
+
+def print_report(report):
+    status = "✅" if report["complete"] and report["exit_code"] == 0 else "❌"
+    print(f"\n{status} {report['target']}: {report['records_saved']}/{report['products']} records, "
+          f"{report['pages_fetched']}/{report['expected_pages']} pages in {report['wall_seconds']}s")
+    print(f"  throughput     {report['pages_per_min']} pages/min")
+    print(f"  requests       {report['requests']} ({report['errors_served']} injected errors)")
+    for label, key in (("client latency", "client_latency_ms"), ("server latency", "server_latency_ms")):
+        values = report[key]
+        if values:
+            print(f"  {label}  " + "  ".join(f"{p}={ms}ms" for p, ms in values.items()))
+    peak = report["peak_rss_mb"]
+    print(f"  peak memory    {peak} MB RSS" if peak is not None else "  peak memory    n/a (install psutil)")
+
+
+# -----------------------------
+# RUN SCRIPT
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test a crawl loop against the local mock retailer.")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="framesdirect")
+    parser.add_argument("--products", type=int, default=NUM_PRODUCTS, help="catalogue size")
+    parser.add_argument("--latency", type=float, default=0, help="injected latency per response (ms)")
+    parser.add_argument("--jitter", type=float, default=0, help="random +/- spread on the latency (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--rate", type=float, default=RATE, help="requests/second allowed to the crawler")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help="fetches in flight (framesdirect and glasses-fragments targets)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for jitter and errors")
+    parser.add_argument("--report", default=None, help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    report = load_test(args.target, args.products, args.latency, args.jitter, args.error_rate,
+                       args.rate, args.concurrency, args.seed)
+    print_report(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"✅ Report written to {args.report}")
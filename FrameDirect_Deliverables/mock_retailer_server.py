@@ -0,0 +1,208 @@
+import gzip
+import math
+import time
+import random
+import argparse
+import threading
+from itertools import cycle, islice
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from extraction_engine import FRAMESDIRECT, GLASSES
+from fixture_corpus import (load_rows, framesdirect_page, glasses_page, glasses_fragment,
+                            FRAMESDIRECT_PAGE_SIZE, GLASSES_PAGE_SIZE)
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+HOST = "127.0.0.1"
+PORT = 8765
+NUM_PRODUCTS = 240        # catalogue size per retailer
+LATENCY_MS = 0            # added to every response
+JITTER_MS = 0             # +/- random spread around the latency
+ERROR_RATE = 0.0          # share of catalogue requests answered with HTTP 503
+
+
+# -----------------------------
+# CATALOGUE
+# -----------------------------
+
+def build_catalogue(site, num_products):
+    """num_products records in the site's format, cycling through the collected rows.
+
+    Every product name gets its catalogue number appended, so the records stay
+    distinct however large the catalogue is.
+    """
+    rows = load_rows(site, 500)
+    catalogue = []
+    for number, row in enumerate(islice(cycle(rows), num_products), start=1):
+        catalogue.append({**row, "Product_Name": f"{row['Product_Name'] or 'Frame'} {number}"})
+    return catalogue
+
+
+class MockRetailerServer(ThreadingHTTPServer):
+    """Local stand-in for framesdirect.com and glasses.com.
+
+    Serves generated catalogues in each site's markup:
+      /eyeglasses/?p=N&type=pagestate          FramesDirect pages with a "next page" link
+      /gl-us/eyeglasses?begin=N&pageSize=M     glasses.com pages with a data-filter-url load-more
+                                               (only the tile fragment for XMLHttpRequest requests)
+    Latency, jitter and an error rate can be injected; per-request timings are
+    kept in ``request_log`` for the load-test harness.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host=HOST, port=PORT, num_products=NUM_PRODUCTS,
+                 framesdirect_page_size=FRAMESDIRECT_PAGE_SIZE, glasses_page_size=GLASSES_PAGE_SIZE,
+                 latency_ms=LATENCY_MS, jitter_ms=JITTER_MS, error_rate=ERROR_RATE, seed=None):
+        super().__init__((host, port), MockRetailerHandler)
+        self.num_products = num_products
+        self.framesdirect_page_size = framesdirect_page_size
+        self.glasses_page_size = glasses_page_size
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.catalogues = {
+            "framesdirect": build_catalogue(FRAMESDIRECT, num_products),
+            "glasses": build_catalogue(GLASSES, num_products),
+        }
+        self.request_log = []
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def framesdirect_pages(self):
+        return math.ceil(self.num_products / self.framesdirect_page_size)
+
+    def injected_delay(self):
+        """Seconds to hold the response: latency plus uniform jitter."""
+        with self._lock:
+            spread = self.random.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + spread) / 1000
+
+    def inject_error(self):
+        with self._lock:
+            return self.random.random() < self.error_rate
+
+    def record(self, path, status, num_bytes, seconds):
+        with self._lock:
+            self.request_log.append({
+                "path": path,
+                "status": status,
+                "bytes": num_bytes,
+                "seconds": round(seconds, 4),
+            })
+
+
+class MockRetailerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real sites
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/healthz":
+            self.respond(200, b"ok", "text/plain", start)
+            return
+        if url.path.rstrip("/") not in ("/eyeglasses", "/gl-us/eyeglasses"):
+            self.respond(404, b"not found", "text/plain", start)
+            return
+
+        time.sleep(self.server.injected_delay())
+        if self.server.inject_error():
+            self.respond(503, b"<html><body>Service Unavailable</body></html>", "text/html", start)
+            return
+
+        if url.path.startswith("/gl-us"):
+            html = self.glasses_html(query)
+        else:
+            html = self.framesdirect_html(query)
+        self.respond(200, html.encode("utf-8"), "text/html; charset=utf-8", start)
+
+    def framesdirect_html(self, query):
+        """Page p of the FramesDirect catalogue; pages past the end come back empty."""
+        size = self.server.framesdirect_page_size
+        page = max(1, int(query.get("p", 1)))
+        records = self.server.catalogues["framesdirect"][(page - 1) * size:page * size]
+        return framesdirect_page(records, page, has_next=page < self.server.framesdirect_pages)
+
+    def glasses_html(self, query):
+        """Products begin..begin+pageSize, with a load-more URL while products remain.
+
+        Requests sent by a "Load more" button (X-Requested-With: XMLHttpRequest)
+        get just the tile fragment, like the real site.
+        """
+        size = int(query.get("pageSize", self.server.glasses_page_size))
+        begin = max(0, int(query.get("begin", 0)))
+        records = self.server.catalogues["glasses"][begin:begin + size]
+        next_url = None
+        if begin + size < self.server.num_products:
+            next_url = f"{self.server.base_url}/gl-us/eyeglasses?begin={begin + size}&pageSize={size}"
+        if self.headers.get("X-Requested-With") == "XMLHttpRequest":
+            return glasses_fragment(records, next_url)
+        return glasses_page(records, next_url)
+
+    def respond(self, status, body, content_type, start):
+        if "gzip" in self.headers.get("Accept-Encoding", "") and status == 200:
+            body = gzip.compress(body, compresslevel=5)
+            encoding = "gzip"
+        else:
+            encoding = None
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.record(self.path, status, len(body), time.perf_counter() - start)
+
+    def log_message(self, format, *args):
+        pass  # the request log replaces the per-request stderr lines
+
+
+def start_server(**options):
+    """Start a MockRetailerServer on a background thread and return it."""
+    server = MockRetailerServer(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# -----------------------------
+# RUN SCRIPT
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve generated FramesDirect / glasses.com catalogues locally.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--products", type=int, default=NUM_PRODUCTS, help="products per retailer")
+    parser.add_argument("--framesdirect-page-size", type=int, default=FRAMESDIRECT_PAGE_SIZE)
+    parser.add_argument("--glasses-page-size", type=int, default=GLASSES_PAGE_SIZE)
+    parser.add_argument("--latency", type=float, default=LATENCY_MS, help="added latency per response (ms)")
+    parser.add_argument("--jitter", type=float, default=JITTER_MS, help="random +/- spread on the latency (ms)")
+    parser.add_argument("--error-rate", type=float, default=ERROR_RATE, help="share of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=None, help="seed for jitter and errors")
+    args = parser.parse_args()
+
+    server = MockRetailerServer(
+        host=args.host, port=args.port, num_products=args.products,
+        framesdirect_page_size=args.framesdirect_page_size, glasses_page_size=args.glasses_page_size,
+        latency_ms=args.latency, jitter_ms=args.jitter, error_rate=args.error_rate, seed=args.seed,
+    )
+    print(f"✅ Mock retailer serving {args.products} products per site on {server.base_url}")
+    print(f"   FramesDirect: {server.base_url}/eyeglasses/?p=1&type=pagestate ({server.framesdirect_pages} pages)")
+    print(f"   glasses.com:  {server.base_url}/gl-us/eyeglasses?")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        server.server_close()
@@ -0,0 +1,121 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+from datetime import datetime
+from jsonl_store import atomic_write, append_jsonl, read_jsonl
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+INDEX_FILE = "index.jsonl"
+
+
+def content_hash(html):
+    """SHA-256 of the page HTML (the cache key for its content)."""
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+# -----------------------------
+# CACHE
+# -----------------------------
+
+class PageCache:
+    """Content-addressed store of raw page HTML.
+
+    Layout under ``root``:
+      objects/ab/<sha256>.html.gz             gzip'd HTML, stored once per distinct content
+      results/<site>-v<version>/ab/<sha256>.json   parse result for that content
+      index.jsonl                             one line per fetch: url, date, fetched_at, sha256, bytes
+    The index is keyed by URL and fetch date (a later fetch on the same day
+    replaces the earlier one). A page whose content was already parsed by the
+    current extractor version is not parsed again.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.index_path = os.path.join(root, INDEX_FILE)
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        # {url: {date: entry}}
+        self.index = {}
+        for entry in read_jsonl(self.index_path):
+            self.index.setdefault(entry["url"], {})[entry["date"]] = entry
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.html.gz")
+
+    def _result_path(self, digest, site):
+        return os.path.join(self.root, "results", f"{site['name']}-v{site['version']}",
+                            digest[:2], f"{digest}.json")
+
+    def store(self, url, html, fetched_at=None):
+        """Add a fetched page; returns its content hash."""
+        fetched_at = fetched_at or datetime.now()
+        digest = content_hash(html)
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = gzip.compress(html.encode("utf-8"))
+            atomic_write(path, lambda f: f.write(data), mode="wb")
+
+        entry = {
+            "url": url,
+            "date": fetched_at.date().isoformat(),
+            "fetched_at": fetched_at.isoformat(timespec="seconds"),
+            "sha256": digest,
+            "bytes": len(html),
+        }
+        with self._lock:
+            append_jsonl(self.index_path, [entry])
+            self.index.setdefault(url, {})[entry["date"]] = entry
+        return digest
+
+    def load_html(self, digest):
+        with gzip.open(self._object_path(digest), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def load_result(self, digest, site):
+        """Cached (products, next_url) for this content and extractor version, or None."""
+        path = self._result_path(digest, site)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            result = json.load(f)
+        return result["products"], result["next_url"]
+
+    def save_result(self, digest, site, products, next_url):
+        path = self._result_path(digest, site)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write(path, lambda f: json.dump({"products": products, "next_url": next_url}, f))
+
+    def extract(self, url, html, site, extract_fn):
+        """Store the page and return extract_fn(html), reusing the cached parse when the content is known.
+
+        Returns (products, next_url, reused).
+        """
+        digest = self.store(url, html)
+        cached = self.load_result(digest, site)
+        if cached is not None:
+            return cached[0], cached[1], True
+        products, next_url = extract_fn(html)
+        self.save_result(digest, site, products, next_url)
+        return products, next_url, False
+
+    def entries(self, url_prefix="", date=None):
+        """Index entries (oldest first) for URLs starting with url_prefix, optionally one fetch date."""
+        selected = [
+            entry
+            for url, by_date in self.index.items() if url.startswith(url_prefix)
+            for entry in by_date.values() if date is None or entry["date"] == date
+        ]
+        return sorted(selected, key=lambda entry: entry["fetched_at"])
+
+    def runs(self, url_prefix="", date=None):
+        """Group cached entries by fetch date: {date: [entries]} (oldest date first)."""
+        grouped = {}
+        for entry in self.entries(url_prefix, date):
+            grouped.setdefault(entry["date"], []).append(entry)
+        return grouped
@@ -0,0 +1,222 @@
+import os
+import argparse
+from datetime import date, datetime
+import pandas as pd
+from price_normalize import normalize_batch, iter_normalized, SCHEMA, DEFAULT_CURRENCY
+
+# pyarrow is optional: without it the scrapers skip the Parquet copy
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+# Dataset layout: <root>/retailer=<name>/scrape_date=<YYYY-MM-DD>/<run>.parquet
+PARTITION_COLUMNS = ("retailer", "scrape_date")
+BUFFER_ROWS = 64_000       # rows sorted together before they are written
+ROW_GROUP_ROWS = 8_000     # rows per row group (the unit a filter can skip)
+COMPRESSION = "zstd"
+SORT_COLUMNS = ("brand", "product_name")  # narrow per-row-group brand ranges for filter pushdown
+
+
+def _arrow_schema():
+    """Columns stored in each file (the partition columns live in the path).
+
+    brand and product_name are dictionary-encoded in the file (see
+    use_dictionary in ParquetSink) but typed as plain strings here: the
+    dataset reader only prunes row groups on string statistics, not on
+    dictionary columns.
+    """
+    return pa.schema([
+        ("brand", pa.string()),
+        ("product_name", pa.string()),
+        ("currency", pa.string()),
+        ("former_price", pa.float64()),
+        ("current_price", pa.float64()),
+        ("price", pa.float64()),
+        ("discount_pct", pa.int32()),
+        ("effective_discount_pct", pa.float64()),
+        ("scraped_at", pa.timestamp("s")),
+    ])
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([("retailer", pa.string()), ("scrape_date", pa.date32())]), flavor="hive")
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+
+
+# -----------------------------
+# WRITING
+# -----------------------------
+
+class ParquetSink:
+    """Writes a run's records as typed Parquet into the retailer/scrape-date partition.
+
+    Records are normalized (price_normalize.py) page by page and buffered;
+    every BUFFER_ROWS rows are sorted by brand and product name and written
+    as row groups of ROW_GROUP_ROWS, so the min/max statistics of each row
+    group cover a narrow range of brands. The file only becomes visible under its final
+    name on close(); the CSV/JSONL files remain the record of a crashed run
+    (re-export them with "python parquet_store.py export").
+    """
+
+    name = "Parquet"
+    stage = "file_save"
+
+    def __init__(self, root, retailer, scraped_at):
+        require_pyarrow()
+        self.retailer = retailer
+        self.scraped_at = scraped_at.replace(microsecond=0)
+        folder = os.path.join(root, f"retailer={retailer}", f"scrape_date={scraped_at.date().isoformat()}")
+        self.path = os.path.join(folder, f"run-{scraped_at.strftime('%Y%m%dT%H%M%S%f')}.parquet")
+        self.schema = _arrow_schema()
+        self._frames = []
+        self._buffered = 0
+        self._writer = None
+
+    def write(self, records):
+        frame = normalize_batch(records, self.retailer)
+        self._frames.append(frame)
+        self._buffered += len(frame)
+        if self._buffered >= BUFFER_ROWS:
+            self._flush()
+        return len(records)
+
+    def write_frame(self, frame):
+        """Append an already normalized batch (see price_normalize.iter_normalized)."""
+        self._frames.append(frame)
+        self._buffered += len(frame)
+        if self._buffered >= BUFFER_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffered:
+            return
+        frame = pd.concat(self._frames, ignore_index=True).sort_values(list(SORT_COLUMNS), na_position="last")
+        frame = frame.drop(columns=[column for column in PARTITION_COLUMNS if column in frame.columns])
+        frame["scraped_at"] = pd.Timestamp(self.scraped_at)
+        table = pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._writer = pq.ParquetWriter(self.path + ".tmp", self.schema, compression=COMPRESSION,
+                                            use_dictionary=["brand", "product_name"])
+        self._writer.write_table(table, row_group_size=ROW_GROUP_ROWS)
+        self._frames, self._buffered = [], 0
+
+    def close(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.replace(self.path + ".tmp", self.path)
+
+
+def write_parquet(root, retailer, records, scraped_at):
+    """Write one batch of records (a whole run) to the dataset."""
+    sink = ParquetSink(root, retailer, scraped_at)
+    sink.write(records)
+    sink.close()
+    return sink.path
+
+
+def export_history(root, path, retailer=None, scraped_at=None):
+    """Copy a CSV/JSON/JSONL history file into the dataset (one file, dated by ``scraped_at``)."""
+    scraped_at = scraped_at or datetime.fromtimestamp(os.path.getmtime(path))
+    sink = None
+    rows = 0
+    for frame in iter_normalized(path, retailer):
+        if sink is None:
+            sink = ParquetSink(root, frame["retailer"].iloc[0], scraped_at)
+        sink.write_frame(frame)
+        rows += len(frame)
+    if sink is not None:
+        sink.close()
+    return rows
+
+
+# -----------------------------
+# READING
+# -----------------------------
+
+def open_dataset(root):
+    require_pyarrow()
+    return ds.dataset(root, format="parquet", partitioning=_partitioning())
+
+
+def price_filter(retailer=None, brand=None, product_name=None, start=None, end=None):
+    """Dataset filter expression; partition columns prune folders, the rest prune row groups."""
+    conditions = []
+    if retailer:
+        conditions.append(ds.field("retailer") == retailer)
+    if start:
+        conditions.append(ds.field("scrape_date") >= pa.scalar(_as_date(start), pa.date32()))
+    if end:
+        conditions.append(ds.field("scrape_date") <= pa.scalar(_as_date(end), pa.date32()))
+    if brand:
+        conditions.append(ds.field("brand") == brand)
+    if product_name:
+        conditions.append(ds.field("product_name") == product_name)
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def read_prices(root, retailer=None, brand=None, product_name=None, start=None, end=None, columns=None):
+    """Read matching rows as a pandas DataFrame, e.g. read_prices(root, brand="Ray-Ban", start="2026-07-01").
+
+    Only the partitions (retailer, scrape date) in range are opened, and
+    within them only the row groups whose statistics can hold the brand /
+    product name are decoded.
+    """
+    dataset = open_dataset(root)
+    table = dataset.to_table(columns=columns, filter=price_filter(retailer, brand, product_name, start, end))
+    frame = table.to_pandas()
+    return frame.astype({column: dtype for column, dtype in SCHEMA.items() if column in frame.columns})
+
+
+# -----------------------------
+# RUN SCRIPT
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar (Parquet) price history: export and query.")
+    parser.add_argument("--root", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "parquet"),
+                        help="dataset folder")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="copy CSV/JSON/JSONL history files into the dataset")
+    export.add_argument("files", nargs="+")
+    export.add_argument("--retailer", choices=sorted(DEFAULT_CURRENCY), default=None)
+    export.add_argument("--date", default=None, help="scrape date to file them under (default: file date)")
+    query = commands.add_parser("query", help="print matching rows")
+    query.add_argument("--retailer", default=None)
+    query.add_argument("--brand", default=None)
+    query.add_argument("--name", default=None, help="product name")
+    query.add_argument("--since", default=None, help="first scrape date (YYYY-MM-DD)")
+    query.add_argument("--until", default=None, help="last scrape date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        for path in args.files:
+            if not os.path.exists(path):
+                print(f"❌ {path} not found")
+                continue
+            scraped_at = datetime.fromisoformat(args.date) if args.date else None
+            rows = export_history(args.root, path, args.retailer, scraped_at)
+            print(f"✅ Exported {rows} rows from {path} to {args.root}")
+    else:
+        frame = read_prices(args.root, args.retailer, args.brand, args.name, args.since, args.until)
+        print(frame.to_string(index=False) if len(frame) else "No matching rows.")
+        print(f"{len(frame)} rows")
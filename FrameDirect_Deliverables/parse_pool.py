@@ -0,0 +1,120 @@
+import os
+import time
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from extraction_engine import extract_page, FRAMESDIRECT, GLASSES
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+SITES = {site["name"]: site for site in (FRAMESDIRECT, GLASSES)}
+QUEUE_PER_WORKER = 2   # pages allowed to wait for a parser, per worker
+
+
+def _parse_in_worker(site_name, html, base_url):
+    """Runs in a parser process: (products, next_url), seconds busy, worker pid."""
+    start = time.perf_counter()
+    result = extract_page(html, SITES[site_name], base_url=base_url)
+    return result, time.perf_counter() - start, os.getpid()
+
+
+def completed_future(result):
+    """A Future that already holds ``result`` (e.g. a parse reused from the page cache)."""
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class ParsePool:
+    """Process pool of HTML parsers fed by the fetchers through a bounded queue.
+
+    ``submit()`` hands a page's raw HTML to a parser process and returns a
+    Future of (products, next_url). At most ``max_queue`` pages wait for or
+    sit in a parser; a fetcher submitting beyond that blocks until one is
+    done, so fetching cannot run ahead of parsing without limit. Fetching
+    (threads, IO-bound) and parsing (processes, CPU-bound) therefore scale
+    independently. ``report()`` prints the queue depth and how busy each
+    worker was; with ``metrics`` (run_metrics.RunMetrics) each parse also
+    counts towards the "extract" stage.
+    """
+
+    def __init__(self, site, workers=None, max_queue=None, base_url=None, metrics=None):
+        self.site = site
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue or QUEUE_PER_WORKER * self.workers
+        self.base_url = base_url
+        self.metrics = metrics
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._slots = threading.BoundedSemaphore(self.max_queue)
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.pages = 0
+        self.queued = 0            # pages submitted and not parsed yet
+        self.depth_samples = []    # queue depth seen by each submit
+        self.blocked_seconds = 0.0
+        self.busy_by_worker = {}   # pid -> seconds spent parsing
+
+    def submit(self, html):
+        """Queue a page for parsing; blocks while max_queue pages are already queued."""
+        wait_start = time.perf_counter()
+        self._slots.acquire()
+        with self._lock:
+            self.blocked_seconds += time.perf_counter() - wait_start
+            self.queued += 1
+            self.depth_samples.append(self.queued)
+
+        result = Future()
+
+        def done(parsed):
+            self._slots.release()
+            with self._lock:
+                self.queued -= 1
+            try:
+                page, seconds, pid = parsed.result()
+            except BaseException as e:
+                result.set_exception(e)
+                return
+            with self._lock:
+                self.pages += 1
+                self.busy_by_worker[pid] = self.busy_by_worker.get(pid, 0.0) + seconds
+            if self.metrics is not None:
+                self.metrics.observe("extract", seconds)
+            result.set_result(page)
+
+        self._executor.submit(_parse_in_worker, self.site["name"], html, self.base_url).add_done_callback(done)
+        return result
+
+    def stats(self):
+        wall = time.perf_counter() - self.started
+        busy = sum(self.busy_by_worker.values())
+        samples = self.depth_samples
+        return {
+            "pages": self.pages,
+            "workers": self.workers,
+            "wall_seconds": round(wall, 3),
+            "utilisation": round(busy / (self.workers * wall), 3) if wall else 0.0,
+            "worker_utilisation": {pid: round(seconds / wall, 3) for pid, seconds in self.busy_by_worker.items()},
+            "queue_limit": self.max_queue,
+            "queue_depth_avg": round(sum(samples) / len(samples), 2) if samples else 0.0,
+            "queue_depth_max": max(samples, default=0),
+            "fetchers_blocked_seconds": round(self.blocked_seconds, 3),
+        }
+
+    def report(self):
+        stats = self.stats()
+        per_worker = ", ".join(f"{share:.1%}" for share in stats["worker_utilisation"].values())
+        print(f"Parse pool: {stats['pages']} pages on {stats['workers']} workers, "
+              f"utilisation {stats['utilisation']:.1%} ({per_worker or 'idle'}); "
+              f"queue depth avg {stats['queue_depth_avg']}, max {stats['queue_depth_max']} "
+              f"(limit {stats['queue_limit']}); fetchers waited {stats['fetchers_blocked_seconds']:.1f}s")
+        return stats
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
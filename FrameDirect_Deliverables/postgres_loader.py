@@ -0,0 +1,316 @@
+import io
+import os
+import csv
+import sqlite3
+from datetime import datetime
+from psycopg2 import pool
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+DB_CONFIG = {
+    "dbname": os.environ.get("PGDATABASE", "EyeWearChoices_DB"),
+    "user": os.environ.get("PGUSER", "postgres"),
+    "password": os.environ.get("PGPASSWORD", "Eng0802097@"),
+    "host": os.environ.get("PGHOST", "localhost"),
+    "port": os.environ.get("PGPORT", "5432"),
+}
+TABLE = "framesdirect.eyewear_products"
+LATEST_TABLE = "framesdirect.eyewear_latest_prices"   # newest row per product, kept up to date by triggers
+MIGRATIONS_TABLE = "framesdirect.schema_migrations"
+POOL_MIN_CONN = 1
+POOL_MAX_CONN = 4
+
+COLUMNS = ["retailer", "brand", "product_name", "former_price", "current_price",
+           "discount", "scraped_at", "scraped_date", "change_type"]
+PRICE_COLUMNS = ["former_price", "current_price", "discount", "scraped_at", "change_type"]
+
+# Natural key used for upserts; NULL brand/name are folded to '' so they still match
+NATURAL_KEY = "retailer, (COALESCE(brand, '')), (COALESCE(product_name, '')), scraped_date"
+# Columns the loaders added to the history table after it was first created
+ADDED_COLUMNS = [("retailer", "TEXT DEFAULT 'framesdirect'"), ("scraped_date", "DATE"), ("change_type", "TEXT")]
+
+
+def to_rows(records, retailer, scraped_at):
+    """Turn extracted records into table rows, all stamped with the same run timestamp."""
+    return [
+        (
+            retailer,
+            record["Brand"],
+            record["Product_Name"],
+            record["Former_Price"],
+            record["Current_Price"],
+            record["Discount"],
+            scraped_at,
+            scraped_at.date(),
+            record.get("Change_Type"),  # set by the delta mode (new/changed/disappeared)
+        )
+        for record in records
+    ]
+
+
+# -----------------------------
+# SCHEMA MIGRATIONS
+# -----------------------------
+# Numbered, applied once each and recorded in schema_migrations. Statements
+# are per dialect; {table}, {latest} and {schema} are filled in from the
+# table names of that database. Append new migrations, never edit old ones.
+
+_LATEST_COLUMNS = "retailer, brand, product_name, former_price, current_price, discount, scraped_at, change_type"
+_LATEST_SELECT = ("COALESCE(retailer, 'framesdirect'), COALESCE(brand, ''), COALESCE(product_name, ''), "
+                  "former_price, current_price, discount, scraped_at, change_type")
+_LATEST_UPDATES = ("former_price = EXCLUDED.former_price, current_price = EXCLUDED.current_price, "
+                   "discount = EXCLUDED.discount, scraped_at = EXCLUDED.scraped_at, change_type = EXCLUDED.change_type")
+
+MIGRATIONS = [
+    (1, "composite history index", {
+        "postgres": [
+            "CREATE INDEX IF NOT EXISTS eyewear_products_history "
+            "ON {table} (retailer, brand, product_name, scraped_at DESC)",
+        ],
+        "sqlite": [
+            "CREATE INDEX IF NOT EXISTS eyewear_products_history "
+            "ON {table} (retailer, brand, product_name, scraped_at DESC)",
+        ],
+    }),
+    (2, "latest-price table", {
+        "postgres": [
+            "CREATE TABLE IF NOT EXISTS {latest} ("
+            "retailer TEXT NOT NULL, brand TEXT NOT NULL, product_name TEXT NOT NULL, "
+            "former_price NUMERIC, current_price NUMERIC, discount INTEGER, "
+            "scraped_at TIMESTAMP NOT NULL, change_type TEXT, "
+            "PRIMARY KEY (retailer, brand, product_name))",
+            f"INSERT INTO {{latest}} ({_LATEST_COLUMNS}) "
+            f"SELECT DISTINCT ON (retailer, COALESCE(brand, ''), COALESCE(product_name, '')) {_LATEST_SELECT} "
+            "FROM {table} WHERE scraped_at IS NOT NULL "
+            # The PostgreSQL table has no id; ctid breaks ties in favour of the row stored last
+            "ORDER BY retailer, COALESCE(brand, ''), COALESCE(product_name, ''), scraped_at DESC, ctid DESC",
+        ],
+        "sqlite": [
+            "CREATE TABLE IF NOT EXISTS {latest} ("
+            "retailer TEXT NOT NULL, brand TEXT NOT NULL, product_name TEXT NOT NULL, "
+            "former_price NUMERIC, current_price NUMERIC, discount INTEGER, "
+            "scraped_at TIMESTAMP NOT NULL, change_type TEXT, "
+            "PRIMARY KEY (retailer, brand, product_name)) WITHOUT ROWID",
+            # Bare columns of a MAX() aggregate come from the row holding the max
+            f"INSERT INTO {{latest}} ({_LATEST_COLUMNS}) "
+            f"SELECT {_LATEST_SELECT} FROM (SELECT *, MAX(scraped_at || printf('%012d', id)) "
+            "FROM {table} WHERE scraped_at IS NOT NULL "
+            "GROUP BY retailer, COALESCE(brand, ''), COALESCE(product_name, ''))",
+        ],
+    }),
+    (3, "keep the latest-price table up to date on insert/update", {
+        # One statement-level trigger per event (transition tables allow one event each)
+        "postgres": [
+            "CREATE OR REPLACE FUNCTION {schema}.refresh_latest_prices() RETURNS trigger AS $$ BEGIN "
+            f"INSERT INTO {{latest}} AS latest ({_LATEST_COLUMNS}) "
+            f"SELECT DISTINCT ON (retailer, COALESCE(brand, ''), COALESCE(product_name, '')) {_LATEST_SELECT} "
+            "FROM new_rows WHERE scraped_at IS NOT NULL "
+            "ORDER BY retailer, COALESCE(brand, ''), COALESCE(product_name, ''), scraped_at DESC "
+            f"ON CONFLICT (retailer, brand, product_name) DO UPDATE SET {_LATEST_UPDATES} "
+            "WHERE EXCLUDED.scraped_at >= latest.scraped_at; "
+            "RETURN NULL; END $$ LANGUAGE plpgsql",
+            "CREATE TRIGGER eyewear_latest_on_insert AFTER INSERT ON {table} "
+            "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE PROCEDURE {schema}.refresh_latest_prices()",
+            "CREATE TRIGGER eyewear_latest_on_update AFTER UPDATE ON {table} "
+            "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE PROCEDURE {schema}.refresh_latest_prices()",
+        ],
+        "sqlite": [
+            f"CREATE TRIGGER IF NOT EXISTS eyewear_latest_on_{event.lower()} AFTER {event} ON {{table}} "
+            "WHEN NEW.scraped_at IS NOT NULL BEGIN "
+            f"INSERT INTO {{latest}} ({_LATEST_COLUMNS}) VALUES ("
+            "COALESCE(NEW.retailer, 'framesdirect'), COALESCE(NEW.brand, ''), COALESCE(NEW.product_name, ''), "
+            "NEW.former_price, NEW.current_price, NEW.discount, NEW.scraped_at, NEW.change_type) "
+            f"ON CONFLICT (retailer, brand, product_name) DO UPDATE SET {_LATEST_UPDATES} "
+            "WHERE EXCLUDED.scraped_at >= {latest}.scraped_at; END"
+            for event in ("INSERT", "UPDATE")
+        ],
+    }),
+]
+
+TABLE_NAMES = {
+    "postgres": {"table": TABLE, "latest": LATEST_TABLE, "migrations": MIGRATIONS_TABLE,
+                 "schema": TABLE.split(".")[0]},
+    "sqlite": {"table": "eyewear_products", "latest": "eyewear_latest_prices", "migrations": "schema_migrations",
+               "schema": "main"},
+}
+
+
+def migrate(cur, dialect):
+    """Apply the migrations this database has not had yet, in order; returns their versions.
+
+    Runs inside the caller's transaction, so a failing migration leaves the
+    schema as it was.
+    """
+    names = TABLE_NAMES[dialect]
+    cur.execute(
+        f"CREATE TABLE IF NOT EXISTS {names['migrations']} ("
+        "version INTEGER PRIMARY KEY, description TEXT NOT NULL, applied_at TIMESTAMP NOT NULL)"
+    )
+    if dialect == "postgres":
+        # Several scrapers may start at once; only one of them migrates
+        cur.execute(f"LOCK TABLE {names['migrations']} IN EXCLUSIVE MODE")
+    cur.execute(f"SELECT version FROM {names['migrations']}")
+    done = {row[0] for row in cur.fetchall()}
+    placeholder = "%s" if dialect == "postgres" else "?"
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version in done:
+            continue
+        for statement in statements[dialect]:
+            cur.execute(statement.format(**names))
+        cur.execute(
+            f"INSERT INTO {names['migrations']} (version, description, applied_at) "
+            f"VALUES ({placeholder}, {placeholder}, {placeholder})",
+            (version, description, datetime.now().isoformat(sep=" ", timespec="seconds")),
+        )
+        applied.append(version)
+    if applied:
+        print(f"✅ Applied schema migrations {applied} ({dialect})")
+    return applied
+
+
+def ensure_schema(cur, dialect, upsert=False):
+    """Bring the history table up to date: the loader's columns (and unique index for upserts), then the migrations.
+
+    The migrations read the added columns, so anything that migrates a
+    database (the loaders, PriceHistory) goes through here. The SQLite table
+    is created when missing; the PostgreSQL one is expected to exist.
+    """
+    table = TABLE_NAMES[dialect]["table"]
+    if dialect == "postgres":
+        for column, definition in ADDED_COLUMNS:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}")
+    else:
+        cur.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, retailer TEXT DEFAULT 'framesdirect', "
+            "brand TEXT, product_name TEXT, former_price NUMERIC, current_price NUMERIC, "
+            "discount INTEGER, scraped_at TIMESTAMP, scraped_date DATE, change_type TEXT)"
+        )
+        cur.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cur.fetchall()}
+        for column, definition in ADDED_COLUMNS:
+            if column not in existing:
+                cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    if upsert:
+        cur.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS eyewear_products_natural_key ON {table} ({NATURAL_KEY})")
+    return migrate(cur, dialect)
+
+
+# -----------------------------
+# POSTGRESQL
+# -----------------------------
+
+class PostgresLoader:
+    """Loads rows into PostgreSQL through a connection pool using COPY FROM STDIN.
+
+    With upsert=True rows go through a temp staging table and are merged on
+    (retailer, brand, product_name, scraped date), so re-running a day's crawl
+    updates prices instead of adding duplicate rows.
+    """
+
+    def __init__(self, config=DB_CONFIG, retailer="framesdirect", upsert=False,
+                 minconn=POOL_MIN_CONN, maxconn=POOL_MAX_CONN):
+        self.retailer = retailer
+        self.upsert = upsert
+        self.pool = pool.ThreadedConnectionPool(minconn, maxconn, **config)
+        self.ensure_schema()
+
+    def ensure_schema(self):
+        """Add the columns (and unique index for upserts) the loader needs, then run the migrations."""
+        conn = self.pool.getconn()
+        try:
+            with conn, conn.cursor() as cur:
+                ensure_schema(cur, "postgres", self.upsert)
+        finally:
+            self.pool.putconn(conn)
+
+    def _copy(self, cur, table, rows):
+        """Stream rows to the server with COPY ... FROM STDIN (CSV)."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(["" if value is None else value for value in row])
+        buffer.seek(0)
+        cur.copy_expert(
+            f"COPY {table} ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+
+    def load_rows(self, records, scraped_at=None):
+        """Load one batch (e.g. one page) of records in a single transaction."""
+        if not records:
+            return 0
+        rows = to_rows(records, self.retailer, scraped_at or datetime.now())
+        conn = self.pool.getconn()
+        try:
+            with conn, conn.cursor() as cur:
+                if not self.upsert:
+                    self._copy(cur, TABLE, rows)
+                else:
+                    cur.execute(
+                        f"CREATE TEMP TABLE eyewear_staging (LIKE {TABLE} INCLUDING DEFAULTS) ON COMMIT DROP"
+                    )
+                    self._copy(cur, "eyewear_staging", rows)
+                    updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in PRICE_COLUMNS)
+                    cur.execute(
+                        f"INSERT INTO {TABLE} ({', '.join(COLUMNS)}) "
+                        f"SELECT DISTINCT ON ({NATURAL_KEY}) {', '.join(COLUMNS)} FROM eyewear_staging "
+                        f"ON CONFLICT ({NATURAL_KEY}) DO UPDATE SET {updates}"
+                    )
+        finally:
+            self.pool.putconn(conn)
+        return len(rows)
+
+    def close(self):
+        self.pool.closeall()
+
+
+# -----------------------------
+# SQLITE STAND-IN
+# -----------------------------
+
+class SqliteLoader:
+    """Same interface as PostgresLoader, backed by a local SQLite file.
+
+    Used for local runs and checks without a PostgreSQL server; rows are
+    written with executemany batches instead of COPY.
+    """
+
+    def __init__(self, path, retailer="framesdirect", upsert=False):
+        self.retailer = retailer
+        self.upsert = upsert
+        # check_same_thread=False: the parallel scraper saves from worker threads
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.ensure_schema()
+
+    def ensure_schema(self):
+        with self.conn:
+            ensure_schema(self.conn.cursor(), "sqlite", self.upsert)
+
+    def load_rows(self, records, scraped_at=None):
+        if not records:
+            return 0
+        rows = [
+            row[:6] + (row[6].isoformat(sep=" "), row[7].isoformat(), row[8])
+            for row in to_rows(records, self.retailer, scraped_at or datetime.now())
+        ]
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        sql = f"INSERT INTO eyewear_products ({', '.join(COLUMNS)}) VALUES ({placeholders})"
+        if self.upsert:
+            updates = ", ".join(f"{col} = excluded.{col}" for col in PRICE_COLUMNS)
+            sql += f" ON CONFLICT ({NATURAL_KEY}) DO UPDATE SET {updates}"
+        with self.conn:
+            self.conn.executemany(sql, rows)
+        return len(rows)
+
+    def close(self):
+        self.conn.close()
+
+
+def create_loader(sqlite_path=None, retailer="framesdirect", upsert=False):
+    """Return a SqliteLoader when a path is given, otherwise a pooled PostgresLoader."""
+    if sqlite_path:
+        return SqliteLoader(sqlite_path, retailer=retailer, upsert=upsert)
+    return PostgresLoader(retailer=retailer, upsert=upsert)
@@ -0,0 +1,171 @@
+import time
+import sqlite3
+import argparse
+from datetime import date
+import psycopg2
+import psycopg2.extras
+from postgres_loader import DB_CONFIG, TABLE_NAMES, ensure_schema, migrate
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+LATEST_LIMIT = 100   # rows returned by latest_prices() unless asked otherwise
+# What a product sells for: the sale price, or the list price when not on sale
+PRICE_EXPR = "COALESCE(current_price, former_price)"
+
+
+# -----------------------------
+# QUERY API
+# -----------------------------
+
+class PriceHistory:
+    """Read side of the price history: latest prices and price trends.
+
+    Works on PostgreSQL (DB_CONFIG) or on the SQLite file of SqliteLoader.
+    Opening it brings the schema up to date as the loaders do (see
+    postgres_loader.py), so the composite (retailer, brand, product_name,
+    scraped_at) index and the trigger-maintained latest-price table exist. Latest-price questions
+    read that small table by primary key, and trend questions are range
+    scans of the index for one product, so neither grows with the history.
+    """
+
+    def __init__(self, sqlite_path=None, config=DB_CONFIG):
+        if sqlite_path:
+            self.dialect = "sqlite"
+            self.conn = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self.conn.row_factory = sqlite3.Row
+        else:
+            self.dialect = "postgres"
+            self.conn = psycopg2.connect(**config, cursor_factory=psycopg2.extras.RealDictCursor)
+        self.names = TABLE_NAMES[self.dialect]
+        with self.conn:
+            ensure_schema(self._schema_cursor(), self.dialect)
+
+    def _schema_cursor(self):
+        # The migrations read rows by position, not as the dicts of RealDictCursor
+        if self.dialect == "postgres":
+            return self.conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+        return self.conn.cursor()
+
+    def _query(self, sql, params=()):
+        if self.dialect == "postgres":
+            sql = sql.replace("?", "%s")
+        cur = self.conn.cursor()
+        try:
+            cur.execute(sql.format(**self.names), params)
+            return [dict(row) for row in cur.fetchall()]
+        finally:
+            cur.close()
+            if self.dialect == "postgres":
+                self.conn.rollback()   # end the read transaction
+
+    def retailers(self, brand=None, product_name=None):
+        """Retailers that have (this product) in the latest-price table."""
+        sql, params = "SELECT DISTINCT retailer FROM {latest}", []
+        if brand is not None:
+            sql += " WHERE brand = ? AND product_name = ?"
+            params = [brand, product_name or ""]
+        return [row["retailer"] for row in self._query(sql, params)]
+
+    def latest_price(self, brand, product_name, retailer=None):
+        """The newest observation of one product, per retailer (list of dicts)."""
+        sql = f"SELECT *, {PRICE_EXPR} AS price FROM {{latest}} WHERE brand = ? AND product_name = ?"
+        params = [brand or "", product_name or ""]
+        if retailer:
+            sql += " AND retailer = ?"
+            params.append(retailer)
+        return self._query(sql + " ORDER BY price", params)
+
+    def latest_prices(self, retailer=None, brand=None, on_sale=False, limit=LATEST_LIMIT, offset=0):
+        """Current price of every product (optionally one retailer / brand / only discounted)."""
+        conditions, params = [], []
+        if retailer:
+            conditions.append("retailer = ?")
+            params.append(retailer)
+        if brand:
+            conditions.append("brand = ?")
+            params.append(brand)
+        if on_sale:
+            conditions.append("current_price < former_price")
+        # Disappeared products keep their last row but are not for sale any more
+        conditions.append("COALESCE(change_type, '') <> 'disappeared'")
+        sql = (f"SELECT *, {PRICE_EXPR} AS price FROM {{latest}} WHERE {' AND '.join(conditions)} "
+               "ORDER BY retailer, brand, product_name LIMIT ? OFFSET ?")
+        return self._query(sql, params + [limit, offset])
+
+    def price_trend(self, brand, product_name, retailer=None, since=None, until=None):
+        """Daily price points of one product: [{retailer, day, min_price, max_price, observations}].
+
+        The retailer is always part of the filter (all retailers carrying the
+        product when none is given), so the lookup is a range scan of the
+        composite index.
+        """
+        retailers = [retailer] if retailer else self.retailers(brand, product_name)
+        if not retailers:
+            return []
+        day = "DATE(scraped_at)" if self.dialect == "sqlite" else "CAST(scraped_at AS DATE)"
+        sql = (f"SELECT retailer, {day} AS day, MIN({PRICE_EXPR}) AS min_price, "
+               f"MAX({PRICE_EXPR}) AS max_price, COUNT(*) AS observations FROM {{table}} "
+               f"WHERE retailer IN ({', '.join('?' for _ in retailers)}) AND brand = ? AND product_name = ?")
+        params = retailers + [brand, product_name]
+        if since:
+            sql += " AND scraped_at >= ?"
+            params.append(str(since))
+        if until:
+            # Whole last day included
+            sql += " AND scraped_at < ?"
+            params.append(str(date.fromordinal(date.fromisoformat(str(until)).toordinal() + 1)))
+        return self._query(sql + f" GROUP BY retailer, {day} ORDER BY retailer, day", params)
+
+    def rebuild_latest(self):
+        """Re-derive the latest-price table from the full history (e.g. after manual edits)."""
+        with self.conn:
+            cur = self._schema_cursor()
+            cur.execute("DELETE FROM {latest}".format(**self.names))
+            cur.execute("DELETE FROM {migrations} WHERE version = 2".format(**self.names))
+            migrate(cur, self.dialect)
+
+    def close(self):
+        self.conn.close()
+
+
+# -----------------------------
+# RUN SCRIPT
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latest prices and price trends from the price history.")
+    parser.add_argument("command", choices=["migrate", "latest", "trend", "rebuild"],
+                        help="apply migrations, show latest prices, show a product's trend, or rebuild the latest table")
+    parser.add_argument("--sqlite", default=None, help="SQLite file of the loader instead of PostgreSQL")
+    parser.add_argument("--retailer", default=None)
+    parser.add_argument("--brand", default=None)
+    parser.add_argument("--name", default=None, help="product name (latest/trend of one product)")
+    parser.add_argument("--since", default=None, help="first day of the trend (YYYY-MM-DD)")
+    parser.add_argument("--until", default=None, help="last day of the trend (YYYY-MM-DD)")
+    parser.add_argument("--on-sale", action="store_true", help="only discounted products")
+    parser.add_argument("--limit", type=int, default=LATEST_LIMIT)
+    args = parser.parse_args()
+
+    history = PriceHistory(sqlite_path=args.sqlite)
+    try:
+        start = time.perf_counter()
+        if args.command == "migrate":
+            rows = []
+        elif args.command == "rebuild":
+            history.rebuild_latest()
+            rows = []
+        elif args.command == "trend":
+            if not (args.brand and args.name):
+                parser.error("trend needs --brand and --name")
+            rows = history.price_trend(args.brand, args.name, args.retailer, args.since, args.until)
+        elif args.name:
+            rows = history.latest_price(args.brand, args.name, args.retailer)
+        else:
+            rows = history.latest_prices(args.retailer, args.brand, args.on_sale, args.limit)
+        elapsed = (time.perf_counter() - start) * 1000
+        for row in rows:
+            print(", ".join(f"{key}={value}" for key, value in row.items()))
+        print(f"{len(rows)} rows in {elapsed:.1f} ms")
+    finally:
+        history.close()
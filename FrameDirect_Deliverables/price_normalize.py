@@ -0,0 +1,182 @@
+import os
+import argparse
+import pandas as pd
+from compact_history import read_history
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+# Typed schema shared by both retailers. Prices are in currency units,
+# rounded to cents; percentages are 0-100.
+SCHEMA = {
+    "retailer": "string",
+    "brand": "string",
+    "product_name": "string",
+    "currency": "string",
+    "former_price": "Float64",
+    "current_price": "Float64",
+    "price": "Float64",                     # what the product sells for now
+    "discount_pct": "Int64",                # as advertised on the badge
+    "effective_discount_pct": "Float64",    # computed from the two prices
+}
+# Source columns of each naming convention (FramesDirect / glasses.com records)
+SOURCE_FIELDS = {
+    "brand": ("Brand", "brand"),
+    "product_name": ("Product_Name", "name"),
+    "former_price": ("Former_Price", "former_price"),
+    "current_price": ("Current_Price", "current_price"),
+    "discount": ("Discount", "discount"),
+}
+CURRENCY_SYMBOLS = {"$": "USD", "US$": "USD", "C$": "CAD", "CA$": "CAD", "€": "EUR", "£": "GBP"}
+DEFAULT_CURRENCY = {"framesdirect": "USD", "glasses": "USD"}
+CHUNK_ROWS = 100_000       # rows per batch when normalizing a history file
+
+_CURRENCY_PATTERN = "(" + "|".join(
+    sorted((symbol.replace("$", r"\$") for symbol in CURRENCY_SYMBOLS), key=len, reverse=True)
+    + ["USD", "CAD", "EUR", "GBP"]
+) + ")"
+
+
+# -----------------------------
+# VECTORIZED CONVERSIONS
+# -----------------------------
+
+def _column(frame, target):
+    """The source column for a schema field, whichever naming convention the batch uses."""
+    for name in SOURCE_FIELDS[target]:
+        if name in frame.columns:
+            return frame[name]
+    return pd.Series(pd.NA, index=frame.index, dtype="object")
+
+
+def to_price(values):
+    """"$ 1,189.00", "$1189" or 1189.0 -> 1189.0 (Float64, <NA> when missing or not a number)."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("Float64").round(2)
+    text = values.astype("string").str.replace(r"[^0-9.\-]", "", regex=True)
+    return pd.to_numeric(text.replace("", pd.NA), errors="coerce").astype("Float64").round(2)
+
+
+def to_percent(values):
+    """"-30%", "30% OFF", "30" or 30 -> 30 (Int64)."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.abs().round().astype("Int64")
+    digits = values.astype("string").str.extract(r"(\d+)", expand=False)
+    return pd.to_numeric(digits, errors="coerce").astype("Int64")
+
+
+def to_currency(*price_columns, default="USD"):
+    """ISO code from the first currency symbol found in the price texts, else ``default``."""
+    currency = pd.Series(pd.NA, index=price_columns[0].index, dtype="string")
+    for values in price_columns:
+        if pd.api.types.is_numeric_dtype(values):
+            continue
+        found = values.astype("string").str.extract(_CURRENCY_PATTERN, expand=False)
+        currency = currency.fillna(found.replace(CURRENCY_SYMBOLS))
+    return currency.fillna(default).astype("string")
+
+
+# -----------------------------
+# NORMALIZATION
+# -----------------------------
+
+def normalize_frame(frame, retailer):
+    """Convert a batch of raw records (DataFrame) to the typed SCHEMA in one pass per column.
+
+    Either retailer's naming convention is accepted. A product without a
+    current (sale) price sells at its former price; the effective discount
+    is 1 - price / former_price, and 0 when it is not on sale.
+    """
+    former_raw, current_raw = _column(frame, "former_price"), _column(frame, "current_price")
+    former, current = to_price(former_raw), to_price(current_raw)
+    price = current.fillna(former)
+    list_price = former.fillna(price)
+    effective = ((1 - price / list_price) * 100).round(1)
+    effective = effective.mask(list_price <= 0)
+
+    normalized = pd.DataFrame({
+        "retailer": pd.Series(retailer, index=frame.index),
+        "brand": _column(frame, "brand").astype("string").str.strip(),
+        "product_name": _column(frame, "product_name").astype("string").str.strip(),
+        "currency": to_currency(current_raw, former_raw, default=DEFAULT_CURRENCY.get(retailer, "USD")),
+        "former_price": former,
+        "current_price": current,
+        "price": price,
+        "discount_pct": to_percent(_column(frame, "discount")),
+        "effective_discount_pct": effective,
+    })
+    return normalized.astype(SCHEMA)
+
+
+def normalize_batch(records, retailer):
+    """Normalize a list of record dicts (e.g. one page) to a typed DataFrame."""
+    return normalize_frame(pd.DataFrame.from_records(records), retailer)
+
+
+def detect_retailer(fields, path=None):
+    """Retailer of a history file: from its name or folder, else from its columns.
+
+    Both retailers' CSV exports can use the Brand/Product_Name header
+    (glassesdotcom_data.csv does), so the path decides first; the columns
+    are only the fallback ("framesdirect" for Brand/Product_Name,
+    "glasses" for brand/name).
+    """
+    if path:
+        # The file name first, then its folder (e.g. GlassesDotCom_Deliverables/)
+        path = os.path.abspath(path).lower()
+        for part in (os.path.basename(path), os.path.basename(os.path.dirname(path))):
+            for retailer in sorted(DEFAULT_CURRENCY, key=len, reverse=True):
+                if retailer in part:
+                    return retailer
+    return "framesdirect" if "Product_Name" in fields else "glasses"
+
+
+def iter_normalized(path, retailer=None, chunk_rows=CHUNK_ROWS):
+    """Normalize a CSV/JSON/JSONL history file in batches of ``chunk_rows``; yields DataFrames."""
+    fields, records = read_history(path)
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= chunk_rows:
+            retailer = retailer or detect_retailer(fields or list(batch[0]), path)
+            yield normalize_batch(batch, retailer)
+            batch = []
+    if batch:
+        yield normalize_batch(batch, retailer or detect_retailer(fields or list(batch[0]), path))
+
+
+# -----------------------------
+# RUN SCRIPT
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert scraped history files to one typed price schema (both retailers).")
+    parser.add_argument("files", nargs="+",
+                        help="history files, e.g. framesdirectdotcom_data.csv glasses_data.jsonl")
+    parser.add_argument("--retailer", choices=sorted(DEFAULT_CURRENCY), default=None,
+                        help="retailer of the files (default: from the file name or folder, else the columns)")
+    parser.add_argument("--output", default=None,
+                        help="write the normalized rows of all files to this CSV")
+    args = parser.parse_args()
+
+    frames = []
+    for path in args.files:
+        if not os.path.exists(path):
+            print(f"❌ {path} not found")
+            continue
+        for frame in iter_normalized(path, args.retailer):
+            frames.append(frame)
+    if not frames:
+        print("⚠ Nothing to normalize.")
+    else:
+        data = pd.concat(frames, ignore_index=True)
+        summary = data.groupby(["retailer", "currency"]).agg(
+            products=("price", "size"), avg_price=("price", "mean"),
+            on_sale=("effective_discount_pct", lambda s: int((s > 0).sum())),
+            avg_discount=("effective_discount_pct", "mean"),
+        )
+        print(summary.round(2).to_string())
+        if args.output:
+            data.to_csv(args.output, index=False)
+            print(f"✅ Saved {len(data)} normalized rows to {args.output}")
@@ -0,0 +1,162 @@
+import os
+import sys
+import argparse
+import pandas as pd
+from price_normalize import iter_normalized, DEFAULT_CURRENCY
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+# Model codes look like RB8416, OX8046, TY2142U, HC6232U or RB3947V
+MODEL_CODE_PATTERN = r"\b([A-Za-z]{1,4}\d{3,5}[A-Za-z]{0,2})\b"
+TRADEMARKS = r"[™®©]"
+# Words that describe the listing rather than the model ("RB8416 Optics")
+STRIP_WORDS = ("optics", "optical", "eyeglasses", "eyeglass", "frames", "frame", "rx", "bio-based")
+
+
+# -----------------------------
+# MODEL KEYS
+# -----------------------------
+
+def brand_key(brand):
+    """"Ray-Ban" / "RAY BAN" -> "rayban" (Series in, Series out)."""
+    return brand.astype("string").str.lower().str.replace(r"[^0-9a-z]", "", regex=True)
+
+
+def model_key(product_name):
+    """Normalized model of each product name: the model code, or the cleaned-up name without one.
+
+    "RB8416 Optics" -> "RB8416", "OX8046 Airdrop™" -> "OX8046",
+    "Latch TI" -> "latch ti". Names without a code keep their words
+    (lower case, without STRIP_WORDS or parentheses), so they only match the
+    same name on the other site.
+    """
+    name = product_name.astype("string").str.replace(TRADEMARKS, "", regex=True)
+    code = name.str.extract(MODEL_CODE_PATTERN, expand=False).str.upper()
+    words = (name.str.lower()
+             .str.replace(r"\([^)]*\)", " ", regex=True)
+             .str.replace(r"\b(?:" + "|".join(STRIP_WORDS) + r")\b", " ", regex=True)
+             .str.replace(r"[^0-9a-z]+", " ", regex=True)
+             .str.strip())
+    return code.fillna(words.replace("", pd.NA))
+
+
+def latest_observations(frame):
+    """Last row per product of a history (rows are in the order they were scraped)."""
+    return frame.drop_duplicates(subset=["retailer", "brand", "product_name"], keep="last")
+
+
+def build_index(frame):
+    """Hash index of one retailer's products: (brand_key, model_key, currency) -> cheapest variant.
+
+    Several listings can share a model (colours, sizes); the cheapest one
+    represents the model, and "variants" counts them.
+    """
+    frame = latest_observations(frame).assign(
+        brand_key=lambda f: brand_key(f["brand"]),
+        model_key=lambda f: model_key(f["product_name"]),
+    ).dropna(subset=["brand_key", "model_key", "price"])
+    frame = frame[frame["brand_key"] != ""]
+    keys = ["brand_key", "model_key", "currency"]
+    cheapest = frame.sort_values("price").drop_duplicates(subset=keys, keep="first").set_index(keys)
+    cheapest["variants"] = frame.groupby(keys).size()
+    return cheapest[["brand", "product_name", "price", "variants"]]
+
+
+# -----------------------------
+# COMPARISON
+# -----------------------------
+
+def compare(indexes, matched_only=True):
+    """Join the retailers' indexes on the model key and pick the cheapest retailer per product.
+
+    ``indexes`` maps retailer -> build_index() result. Each join is a hash
+    join on the index, so the cost is linear in the number of products.
+    Returns one row per model with <retailer>_price / <retailer>_product
+    columns, cheapest_retailer, cheapest_price, saving and saving_pct.
+    """
+    joined = None
+    for retailer, index in indexes.items():
+        columns = index.rename(columns={
+            "brand": f"{retailer}_brand", "product_name": f"{retailer}_product",
+            "price": f"{retailer}_price", "variants": f"{retailer}_variants",
+        })
+        joined = columns if joined is None else joined.join(columns, how="outer")
+    if joined is None:
+        return pd.DataFrame()
+
+    for retailer in indexes:
+        joined[f"{retailer}_variants"] = joined[f"{retailer}_variants"].astype("Int64")
+    price_columns = [f"{retailer}_price" for retailer in indexes]
+    prices = joined[price_columns].astype("Float64")
+    joined["retailers"] = prices.notna().sum(axis=1)
+    if matched_only:
+        joined = joined[joined["retailers"] >= 2]
+        prices = prices.loc[joined.index]
+    joined["cheapest_price"] = prices.min(axis=1)
+    joined["cheapest_retailer"] = prices.astype("float64").idxmin(axis=1).str.removesuffix("_price")
+    joined["saving"] = (prices.max(axis=1) - joined["cheapest_price"]).round(2)
+    joined["saving_pct"] = (joined["saving"] / prices.max(axis=1) * 100).round(1)
+    brand_columns = [f"{retailer}_brand" for retailer in indexes]
+    joined["brand"] = joined[brand_columns].bfill(axis=1).iloc[:, 0]
+    joined = joined.drop(columns=brand_columns).reset_index()
+    leading = ["brand", "model_key", "currency", "cheapest_retailer", "cheapest_price", "saving", "saving_pct"]
+    return joined[leading + [c for c in joined.columns if c not in leading and c != "brand_key"]].sort_values(
+        ["saving", "brand", "model_key"], ascending=[False, True, True], ignore_index=True)
+
+
+def load_history(paths, retailers=None):
+    """Normalized rows of several history files, grouped by retailer.
+
+    ``retailers`` maps a path to its retailer; other files are labelled by
+    price_normalize.detect_retailer (file name, folder, then columns).
+    """
+    retailers = retailers or {}
+    frames = {}
+    for path in paths:
+        for frame in iter_normalized(path, retailers.get(path)):
+            frames.setdefault(frame["retailer"].iloc[0], []).append(frame)
+    return {retailer: pd.concat(parts, ignore_index=True) for retailer, parts in frames.items()}
+
+
+# -----------------------------
+# RUN SCRIPT
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Match the same frames across retailers and find the cheapest.")
+    parser.add_argument("files", nargs="+",
+                        help="history files of the retailers, e.g. framesdirectdotcom_data.csv glasses_data.csv")
+    parser.add_argument("--output", default="price_comparison.csv", help="CSV to write the comparison to")
+    parser.add_argument("--all", action="store_true", help="also list products found at one retailer only")
+    parser.add_argument("--retailer", action="append", default=[], metavar="FILE=NAME",
+                        help=f"retailer of a file when its name does not say, e.g. export.csv=glasses "
+                             f"({', '.join(sorted(DEFAULT_CURRENCY))}); can be repeated")
+    args = parser.parse_args()
+    retailers = {}
+    for option in args.retailer:
+        path, _, name = option.rpartition("=")
+        if not path or name not in DEFAULT_CURRENCY:
+            parser.error(f"--retailer expects FILE=NAME with NAME one of {sorted(DEFAULT_CURRENCY)}, got {option!r}")
+        retailers[path] = name
+
+    missing = [path for path in args.files if not os.path.exists(path)]
+    for path in missing:
+        print(f"❌ {path} not found")
+    history = load_history([path for path in args.files if path not in missing], retailers)
+    if len(history) < 2:
+        print(f"❌ Need files from at least two retailers, got {sorted(history) or 'none'} "
+              "(label a file with --retailer FILE=NAME)")
+        sys.exit(1)
+    indexes = {retailer: build_index(frame) for retailer, frame in history.items()}
+    for retailer, index in indexes.items():
+        print(f"{retailer}: {len(index)} models indexed")
+    comparison = compare(indexes, matched_only=not args.all)
+    matched = int((comparison["retailers"] >= 2).sum()) if len(comparison) else 0
+    if not matched:
+        print("❌ No model found at more than one retailer; nothing written")
+        sys.exit(1)
+    comparison.to_csv(args.output, index=False)
+    print(f"✅ {matched} models found at more than one retailer; comparison saved to {args.output}")
+    if matched:
+        print(comparison.head(10).to_string(index=False))
@@ -0,0 +1,267 @@
+import os
+import json
+import time
+import random
+import threading
+from datetime import datetime
+import requests
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from fetch_engine import FetchError
+from jsonl_store import atomic_write
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+MAX_ATTEMPTS = 4                  # tries per page, the first one included
+BASE_DELAY_SECONDS = 2            # backoff before the first retry, doubled for every further one
+MAX_DELAY_SECONDS = 60
+PAGE_BUDGET_SECONDS = 300         # time one page may take over all its attempts and backoffs
+RUN_BUDGET_SECONDS = 1800         # time a run may lose to failed attempts, backoffs and breaker pauses
+FAILURE_THRESHOLD = 5             # failures in a row that open the circuit breaker
+COOL_DOWN_SECONDS = 30            # pause while the breaker is open (doubles if the trial fetch fails)
+MAX_COOL_DOWN_SECONDS = 600
+# Transient failures: a page that did not load in time or a Chrome error, an HTTP error /
+# missing markup, or a dropped or timed-out connection
+RETRYABLE_ERRORS = (TimeoutException, WebDriverException, FetchError,
+                    requests.ConnectionError, requests.Timeout)
+
+
+class RetryError(Exception):
+    """A page still failed after its retries (or its budget ran out)."""
+
+    def __init__(self, url, attempts, error):
+        super().__init__(f"Giving up on {url} after {attempts} attempt(s): {error}")
+        self.url = url
+        self.attempts = attempts
+        self.error = error
+
+
+# -----------------------------
+# CIRCUIT BREAKER
+# -----------------------------
+
+class CircuitBreaker:
+    """Pauses all fetches of a site while it keeps failing.
+
+    After FAILURE_THRESHOLD failures in a row the breaker opens and fetches
+    wait for the cool-down. Then one trial fetch goes through (half-open): a
+    success closes the breaker, a failure opens it again with twice the
+    cool-down. Shared by the fetch threads of a run.
+    """
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, cool_down=COOL_DOWN_SECONDS,
+                 max_cool_down=MAX_COOL_DOWN_SECONDS):
+        self.threshold = threshold
+        self.base_cool_down = cool_down
+        self.max_cool_down = max_cool_down
+        self.cool_down = cool_down
+        self.state = "closed"
+        self.failures = 0
+        self.opened_until = 0
+        self.trips = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until a fetch may go ahead; returns the seconds spent waiting."""
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                if self.state == "closed":
+                    return time.monotonic() - start
+                now = time.monotonic()
+                if self.state == "open" and now >= self.opened_until:
+                    self.state = "half-open"
+                if self.state == "half-open" and not self._trial_running:
+                    self._trial_running = True
+                    return time.monotonic() - start
+                pause = max(self.opened_until - now, 0.1)
+            time.sleep(min(pause, 1))
+
+    def success(self):
+        with self._lock:
+            if self.state != "closed":
+                print("✅ Site is answering again, circuit breaker closed")
+            self.state = "closed"
+            self.failures = 0
+            self.cool_down = self.base_cool_down
+            self._trial_running = False
+
+    def release(self):
+        """End a trial fetch that neither succeeded nor failed, so the next one may go ahead."""
+        with self._lock:
+            self._trial_running = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half-open":
+                self.cool_down = min(self.cool_down * 2, self.max_cool_down)
+                self._open()
+            elif self.state == "closed" and self.failures >= self.threshold:
+                self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.trips += 1
+        self.opened_until = time.monotonic() + self.cool_down
+        self._trial_running = False
+        print(f"⚠ {self.failures} failures in a row, circuit breaker open: pausing fetches for {self.cool_down}s")
+
+
+# -----------------------------
+# RETRY POLICY
+# -----------------------------
+
+class RetryPolicy:
+    """Retries transient fetch failures with exponential backoff and jitter.
+
+    Each page gets up to max_attempts tries within page_budget seconds; the
+    whole run may spend run_budget seconds on failed attempts, backoffs and
+    circuit-breaker pauses, after which failures are not retried any more.
+    Every attempt first waits for the circuit breaker. When a page still
+    fails, RetryError is raised so the caller can add it to the dead-letter
+    list and go on with the next page. With ``metrics``
+    (run_metrics.RunMetrics) each retry is counted.
+    """
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY_SECONDS, max_delay=MAX_DELAY_SECONDS,
+                 page_budget=PAGE_BUDGET_SECONDS, run_budget=RUN_BUDGET_SECONDS, breaker=None,
+                 retryable=RETRYABLE_ERRORS, metrics=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.page_budget = page_budget
+        self.run_budget = run_budget
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.retryable = retryable
+        self.metrics = metrics
+        self.run_spent = 0.0
+        self._budget_reported = False
+        self._lock = threading.Lock()
+
+    def delay(self, attempt):
+        """Backoff before retry number ``attempt`` (1, 2, ...): exponential with equal jitter."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _spend(self, seconds):
+        with self._lock:
+            self.run_spent += seconds
+            return self.run_spent < self.run_budget
+
+    def budget_left(self):
+        """Whether the run may still spend time on retries."""
+        with self._lock:
+            return self.run_spent < self.run_budget
+
+    def call(self, fetch_fn, url):
+        """fetch_fn(url) with retries; raises RetryError when the page cannot be fetched."""
+        page_spent = 0.0
+        attempt = 1
+        while True:
+            self._spend(self.breaker.wait())
+            start = time.monotonic()
+            try:
+                result = fetch_fn(url)
+            except self.retryable as e:
+                self.breaker.failure()
+                elapsed = time.monotonic() - start
+                page_spent += elapsed
+                run_left = self._spend(elapsed)
+                pause = self.delay(attempt)
+                if not run_left and not self._budget_reported:
+                    self._budget_reported = True
+                    print(f"⚠ Retry budget of the run ({self.run_budget}s) used up, failed pages are not retried")
+                if attempt >= self.max_attempts or page_spent + pause > self.page_budget or not run_left:
+                    raise RetryError(url, attempt, e) from e
+                print(f"⚠ Attempt {attempt} for {url} failed ({e}), retrying in {pause:.1f}s")
+                if self.metrics is not None:
+                    self.metrics.count("retries")
+                time.sleep(pause)
+                page_spent += pause
+                self._spend(pause)
+                attempt += 1
+            except BaseException:
+                # Not a fetch failure (e.g. a parse error): it says nothing about the site's health
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.success()
+                return result
+
+    def wrap(self, fetch_fn):
+        """fetch_fn with this policy applied (for CrawlScheduler.iter_pages / iter_chain)."""
+        return lambda url: self.call(fetch_fn, url)
+
+
+# -----------------------------
+# DEAD-LETTER LIST
+# -----------------------------
+
+class DeadLetterList:
+    """Pages given up on, kept in a JSON file until a re-queue pass fetches them.
+
+    Entries are keyed by URL and survive between runs, so pages a run could not
+    fetch are retried by the next one if its own re-queue pass fails too.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = {entry["url"]: entry for entry in json.load(f)}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, url, error, attempts, **details):
+        """Record a failed page; ``details`` (e.g. page=5, kind="fragment") are kept with it."""
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            entry = self.entries.get(url, {"url": url, "first_failed_at": now, "attempts": 0})
+            entry.update(details)
+            entry["attempts"] += attempts
+            entry["last_failed_at"] = now
+            entry["error"] = f"{type(error).__name__}: {error}".strip()
+            self.entries[url] = entry
+            self._save()
+
+    def remove(self, url):
+        with self._lock:
+            if self.entries.pop(url, None) is not None:
+                self._save()
+
+    def _save(self):
+        entries = list(self.entries.values())
+        atomic_write(self.path, lambda f: json.dump(entries, f, indent=4))
+
+
+def requeue(dead_letters, policy, fetch_fn):
+    """Re-queue pass: try every dead-lettered page again.
+
+    fetch_fn(entry) fetches one entry. Yields (entry, result) for each page that
+    now succeeds; it is taken off the list when the caller asks for the next
+    one, so a page whose save raised stays on it. Pages that still fail stay
+    on it with their attempts added up.
+    """
+    if not len(dead_letters):
+        return
+    print(f"\n--- Re-queue pass: {len(dead_letters)} dead-lettered pages ---")
+    for entry in list(dead_letters.entries.values()):
+        if entry["url"] not in dead_letters.entries:
+            continue  # fetched meanwhile, e.g. by a crawl resumed from an earlier entry
+        try:
+            result = policy.call(lambda url: fetch_fn(entry), entry["url"])
+        except RetryError as e:
+            print(f"❌ {e}")
+            dead_letters.add(entry["url"], e.error, e.attempts)
+            continue
+        yield entry, result
+        # The caller saved it (an exception in its loop body never gets back here)
+        dead_letters.remove(entry["url"])
+    if len(dead_letters):
+        print(f"⚠ {len(dead_letters)} pages left in {dead_letters.path} for the next run")
@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from jsonl_store import atomic_write
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+STAGES = ("driver_setup", "get", "wait", "extract", "file_save", "postgres")
+# Upper bounds (seconds) of the stage histograms, Prometheus style
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Folder of node_exporter's textfile collector; the run's output folder when unset
+TEXTFILE_DIR = os.environ.get("METRICS_TEXTFILE_DIR")
+REGRESSION_WARNING = 0.3   # warn when pages/minute fell by more than this vs. the previous run
+
+
+def _summary(values):
+    """count / sum / min / p50 / p95 / max of a list of observations."""
+    if not values:
+        return {"count": 0, "sum": 0}
+    ordered = sorted(values)
+
+    def quantile(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "count": len(ordered),
+        "sum": round(sum(ordered), 6),
+        "min": ordered[0],
+        "p50": quantile(0.5),
+        "p95": quantile(0.95),
+        "max": ordered[-1],
+    }
+
+
+class RunMetrics:
+    """Timings and counters of one scraper run, written out as JSON and a Prometheus textfile.
+
+    ``with metrics.stage("get"):`` times one stage of one page; every
+    observation lands in that stage's histogram. ``fetched()`` and
+    ``extracted()`` record each page's page_source size and tiles found, and
+    ``count()`` bumps counters such as "pages" (finished pages) or
+    "retries". Thread-safe, so one object can be shared by the fetch
+    threads of a run. With a run_profiler.RunProfiler in ``profiler`` the
+    stages are profiled as well.
+    """
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages = {stage: [] for stage in STAGES}
+        self.page_bytes = []
+        self.tiles = []
+        self.counters = {"pages": 0, "records": 0, "retries": 0, "fallbacks": 0, "failed_pages": 0}
+        self.profiler = None
+
+    @contextmanager
+    def stage(self, name):
+        profiling = self.profiler.stage(name) if self.profiler is not None else nullcontext()
+        start = time.perf_counter()
+        try:
+            with profiling:
+                yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            self.stages.setdefault(name, []).append(round(seconds, 6))
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def fetched(self, page_bytes):
+        """Size of a fetched page's HTML (page_source)."""
+        with self._lock:
+            self.page_bytes.append(page_bytes)
+
+    def extracted(self, tiles):
+        """Number of product tiles found on a page."""
+        with self._lock:
+            self.tiles.append(tiles)
+
+    # -- reports --
+
+    def report(self):
+        with self._lock:
+            duration = time.perf_counter() - self._start
+            stages = {}
+            for name, values in self.stages.items():
+                stages[name] = _summary(values)
+                stages[name]["buckets"] = {str(le): sum(1 for v in values if v <= le) for le in BUCKETS}
+            return {
+                "scraper": self.scraper,
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+                "duration_seconds": round(duration, 3),
+                "profiled": self.profiler.mode if self.profiler is not None else None,
+                "pages_per_minute": round(self.counters["pages"] / duration * 60, 2) if duration else 0.0,
+                "counters": dict(self.counters),
+                "stages": stages,
+                "page_source_bytes": _summary(self.page_bytes),
+                "tiles_per_page": _summary(self.tiles),
+            }
+
+    def prometheus(self, report):
+        """The report in the Prometheus text exposition format."""
+        label = f'scraper="{self.scraper}"'
+        lines = [
+            "# HELP scraper_stage_seconds Time spent per page in each scraper stage (last run).",
+            "# TYPE scraper_stage_seconds histogram",
+        ]
+        for name, stats in report["stages"].items():
+            if not stats["count"]:
+                continue
+            for le, count in stats["buckets"].items():
+                lines.append(f'scraper_stage_seconds_bucket{{{label},stage="{name}",le="{le}"}} {count}')
+            lines.append(f'scraper_stage_seconds_bucket{{{label},stage="{name}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'scraper_stage_seconds_sum{{{label},stage="{name}"}} {stats["sum"]}')
+            lines.append(f'scraper_stage_seconds_count{{{label},stage="{name}"}} {stats["count"]}')
+        # Everything describes the last run, so counts are gauges (they restart each run)
+        gauges = {f"run_{name}": value for name, value in report["counters"].items()}
+        gauges.update({
+            "page_source_bytes": report["page_source_bytes"]["sum"],
+            "tiles": report["tiles_per_page"]["sum"],
+            "pages_per_minute": report["pages_per_minute"],
+            "run_duration_seconds": report["duration_seconds"],
+            "last_run_timestamp_seconds": int(time.time()),
+        })
+        for name, value in gauges.items():
+            lines.append(f"# TYPE scraper_{name} gauge")
+            lines.append(f"scraper_{name}{{{label}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, folder):
+        """Write <scraper>_run_report.json and <scraper>.prom (and the profile); warns when pages/minute regressed."""
+        report = self.report()
+        json_path = os.path.join(folder, f"{self.scraper}_run_report.json")
+        previous = None
+        if os.path.exists(json_path):
+            with open(json_path, encoding="utf-8") as f:
+                previous = json.load(f)
+        atomic_write(json_path, lambda f: json.dump(report, f, indent=4))
+        # The textfile collector may read at any moment, hence the atomic rename
+        prom_folder = TEXTFILE_DIR or folder
+        os.makedirs(prom_folder, exist_ok=True)
+        prom_path = os.path.join(prom_folder, f"{self.scraper}.prom")
+        atomic_write(prom_path, lambda f: f.write(self.prometheus(report)))
+
+        slowest = max(report["stages"].items(), key=lambda item: item[1]["sum"])
+        print(f"✅ Run report saved to {json_path} and {prom_path} ({report['counters']['pages']} pages, "
+              f"{report['pages_per_minute']} pages/min, most time in {slowest[0]}: {slowest[1]['sum']:.1f}s)")
+        if self.profiler is not None:
+            self.profiler.save(folder)
+        # Profiled runs are slower by design, so they are not compared
+        comparable = previous and not previous.get("profiled") and not report["profiled"]
+        if comparable and previous.get("pages_per_minute") and report["counters"]["pages"]:
+            drop = 1 - report["pages_per_minute"] / previous["pages_per_minute"]
+            if drop > REGRESSION_WARNING:
+                print(f"⚠ Pages per minute fell {drop:.0%} since the last run "
+                      f"({previous['pages_per_minute']} -> {report['pages_per_minute']})")
+        return report
@@ -0,0 +1,195 @@
+import io
+import os
+import sys
+import random
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+MODES = ("full", "sample")
+SAMPLE_RATE = 0.1     # share of runs profiled in sample mode
+SAMPLE_EVERY = 10     # sample mode profiles every Nth occurrence of each stage
+TOP_N = 15            # allocation sites and functions listed per stage
+PROFILE_SUBDIR = "profile"
+# Allocations of the profiler itself are left out of the reports
+IGNORED_FILES = (tracemalloc.__file__, pstats.__file__, cProfile.__file__, __file__)
+
+
+def _short(filename):
+    """Path relative to the sys.path entry it was imported from."""
+    for prefix in sorted((p for p in sys.path if p), key=len, reverse=True):
+        if filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
+
+
+def _megabytes(size):
+    return f"{size / 1024 / 1024:.2f} MB"
+
+
+class RunProfiler:
+    """cProfile and tracemalloc per run_metrics stage (driver setup, get, wait, extract, ...).
+
+    Attach it to a RunMetrics (``metrics.profiler = profiler``) and every
+    ``metrics.stage(name)`` block is profiled in the thread doing the work;
+    the cProfile stats are merged per stage. Only one cProfile runs at a time
+    (Python 3.12+ refuses a second one), so a stage that starts while another
+    thread's stage is under cProfile, as happens with concurrent fetches, gets
+    the tracemalloc figures only. While a profiled stage runs tracemalloc is
+    on, and the lines that allocated the most memory still held at the end of
+    the stage are added up per stage, together with the peak. Stages running
+    at the same time in other threads share the tracemalloc figures, so those
+    are approximate in concurrent runs. Parsing in --parse-workers processes
+    is not covered.
+
+    Mode "full" profiles every stage; "sample" only every SAMPLE_EVERY-th
+    occurrence of each stage, so most pages run at full speed.
+    """
+
+    def __init__(self, scraper, mode="full", top_n=TOP_N):
+        if mode not in MODES:
+            raise ValueError(f"profile mode must be one of {MODES}, got {mode!r}")
+        self.scraper = scraper
+        self.mode = mode
+        self.top_n = top_n
+        self.every = 1 if mode == "full" else SAMPLE_EVERY
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._seen = {}         # stage -> occurrences
+        self._profiled = {}     # stage -> occurrences profiled
+        self._cprofiled = {}    # stage -> occurrences of those also run under cProfile
+        self._stats = {}        # stage -> merged pstats.Stats
+        self._allocated = {}    # stage -> {"file:line": bytes still held at the end of the stage}
+        self._peaks = {}        # stage -> highest traced memory seen while it ran
+        self._running = 0       # profiled stages in progress (tracemalloc is on while > 0)
+        self._owns_tracing = False
+        self._cprofile_busy = False  # a stage is under cProfile (one at a time)
+
+    @contextmanager
+    def stage(self, name):
+        with self._lock:
+            self._seen[name] = self._seen.get(name, 0) + 1
+            sampled = (self._seen[name] - 1) % self.every == 0
+        # One profiled stage per thread at a time; a nested stage counts towards the outer one
+        if not sampled or getattr(self._local, "active", False):
+            yield
+            return
+
+        self._local.active = True
+        before = self._start_tracing()
+        profile = self._start_cprofile()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                with self._lock:
+                    self._cprofile_busy = False
+            self._local.active = False
+            self._finish(name, profile, before)
+
+    def _start_cprofile(self):
+        """An enabled cProfile.Profile, or None while another stage (or tool) is profiling."""
+        with self._lock:
+            if self._cprofile_busy:
+                return None
+            self._cprofile_busy = True
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # "Another profiling tool is already active" (Python 3.12+)
+            with self._lock:
+                self._cprofile_busy = False
+            return None
+        return profile
+
+    def _start_tracing(self):
+        with self._lock:
+            if self._running == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracing = True
+            self._running += 1
+            tracemalloc.reset_peak()
+            return tracemalloc.take_snapshot()
+
+    def _finish(self, name, profile, before):
+        with self._lock:
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            self._running -= 1
+            if self._running == 0 and self._owns_tracing:
+                tracemalloc.stop()
+                self._owns_tracing = False
+
+        ignored = [tracemalloc.Filter(False, filename) for filename in IGNORED_FILES]
+        growth = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), "lineno")
+        with self._lock:
+            allocated = self._allocated.setdefault(name, {})
+            for stat in growth:
+                if stat.size_diff > 0:
+                    frame = stat.traceback[0]
+                    site = f"{_short(frame.filename)}:{frame.lineno}"
+                    allocated[site] = allocated.get(site, 0) + stat.size_diff
+            self._peaks[name] = max(self._peaks.get(name, 0), peak)
+            self._profiled[name] = self._profiled.get(name, 0) + 1
+            if profile is None:
+                return
+            self._cprofiled[name] = self._cprofiled.get(name, 0) + 1
+            if name in self._stats:
+                self._stats[name].add(profile)
+            else:
+                self._stats[name] = pstats.Stats(profile)
+
+    # -- reports --
+
+    def report(self):
+        """Text report: per stage, the top allocation sites and the functions with the most own time."""
+        with self._lock:
+            lines = [f"{self.scraper} profile ({self.mode} mode, {datetime.now().isoformat(timespec='seconds')})"]
+            for name, profiled in self._profiled.items():
+                lines.append("")
+                lines.append(f"== {name}: {profiled} of {self._seen[name]} profiled "
+                             f"({self._cprofiled.get(name, 0)} under cProfile), "
+                             f"peak traced memory {_megabytes(self._peaks[name])} ==")
+                lines.append(f"Top {self.top_n} allocation sites (memory still held at the end of the stage):")
+                allocated = sorted(self._allocated[name].items(), key=lambda item: item[1], reverse=True)
+                for site, size in allocated[:self.top_n]:
+                    lines.append(f"  {_megabytes(size):>10}  {site}")
+                stats = self._stats.get(name)
+                if stats is None:
+                    continue
+                stream = io.StringIO()
+                stats.stream = stream
+                stats.sort_stats("tottime").print_stats(self.top_n)
+                lines.append(f"Top {self.top_n} functions by own time:")
+                lines.extend("  " + line for line in stream.getvalue().strip().splitlines()[2:])
+            return "\n".join(lines) + "\n"
+
+    def save(self, folder):
+        """Write <scraper>_<run>_<stage>.pstats per stage and a <scraper>_<run>_profile.txt report."""
+        folder = os.path.join(folder, PROFILE_SUBDIR)
+        os.makedirs(folder, exist_ok=True)
+        prefix = os.path.join(folder, f"{self.scraper}_{datetime.now().strftime('%Y%m%dT%H%M%S')}")
+        with self._lock:
+            for name, stats in self._stats.items():
+                stats.dump_stats(f"{prefix}_{name}.pstats")
+        with open(f"{prefix}_profile.txt", "w", encoding="utf-8") as f:
+            f.write(self.report())
+        print(f"✅ Profile saved to {prefix}_profile.txt ({len(self._stats)} stages, "
+              f"open a stage with: python -m pstats {prefix}_<stage>.pstats)")
+
+
+def create_profiler(scraper, mode, rate=SAMPLE_RATE):
+    """RunProfiler for this run, or None (profiling off, or a sample-mode run that was not picked)."""
+    if not mode:
+        return None
+    if mode == "sample" and random.random() >= rate:
+        return None
+    return RunProfiler(scraper, mode)
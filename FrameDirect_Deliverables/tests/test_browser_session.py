@@ -0,0 +1,60 @@
+import json
+import os
+
+import browser_session
+from browser_session import BrowserSession
+from selenium.webdriver.chrome.options import Options
+
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/131.0.6778.265 Safari/537.36"
+
+
+def chrome_options():
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument(f"user-agent={USER_AGENT}")
+    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    return options
+
+
+class FakeProcess:
+    pid = 4242
+
+    def __init__(self, command, **kwargs):
+        self.command = command
+
+    def poll(self):
+        return None
+
+
+def launch(tmp_path, monkeypatch):
+    """Launch a warm session without Chrome; returns the command line it would run."""
+    launched = []
+    monkeypatch.setattr(browser_session, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(browser_session, "find_chrome", lambda: "chrome")
+    monkeypatch.setattr(browser_session, "_debugger_alive", lambda port: True)
+    monkeypatch.setattr(browser_session.subprocess, "Popen",
+                        lambda command, **kwargs: launched.append(command) or FakeProcess(command))
+    BrowserSession("framesdirect", chrome_options)._launch()
+    return launched[0]
+
+
+def test_launch_passes_every_argument_as_a_switch(tmp_path, monkeypatch):
+    command = launch(tmp_path, monkeypatch)
+    assert "--headless" in command
+    assert f"--user-agent={USER_AGENT}" in command
+    assert command[-1] == "about:blank"
+
+
+def test_launch_writes_prefs_into_the_profile(tmp_path, monkeypatch):
+    preferences_path = os.path.join(tmp_path, "profiles", "framesdirect-0", "Default", "Preferences")
+    os.makedirs(os.path.dirname(preferences_path))
+    with open(preferences_path, "w", encoding="utf-8") as f:
+        json.dump({"profile": {"exit_type": "Normal"}}, f)
+
+    launch(tmp_path, monkeypatch)
+
+    with open(preferences_path, encoding="utf-8") as f:
+        assert json.load(f) == {
+            "profile": {"exit_type": "Normal", "managed_default_content_settings": {"images": 2}}
+        }
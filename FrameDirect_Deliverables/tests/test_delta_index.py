@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from delta_index import DeltaIndex, CHANGE_FIELD
+
+
+def record(brand, name, current, former=200.0, discount=25):
+    return {"Brand": brand, "Product_Name": name, "Former_Price": former,
+            "Current_Price": current, "Discount": discount}
+
+
+# The colours of a frame are listed as separate records, often at the same price
+CLUBMASTER = record("Ray-Ban", "RB5154 Clubmaster", 150.0)
+HSTN = record("Oakley", "HSTN", 120.0)
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / "delta_index.sqlite")
+
+
+def run(index_path, pages, crawl_complete=True):
+    """One run saving page by page, as the scrapers do; returns (delta, counts)."""
+    index = DeltaIndex(index_path, retailer="framesdirect")
+    delta = []
+    for page in pages:
+        delta += index.changes(page)
+        index.commit()
+    if crawl_complete:
+        delta += index.disappeared()
+        index.commit()
+    counts = index.counts
+    index.close()
+    return [(row["Current_Price"], row[CHANGE_FIELD]) for row in delta], counts
+
+
+def stored(index_path, brand, name):
+    index = DeltaIndex(index_path, retailer="framesdirect")
+    state = index.conn.execute("SELECT state FROM last_seen WHERE brand = ? AND product_name = ?",
+                               (brand, name)).fetchone()[0]
+    index.close()
+    return sorted(variant["Current_Price"] for variant in json.loads(state))
+
+
+def test_repeated_variant_is_unchanged_next_run(index_path):
+    assert run(index_path, [[CLUBMASTER, dict(CLUBMASTER), HSTN]])[0] == [(150.0, "new")] * 2 + [(120.0, "new")]
+
+    delta, counts = run(index_path, [[CLUBMASTER], [dict(CLUBMASTER), HSTN]])
+    assert delta == []
+    assert counts["unchanged"] == 3
+
+
+def test_repeated_variant_changed_in_a_partial_run(index_path):
+    run(index_path, [[CLUBMASTER], [dict(CLUBMASTER), HSTN]])
+
+    # One colour goes on sale; the crawl stops after page 1
+    on_sale = record("Ray-Ban", "RB5154 Clubmaster", 140.0)
+    assert run(index_path, [[on_sale]], crawl_complete=False)[0] == [(140.0, "changed")]
+    assert stored(index_path, "Ray-Ban", "RB5154 Clubmaster") == [140.0, 150.0]
+
+    # The other colour is still listed: nothing changed or disappeared
+    delta, counts = run(index_path, [[on_sale], [dict(CLUBMASTER), HSTN]])
+    assert delta == []
+    assert counts["unchanged"] == 3
+    assert stored(index_path, "Ray-Ban", "RB5154 Clubmaster") == [140.0, 150.0]
+
+
+def test_variant_seen_after_a_changed_one_is_kept(index_path):
+    other_colour = record("Ray-Ban", "RB5154 Clubmaster", 170.0)
+    run(index_path, [[CLUBMASTER, other_colour]])
+
+    # The 170 colour is re-priced to 160 on page 1; the 150 one comes on page 2
+    repriced = record("Ray-Ban", "RB5154 Clubmaster", 160.0)
+    delta, _ = run(index_path, [[repriced], [dict(CLUBMASTER)]], crawl_complete=False)
+    assert delta == [(160.0, "changed")]
+    assert stored(index_path, "Ray-Ban", "RB5154 Clubmaster") == [150.0, 160.0]
@@ -0,0 +1,220 @@
+import re
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from postgres_loader import SqliteLoader, MIGRATIONS, ADDED_COLUMNS, ensure_schema, migrate
+from price_history import PriceHistory
+
+
+RUN_AT = datetime(2026, 7, 15, 9, 30)
+
+
+def record(brand, name, current, former=200.0, discount=10, change_type=None):
+    return {"Brand": brand, "Product_Name": name, "Former_Price": former,
+            "Current_Price": current, "Discount": discount, "Change_Type": change_type}
+
+
+RECORDS = [
+    record("Ray-Ban", "RB5154 Clubmaster", 150.0),
+    record("Oakley", "HSTN", 120.0),
+    record(None, None, 99.0),
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "eyewear.sqlite")
+
+
+def rows(path, sql):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(sql).fetchall()
+
+
+def create_old_history(path, history):
+    """A database from before the migrations: the loader's table, with history rows."""
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE eyewear_products ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, retailer TEXT DEFAULT 'framesdirect', "
+            "brand TEXT, product_name TEXT, former_price NUMERIC, current_price NUMERIC, "
+            "discount INTEGER, scraped_at TIMESTAMP, scraped_date DATE, change_type TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO eyewear_products (retailer, brand, product_name, current_price, scraped_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            history,
+        )
+
+
+# -----------------------------
+# MIGRATIONS
+# -----------------------------
+
+def test_new_database_gets_every_migration(db_path):
+    SqliteLoader(db_path).close()
+
+    assert rows(db_path, "SELECT version FROM schema_migrations ORDER BY version") == [
+        (version,) for version, _, _ in MIGRATIONS
+    ]
+    assert [version for version, _, _ in MIGRATIONS] == [1, 2, 3]
+
+
+def test_migrations_are_applied_once(db_path):
+    SqliteLoader(db_path).close()
+    with sqlite3.connect(db_path) as conn:
+        assert migrate(conn.cursor(), "sqlite") == []
+    assert rows(db_path, "SELECT COUNT(*) FROM schema_migrations") == [(3,)]
+
+
+def test_migration_1_adds_history_index(db_path):
+    SqliteLoader(db_path).close()
+
+    columns = rows(db_path, "PRAGMA index_info(eyewear_products_history)")
+    assert [column[2] for column in columns] == ["retailer", "brand", "product_name", "scraped_at"]
+
+
+def test_migration_2_backfills_latest_prices(db_path):
+    create_old_history(db_path, [
+        ("framesdirect", "Oakley", "HSTN", 130, "2026-07-14 09:00:00"),
+        ("framesdirect", "Oakley", "HSTN", 120, "2026-07-15 09:00:00"),
+        (None, None, None, 99, "2026-07-15 09:00:00"),
+        ("framesdirect", "Oakley", "Holbrook", 80, None),   # never stamped: left out
+    ])
+
+    SqliteLoader(db_path).close()
+
+    assert rows(db_path, "SELECT retailer, brand, product_name, current_price, scraped_at "
+                         "FROM eyewear_latest_prices ORDER BY brand, product_name") == [
+        ("framesdirect", "", "", 99, "2026-07-15 09:00:00"),
+        ("framesdirect", "Oakley", "HSTN", 120, "2026-07-15 09:00:00"),
+    ]
+
+
+def test_migration_3_triggers_keep_latest_prices_current(db_path):
+    loader = SqliteLoader(db_path, upsert=True)
+    loader.load_rows(RECORDS, RUN_AT)
+    loader.load_rows([record("Oakley", "HSTN", 110.0)], RUN_AT.replace(day=16))
+    # An older run loaded late must not overwrite a newer price
+    loader.load_rows([record("Oakley", "HSTN", 140.0)], RUN_AT.replace(day=10))
+    # The update trigger follows upserts
+    loader.load_rows([record("Ray-Ban", "RB5154 Clubmaster", 145.0)], RUN_AT.replace(hour=20))
+    loader.close()
+
+    assert rows(db_path, "SELECT brand, product_name, current_price, scraped_at FROM eyewear_latest_prices "
+                         "ORDER BY brand, product_name") == [
+        ("", "", 99, "2026-07-15 09:30:00"),
+        ("Oakley", "HSTN", 110, "2026-07-16 09:30:00"),
+        ("Ray-Ban", "RB5154 Clubmaster", 145, "2026-07-15 20:30:00"),
+    ]
+
+
+class RecordingCursor:
+    """Stands in for a psycopg2 cursor on a database without migrations; keeps the SQL it was given."""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+
+    def fetchall(self):
+        return []
+
+
+def test_postgres_schema_adds_columns_before_migrating():
+    cur = RecordingCursor()
+    assert ensure_schema(cur, "postgres", upsert=True) == [1, 2, 3]
+
+    added = [f"ALTER TABLE framesdirect.eyewear_products ADD COLUMN IF NOT EXISTS {column} {definition}"
+             for column, definition in ADDED_COLUMNS]
+    assert cur.statements[:len(added)] == added
+    assert "eyewear_products_natural_key" in cur.statements[len(added)]
+    for statement in cur.statements:
+        assert "{" not in statement                 # every table name was filled in
+        assert not re.search(r"\bid\b", statement)  # the PostgreSQL table has no id column
+
+
+def test_price_history_upgrades_an_old_database(db_path):
+    # The table as first created, before the loaders added retailer, scraped_date and change_type
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE eyewear_products (id INTEGER PRIMARY KEY AUTOINCREMENT, brand TEXT, "
+                     "product_name TEXT, former_price NUMERIC, current_price NUMERIC, discount INTEGER, "
+                     "scraped_at TIMESTAMP)")
+        conn.execute("INSERT INTO eyewear_products (brand, product_name, current_price, scraped_at) "
+                     "VALUES ('Oakley', 'HSTN', 120, '2026-07-15 09:00:00')")
+
+    history = PriceHistory(sqlite_path=db_path)
+    try:
+        assert [(row["retailer"], row["price"]) for row in history.latest_price("Oakley", "HSTN")] == [
+            ("framesdirect", 120)
+        ]
+    finally:
+        history.close()
+
+
+# -----------------------------
+# PRICE HISTORY
+# -----------------------------
+
+@pytest.fixture
+def history(db_path):
+    loader = SqliteLoader(db_path)
+    loader.load_rows(RECORDS, RUN_AT)
+    loader.load_rows([record("Oakley", "HSTN", 110.0), record("Ray-Ban", "RB5154 Clubmaster", 200.0)],
+                     RUN_AT.replace(day=16))
+    loader.load_rows([record("Oakley", "HSTN", 105.0)], RUN_AT.replace(day=16, hour=18))
+    loader.close()
+    glasses = SqliteLoader(db_path, retailer="glasses")
+    glasses.load_rows([record("Oakley", "HSTN", 115.0)], RUN_AT.replace(day=16))
+    glasses.close()
+    history = PriceHistory(sqlite_path=db_path)
+    yield history
+    history.close()
+
+
+def test_latest_price_per_retailer(history):
+    latest = history.latest_price("Oakley", "HSTN")
+    assert [(row["retailer"], row["price"]) for row in latest] == [("framesdirect", 105), ("glasses", 115)]
+    assert [row["price"] for row in history.latest_price("Oakley", "HSTN", retailer="glasses")] == [115]
+
+
+def test_latest_prices_filters(history):
+    assert [(row["brand"], row["price"]) for row in history.latest_prices(retailer="framesdirect")] == [
+        ("", 99), ("Oakley", 105), ("Ray-Ban", 200),
+    ]
+    # 200 is the list price, so Ray-Ban is not on sale any more
+    assert [row["brand"] for row in history.latest_prices(retailer="framesdirect", on_sale=True)] == ["", "Oakley"]
+    assert len(history.latest_prices(limit=2)) == 2
+
+
+def test_latest_prices_leave_out_disappeared_products(db_path, history):
+    loader = SqliteLoader(db_path)
+    loader.load_rows([record("Ray-Ban", "RB5154 Clubmaster", 200.0, change_type="disappeared")],
+                     RUN_AT.replace(day=17))
+    loader.close()
+
+    assert [row["brand"] for row in history.latest_prices(retailer="framesdirect")] == ["", "Oakley"]
+
+
+def test_price_trend_per_day(history):
+    trend = history.price_trend("Oakley", "HSTN", since="2026-07-16", until="2026-07-16")
+    assert [(row["retailer"], row["day"], row["min_price"], row["max_price"], row["observations"])
+            for row in trend] == [
+        ("framesdirect", "2026-07-16", 105, 110, 2),
+        ("glasses", "2026-07-16", 115, 115, 1),
+    ]
+    assert [row["day"] for row in history.price_trend("Oakley", "HSTN", retailer="framesdirect")] == [
+        "2026-07-15", "2026-07-16",
+    ]
+    assert history.price_trend("Oakley", "No Such Frame") == []
+
+
+def test_rebuild_latest(db_path, history):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE eyewear_latest_prices SET current_price = 1")
+    history.rebuild_latest()
+
+    assert [row["price"] for row in history.latest_price("Oakley", "HSTN", retailer="framesdirect")] == [105]
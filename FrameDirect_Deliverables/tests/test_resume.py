@@ -0,0 +1,98 @@
+import csv
+import importlib
+import json
+import sqlite3
+from collections import Counter
+
+import pytest
+import requests
+
+from mock_retailer_server import start_server
+from retry_policy import RetryPolicy
+
+
+NUM_PRODUCTS = 120  # 5 FramesDirect pages
+
+
+@pytest.fixture
+def server():
+    srv = start_server(port=0, num_products=NUM_PRODUCTS)
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def model(tmp_path, monkeypatch, server):
+    """The FramesDirect scraper pointed at the mock server, writing to tmp_path."""
+    monkeypatch.setenv("FRAMESDIRECT_OUTPUT_FOLDER", str(tmp_path))
+    m = importlib.import_module("framesdirect_webscrapping_model")
+    settings = {
+        "BASE_URL": server.base_url,
+        "CHECKPOINT_FILE": str(tmp_path / "checkpoint.json"),
+        "CSV_PATH": str(tmp_path / "framesdirect.csv"),
+        "JSONL_PATH": str(tmp_path / "framesdirect.jsonl"),
+        "FETCH_LOG_PATH": str(tmp_path / "fetch_log.json"),
+        "DEAD_LETTER_PATH": str(tmp_path / "dead_letters.json"),
+        "METRICS_DIR": str(tmp_path),
+        "DB_SQLITE_PATH": str(tmp_path / "eyewear.sqlite"),
+        "PARQUET_DIR": None,
+        "PAGE_CACHE_DIR": None,
+        # One attempt per page, no backoff
+        "RetryPolicy": lambda **options: RetryPolicy(max_attempts=1, base_delay=0, **options),
+    }
+    for name, value in settings.items():
+        monkeypatch.setattr(m, name, value)
+    return m
+
+
+def failing_page(model, monkeypatch, failing):
+    """Make every fetch of page ``failing`` drop its connection."""
+    create_fetcher = model.create_fetcher
+
+    def create_failing_fetcher(*args, **kwargs):
+        fetcher = create_fetcher(*args, **kwargs)
+        fetch = fetcher.fetch
+
+        def fetch_or_fail(url):
+            if model.page_number(url) == failing:
+                raise requests.ConnectionError("connection reset")
+            return fetch(url)
+
+        fetcher.fetch = fetch_or_fail
+        return fetcher
+
+    monkeypatch.setattr(model, "create_fetcher", create_failing_fetcher)
+
+
+def scrape(model):
+    model.scrape_framesdirect(use_browser=False, rate=1000, max_pages=10)
+
+
+def test_resume_after_dead_letter_writes_every_page_once(model, monkeypatch, server):
+    with monkeypatch.context() as patch:
+        failing_page(model, patch, failing=2)
+        scrape(model)
+    with open(model.CHECKPOINT_FILE, encoding="utf-8") as f:
+        assert json.load(f) == {"last_page": 1, "completed_pages": [1, 3, 4, 5], "end_page": 5}
+    with open(model.DEAD_LETTER_PATH, encoding="utf-8") as f:
+        assert [entry["page"] for entry in json.load(f)] == [2]
+
+    requests_before = len(server.request_log)
+    scrape(model)
+
+    # Only the dead-lettered page is fetched again
+    resumed = [entry["path"] for entry in server.request_log[requests_before:]]
+    assert resumed == ["/eyeglasses/?p=2&type=pagestate"]
+    with open(model.DEAD_LETTER_PATH, encoding="utf-8") as f:
+        assert json.load(f) == []
+
+    with open(model.CSV_PATH, newline="", encoding="utf-8") as f:
+        csv_names = Counter(row["Product_Name"] for row in csv.DictReader(f))
+    with open(model.JSONL_PATH, encoding="utf-8") as f:
+        jsonl_names = Counter(json.loads(line)["Product_Name"] for line in f)
+    with sqlite3.connect(model.DB_SQLITE_PATH) as conn:
+        db_names = Counter(name for (name,) in conn.execute("SELECT product_name FROM eyewear_products"))
+    for names in (csv_names, jsonl_names, db_names):
+        assert len(names) == NUM_PRODUCTS
+        assert set(names.values()) == {1}
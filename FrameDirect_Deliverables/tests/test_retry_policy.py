@@ -0,0 +1,38 @@
+import json
+
+import pytest
+import requests
+
+from retry_policy import RetryPolicy, DeadLetterList, requeue
+
+
+URLS = ["https://example.com/?p=2", "https://example.com/?p=5"]
+
+
+@pytest.fixture
+def dead_letters(tmp_path):
+    dead_letters = DeadLetterList(str(tmp_path / "dead_letters.json"))
+    for url in URLS:
+        dead_letters.add(url, requests.ConnectionError("connection reset"), 4)
+    return dead_letters
+
+
+def listed(dead_letters):
+    with open(dead_letters.path, encoding="utf-8") as f:
+        return [entry["url"] for entry in json.load(f)]
+
+
+def test_requeue_takes_saved_pages_off_the_list(dead_letters):
+    saved = []
+    for entry, html in requeue(dead_letters, RetryPolicy(), lambda entry: f"<html>{entry['url']}</html>"):
+        assert entry["url"] in listed(dead_letters)  # not before the caller saved it
+        saved.append(entry["url"])
+    assert saved == URLS
+    assert listed(dead_letters) == []
+
+
+def test_requeue_keeps_a_page_whose_save_failed(dead_letters):
+    with pytest.raises(OSError):
+        for entry, html in requeue(dead_letters, RetryPolicy(), lambda entry: "<html></html>"):
+            raise OSError("disk full")
+    assert listed(dead_letters) == URLS
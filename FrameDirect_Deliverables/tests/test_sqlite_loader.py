@@ -0,0 +1,102 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from postgres_loader import SqliteLoader
+
+
+RUN_AT = datetime(2026, 7, 15, 9, 30)
+
+
+def record(brand, name, current, former=200.0, discount=10):
+    return {"Brand": brand, "Product_Name": name, "Former_Price": former,
+            "Current_Price": current, "Discount": discount}
+
+
+RECORDS = [
+    record("Ray-Ban", "RB5154 Clubmaster", 150.0),
+    record("Oakley", "HSTN", 120.0),
+    record(None, None, 99.0),   # tiles without brand/name still load
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "eyewear.sqlite")
+
+
+def rows(path, sql):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(sql).fetchall()
+
+
+# -----------------------------
+# load_rows
+# -----------------------------
+
+def test_load_rows_inserts_every_record(db_path):
+    loader = SqliteLoader(db_path)
+    assert loader.load_rows(RECORDS, RUN_AT) == 3
+    loader.close()
+
+    assert rows(db_path, "SELECT retailer, brand, product_name, former_price, current_price, discount, "
+                         "scraped_at, scraped_date FROM eyewear_products ORDER BY id") == [
+        ("framesdirect", "Ray-Ban", "RB5154 Clubmaster", 200, 150, 10, "2026-07-15 09:30:00", "2026-07-15"),
+        ("framesdirect", "Oakley", "HSTN", 200, 120, 10, "2026-07-15 09:30:00", "2026-07-15"),
+        ("framesdirect", None, None, 200, 99, 10, "2026-07-15 09:30:00", "2026-07-15"),
+    ]
+
+
+def test_load_rows_keeps_retailer(db_path):
+    loader = SqliteLoader(db_path, retailer="glasses")
+    loader.load_rows(RECORDS[:1], RUN_AT)
+    loader.close()
+
+    assert rows(db_path, "SELECT retailer FROM eyewear_products") == [("glasses",)]
+
+
+def test_load_rows_without_records_writes_nothing(db_path):
+    loader = SqliteLoader(db_path)
+    assert loader.load_rows([], RUN_AT) == 0
+    loader.close()
+
+    assert rows(db_path, "SELECT COUNT(*) FROM eyewear_products") == [(0,)]
+
+
+def test_reload_without_upsert_appends_history(db_path):
+    loader = SqliteLoader(db_path)
+    loader.load_rows(RECORDS, RUN_AT)
+    loader.load_rows(RECORDS, RUN_AT)
+    loader.close()
+
+    assert rows(db_path, "SELECT COUNT(*) FROM eyewear_products") == [(6,)]
+
+
+# -----------------------------
+# Upsert on NATURAL_KEY
+# -----------------------------
+
+def test_upsert_reload_updates_prices_without_duplicates(db_path):
+    loader = SqliteLoader(db_path, upsert=True)
+    loader.load_rows(RECORDS, RUN_AT)
+    updated = [record("Ray-Ban", "RB5154 Clubmaster", 135.0, discount=33), *RECORDS[1:]]
+    loader.load_rows(updated, RUN_AT.replace(hour=18))
+    loader.close()
+
+    assert rows(db_path, "SELECT COUNT(*) FROM eyewear_products") == [(3,)]
+    assert rows(db_path, "SELECT current_price, discount, scraped_at FROM eyewear_products "
+                         "WHERE brand = 'Ray-Ban'") == [(135, 33, "2026-07-15 18:30:00")]
+    # NULL brand/name are folded to '' in the key, so that row is not duplicated either
+    assert rows(db_path, "SELECT COUNT(*) FROM eyewear_products WHERE brand IS NULL") == [(1,)]
+
+
+def test_upsert_keeps_one_row_per_day(db_path):
+    loader = SqliteLoader(db_path, upsert=True)
+    loader.load_rows(RECORDS, RUN_AT)
+    loader.load_rows(RECORDS, RUN_AT.replace(day=16))
+    loader.close()
+
+    assert rows(db_path, "SELECT scraped_date, COUNT(*) FROM eyewear_products GROUP BY scraped_date") == [
+        ("2026-07-15", 3), ("2026-07-16", 3),
+    ]
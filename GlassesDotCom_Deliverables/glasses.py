@@ -1,15 +1,18 @@
 # Libraries Used
+import os
+import sys
 import csv
 import json
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 
+# Shared scraping modules live next to the FramesDirect scraper
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "FrameDirect_Deliverables"))
+from fetch_engine import PageFetcher
+from load_profile import GLASSES_LOAD, apply_load_profile, enable_resource_blocking
+from browser_session import chrome_service
+
 
 
 # ------------------------------
@@ -24,35 +27,46 @@ chrome_option.add_argument('--disable-gpu')
 chrome_option.add_argument(
     "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.265 Safari/537.36"
 )
+# Skip images, fonts and trackers; they are not needed to read the tiles
+apply_load_profile(chrome_option, GLASSES_LOAD)
 print("done setting up..")
 
-# Install the chrome driver (This is a one time thing)
-print("Installing Chrome WD")
-service = Service(ChromeDriverManager().install())
-print("Final Setup")
-driver = webdriver.Chrome(service=service, options=chrome_option)
+
+def start_chrome():
+    # The chrome driver path is resolved once and cached (browser_session.py)
+    print("Final Setup")
+    driver = webdriver.Chrome(service=chrome_service(), options=chrome_option)
+    enable_resource_blocking(driver, GLASSES_LOAD)
+    return driver
+
+
+# Chrome is only started if the plain HTTP response has no product tiles
+fetcher = PageFetcher(
+    driver_factory=start_chrome,
+    ready_markers=("product-tile",),
+    wait_class="catalog-page",
+    wait_timeout=GLASSES_LOAD['timeout'],
+    load_profile=GLASSES_LOAD,
+)
 print("Done")
 
 # Make connection and get URL content
 url = "https://www.glasses.com/gl-us/eyeglasses"
 print(f"Visting {url} page")
-driver.get(url)
 
 # Further instruction: wait for JS to load the files
+content = ""
 try:
     print("Waiting for product tiles to load")
-    WebDriverWait(driver, 15).until(
-        EC.presence_of_element_located((By.CLASS_NAME, 'catalog-page'))
-    )
+    content = fetcher.fetch(url)
     print("Done...Proceed to parse the data")
 except (TimeoutError, Exception) as e:
     print(f"Error waiting for {url}: {e}")
-    driver.quit()
+    fetcher.close()
     print("Closed")
 
 # Step 2 - Data Parsing and Extraction
-# Get page source and parse using BeautifulSoup
-content = driver.page_source
+# Parse the page source using BeautifulSoup
 page = BeautifulSoup(content, 'html.parser')
 
 # Temporary storage for the extracted data
@@ -87,7 +101,7 @@ for tile in product_tiles:
         brand = name = former_price = current_price = None 
         # Automatically applies missing value, if the product info is not available.
     
-    discount_tag = tile.find('div', class_='product-badge discount-badge thirty')
+    discount_tag = tile.find('div', class_='discount-badge')
     discount = discount_tag.text if discount_tag else None
 
     # Assignment: Add the category
@@ -117,6 +131,6 @@ with open("glassesdotcom.json", mode='w') as json_file:
 print(f"Saved {len(glasses_data)} records to JSON")
 
 # close the browser
-driver.quit()
+fetcher.close()
 print("End of Web Extraction")
 
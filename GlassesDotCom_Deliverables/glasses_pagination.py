@@ -1,136 +1,510 @@
-import json
-import csv
+import os
+import sys
+import argparse
+from datetime import datetime
+from itertools import count
+from urllib.parse import urlsplit, urlunsplit, parse_qs, urlencode
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 
-def setup_webdriver():
-    """Sets up and returns a configured Selenium WebDriver."""
-    print("Setting up WebDriver...")
+# Shared scraping modules live next to the FramesDirect scraper
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "FrameDirect_Deliverables"))
+from fetch_engine import PageFetcher
+from cdp_capture import enable_network_capture, capture_products
+from load_profile import GLASSES_LOAD, apply_load_profile, enable_resource_blocking
+from browser_session import BrowserSession, chrome_service
+from crawl_scheduler import CrawlScheduler, REQUESTS_PER_SECOND, MAX_IN_FLIGHT_PER_DOMAIN
+from extraction_engine import extract_page, GLASSES
+from page_cache import PageCache
+from delta_index import DeltaIndex, CHANGE_FIELD
+from dedup_index import DedupIndex
+from crawl_pipeline import PagePipeline, CsvSink, JsonlSink
+from parquet_store import ParquetSink
+from run_metrics import RunMetrics
+from run_profiler import create_profiler, MODES as PROFILE_MODES, SAMPLE_RATE
+from retry_policy import RetryPolicy, RetryError, DeadLetterList, requeue
+from jsonl_store import read_jsonl, write_pretty_json
+
+PAGE_CACHE_DIR = './extracted_data/page_cache'  # raw HTML cache; None disables it
+page_cache = None  # PageCache, opened in the main block
+metrics = RunMetrics('glasses')  # stage timings and counters, saved at the end of the run
+METRICS_DIR = './extracted_data'  # run report (JSON) and Prometheus textfile
+DELTA_INDEX_PATH = './extracted_data/delta_index.sqlite'
+DEAD_LETTER_PATH = './extracted_data/dead_letters.json'  # pages that failed all retries, re-queued at the end
+DEDUP_INDEX_PATH = './extracted_data/dedup_index.sqlite'  # can be shared with other retailers' scrapers
+DATA_FILES = './extracted_data/glasses_data'        # .csv, .jsonl and .json
+CHANGES_FILES = './extracted_data/glasses_changes'  # written with --delta
+PARQUET_DIR = './extracted_data/parquet'  # typed columnar copy (parquet_store.py); None disables it
+CSV_FIELDS = ['brand', 'name', 'former_price', 'current_price', 'discount']
+# Query parameters the load-more URL may use for the offset and the page size
+OFFSET_PARAMS = ('begin', 'beginIndex', 'start', 'offset', 'from')
+PAGE_SIZE_PARAMS = ('pageSize', 'pagesize', 'limit', 'size', 'rows')
+MAX_FAILED_FRAGMENTS = 3  # fragments in a row given up on before --fragments stops (site down, or past the end)
+BLOCK_RESOURCES = True  # skip images, fonts and trackers in Chrome (see GLASSES_LOAD)
+WARM_BROWSER = False    # keep Chrome running between runs (browser_session.py)
+
+def build_chrome_options(capture_network=False):
+    """Chrome options shared by fresh and warm browsers."""
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument(
         "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.265 Safari/537.36"
     )
+    if capture_network:
+        # Keep a performance log so the catalogue JSON can be read over CDP
+        enable_network_capture(chrome_options)
+    if BLOCK_RESOURCES:
+        apply_load_profile(chrome_options, GLASSES_LOAD)
+    return chrome_options
+
+def block_resources(driver):
+    """Turns on CDP resource blocking for a new or attached driver (unless BLOCK_RESOURCES is off)."""
+    if BLOCK_RESOURCES:
+        enable_resource_blocking(driver, GLASSES_LOAD)
 
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+def setup_webdriver(capture_network=False):
+    """Sets up and returns a configured Selenium WebDriver (chromedriver path cached)."""
+    print("Setting up WebDriver...")
+    driver = webdriver.Chrome(service=chrome_service(), options=build_chrome_options(capture_network))
+    block_resources(driver)
     return driver
 
+def create_fetcher(use_http=True, use_browser=True):
+    """Returns a PageFetcher that tries plain HTTP first and falls back to Chrome.
+
+    With WARM_BROWSER the fallback Chrome is kept running between runs.
+    """
+    browser_session = None
+    if WARM_BROWSER and use_browser:
+        browser_session = BrowserSession("glasses", build_chrome_options, on_attach=block_resources)
+    return PageFetcher(
+        driver_factory=setup_webdriver,
+        ready_markers=("product-tile",),
+        wait_class="catalog-page",
+        wait_timeout=GLASSES_LOAD['timeout'],
+        use_http=use_http,
+        use_browser=use_browser,
+        load_profile=GLASSES_LOAD,
+        browser_session=browser_session,
+        metrics=metrics,
+    )
+
+def scrape_page_via_cdp(driver, url):
+    """Reads one page's products from the captured JSON responses.
+
+    Returns (products, next_url). Falls back to parsing the rendered HTML only
+    when no product JSON was seen.
+    """
+    captured = capture_products(driver, url, timeout=15)
+    products = [
+        {
+            'brand': product['Brand'],
+            'name': product['Product_Name'],
+            'former_price': product['Former_Price'],
+            'current_price': product['Current_Price'],
+            'discount': product['Discount'],
+            'sku': product['SKU'],
+            'availability': product['Availability'],
+        }
+        for product in captured
+    ]
+    if not products:
+        print("No product JSON captured, parsing the rendered page instead")
+        products = extract_product_data(driver.page_source)
+
+    load_more = driver.find_elements(By.CSS_SELECTOR, 'div.load-more-wrapper[data-filter-url]')
+    next_url = load_more[0].get_attribute('data-filter-url') if load_more else None
+    return products, next_url
+
+def scrape_page_via_html(fetcher, url):
+    """Fetches one page and returns (products, next_url) from a single parse."""
+    print("Waiting for product tiles to load...")
+    html_source = fetcher.fetch(url)
+    return extract_page_data(html_source, url)
+
+def parse_page(html_source):
+    """Single parse of a glasses.com page: (products, next_url)."""
+    return extract_page(html_source, GLASSES)
+
+def extract_page_data(html_source, url=None):
+    """Parses the HTML source once and returns (products, next_url).
+
+    With the page cache open and a url given, the raw HTML is cached and a
+    page whose content was already parsed is not parsed again.
+    """
+    with metrics.stage('extract'):
+        if page_cache is not None and url:
+            products, next_url, reused = page_cache.extract(url, html_source, GLASSES, parse_page)
+            if reused:
+                print("Page unchanged, reused the cached parse")
+        else:
+            products, next_url = parse_page(html_source)
+    metrics.extracted(len(products))
+    products_to_add = [
+        {
+            'brand': product['Brand'],
+            'name': product['Product_Name'],
+            'former_price': product['Former_Price'],
+            'current_price': product['Current_Price'],
+            'discount': product['Discount'],
+        }
+        for product in products
+    ]
+    return products_to_add, next_url
+
 def extract_product_data(html_source):
     """Parses the HTML source and extracts product data."""
-    soup = BeautifulSoup(html_source, "html.parser")
-    product_tiles = soup.find_all('a', class_='product-tile')
-    
-    products_to_add = []
-    
-    for tile in product_tiles:
-        product_info = tile.find('div', class_='product-info')
-        if product_info:
-            brand_tag = product_info.find('div', class_='product-brand')
-            brand = brand_tag.text.strip() if brand_tag else None
-            
-            name_tag = product_info.find('div', class_='product-code')
-            name = name_tag.text.strip() if name_tag else None
-            
-            price_container = product_info.find('div', class_='product-prices')
-            if price_container:
-                former_price_tag = price_container.find('div', class_='product-list-price')
-                former_price = former_price_tag.text.strip() if former_price_tag else None
-                
-                current_price_tag = price_container.find('div', class_='product-offer-price')
-                current_price = current_price_tag.text.strip() if current_price_tag else None
-            else:
-                former_price, current_price = None, None
-
-            discount_tag = tile.find('div', class_='product-badge discount-badge thirty')
-            discount = discount_tag.text.strip() if discount_tag else None
-            
-            data = {
-                'brand': brand,
-                'name': name,
-                'former_price': former_price,
-                'current_price': current_price,
-                'discount': discount
-            }
-            products_to_add.append(data)
-            
-    return products_to_add
-
-def save_data_to_files(data, json_filename='./extracted_data/glasses_data.json', csv_filename='./extracted_data/glasses_data.csv'):
-    """Saves the extracted data to both JSON and CSV files."""
-    if not data:
-        print("No data to save.")
+    return extract_page_data(html_source)[0]
+
+def offset_pattern(next_url, tiles_on_first_page):
+    """Works out how the load-more URL pages through the catalogue.
+
+    Returns (offset parameter, page size), or None when the URL has no offset
+    matching the number of tiles already shown.
+    """
+    query = parse_qs(urlsplit(next_url).query)
+    page_size = next((int(query[name][0]) for name in PAGE_SIZE_PARAMS
+                      if name in query and query[name][0].isdigit()), tiles_on_first_page)
+    for name in OFFSET_PARAMS + tuple(query):
+        value = query.get(name, [''])[0]
+        if value.isdigit() and int(value) in (tiles_on_first_page, page_size) and name not in PAGE_SIZE_PARAMS:
+            return name, page_size
+    return None
+
+def fragment_url(next_url, offset_param, offset):
+    """The load-more URL with its offset set to ``offset``."""
+    parts = urlsplit(next_url)
+    query = parse_qs(parts.query, keep_blank_values=True)
+    query[offset_param] = [str(offset)]
+    return urlunsplit(parts._replace(query=urlencode(query, doseq=True)))
+
+def scrape_fragment(fetcher, url):
+    """Fetches one load-more fragment and returns (products, next_url) from its tiles."""
+    return extract_page_data(fetcher.fetch_fragment(url), url)
+
+def iter_fragments(scheduler, fetcher, start_url, fetch_page, policy):
+    """Crawls the catalogue through its load-more endpoint, several fragments at a time.
+
+    The first page is loaded normally (fetch_page) to learn the offset pattern
+    from its data-filter-url; the following offsets are then requested
+    directly as fragments, concurrently, and handed over in offset order.
+    Yields (url, (products, next_url), error) like scheduler.iter_chain, with
+    next_url None on the last fragment. Falls back to following the chain
+    page by page when no offset pattern is found. The fragments come from
+    iter_offsets.
+    """
+    for url, result, error in scheduler.iter_pages([start_url], fetch_page):
+        yield url, result, error
+    if error is not None or not result[1]:
+        return
+    products, next_url = result
+    pattern = offset_pattern(next_url, len(products))
+    if pattern is None:
+        print("⚠ No offset in the load-more URL, following it page by page")
+        yield from scheduler.iter_chain(next_url, fetch_page, lambda u, res, err: None if err else res[1])
         return
 
-    # Deduplicate the data
-    final_data = [dict(t) for t in {tuple(d.items()) for d in data}]
-    
-    # Save to JSON
-    with open(json_filename, 'w') as json_file:
-        json.dump(final_data, json_file, indent=4)
-    print(f"Data successfully saved to {json_filename}.")
-
-    # Save to CSV
-    if final_data:
-        keys = final_data[0].keys()
-        with open(csv_filename, 'w', newline='', encoding='utf-8') as csv_file:
-            dict_writer = csv.DictWriter(csv_file, fieldnames=keys)
-            dict_writer.writeheader()
-            dict_writer.writerows(final_data)
-        print(f"Data successfully saved to {csv_filename}.")
+    yield from iter_offsets(scheduler, fetcher, next_url, *pattern, policy)
+
+def fragment_offset(url, offset_param):
+    return int(parse_qs(urlsplit(url).query)[offset_param][0])
+
+def iter_offsets(scheduler, fetcher, first_url, offset_param, page_size, policy):
+    """Fetches the load-more fragments from first_url on, concurrently, in offset order.
+
+    Yields (url, (products, next_url), error) like iter_fragments. Fragments
+    are fetched through the retry policy; one that still fails is yielded with
+    its RetryError and the following offsets carry on, until
+    MAX_FAILED_FRAGMENTS fail in a row or the run's retry budget is used up.
+    """
+    first_offset = fragment_offset(first_url, offset_param)
+    print(f"Fetching load-more fragments directly: {offset_param}={first_offset}, +{page_size} each")
+    offsets = count(first_offset, page_size)
+    urls = (fragment_url(first_url, offset_param, offset) for offset in offsets)
+    fragments = scheduler.iter_pages(urls, policy.wrap(lambda url: scrape_fragment(fetcher, url)))
+    failed = 0
+    try:
+        for offset, (url, result, error) in zip(count(first_offset, page_size), fragments):
+            if isinstance(error, RetryError):
+                yield url, result, error
+                failed += 1
+                if failed >= MAX_FAILED_FRAGMENTS or not policy.budget_left():
+                    print(f"⚠ Stopping after {failed} failed fragment(s) in a row"
+                          + ("" if policy.budget_left() else " (retry budget used up)"))
+                    return
+                continue
+            if error is not None:
+                yield url, result, error
+                return
+            failed = 0
+            products, _ = result
+            # A short (or empty) fragment is the end of the catalogue
+            last = len(products) < page_size
+            yield url, (products, None if last else fragment_url(url, offset_param, offset + page_size)), None
+            if last:
+                return
+    finally:
+        fragments.close()  # stops the fetches still in flight
+
+def open_outputs(base_path, fields, append=False, parquet_at=None):
+    """Starts this run's CSV and JSONL files; each page's records are appended as they arrive.
+
+    Each run replaces the previous run's files, unless append is set. With
+    parquet_at (the run's start time) the records also go to the Parquet
+    dataset, which keeps every run.
+    """
+    for suffix in ('.csv', '.jsonl'):
+        if not append and os.path.exists(base_path + suffix):
+            os.remove(base_path + suffix)
+    sinks = [CsvSink(base_path + '.csv', fields), JsonlSink(base_path + '.jsonl')]
+    if PARQUET_DIR and parquet_at is not None:
+        try:
+            sinks.append(ParquetSink(PARQUET_DIR, 'glasses', parquet_at))
+        except RuntimeError as e:
+            print(f"⚠ {e}, skipping the Parquet copy")
+    return PagePipeline(sinks, metrics=metrics)
+
+def finish_outputs(pipeline, base_path):
+    """Closes the run's files and builds the pretty-printed JSON from the JSONL, once per run."""
+    pipeline.close()
+    write_pretty_json(base_path + '.json', read_jsonl(base_path + '.jsonl'))
+    print(f"Data successfully saved to {base_path}.json and {base_path}.csv ({pipeline.records_written} records).")
+
+def save_new_records(pipeline, dedup, records):
+    """Writes the records the dedup index has not seen, then records them in the index."""
+    try:
+        pipeline.write(dedup.drop_duplicates(records))
+    except BaseException:
+        dedup.rollback()
+        raise
+    dedup.commit()
+
+def replay_from_cache(url_prefix, fetch_date=None):
+    """Re-extracts cached pages (no browser, no network) and saves them like a crawl would."""
+    runs = page_cache.runs(url_prefix, fetch_date)
+    if not runs:
+        print("No cached pages to replay.")
+        return
+    pipeline = open_outputs(DATA_FILES, CSV_FIELDS)
+    dedup = DedupIndex(DEDUP_INDEX_PATH, retailer='glasses')
+    try:
+        for date, entries in runs.items():
+            print(f"Replaying {len(entries)} pages fetched on {date}")
+            entries.sort(key=lambda e: int(parse_qs(urlsplit(e['url']).query).get('begin', ['0'])[0]))
+            for entry in entries:
+                products = extract_product_data(page_cache.load_html(entry['sha256']))
+                save_new_records(pipeline, dedup, products)
+        dedup.report()
+    finally:
+        finish_outputs(pipeline, DATA_FILES)
+        dedup.close()
+    print(f"Replay complete. {len(runs)} runs re-extracted.")
 
 # Main execution flow
 if __name__ == "__main__":
-    driver = setup_webdriver()
-    base_url = "https://www.glasses.com"
+    parser = argparse.ArgumentParser(description="Scrape eyeglasses from glasses.com.")
+    parser.add_argument("--browser-only", action="store_true",
+                        help="skip the plain HTTP attempt and load every page in Chrome")
+    parser.add_argument("--capture", action="store_true",
+                        help="read products from the site's JSON responses over CDP")
+    parser.add_argument("--http-only", action="store_true",
+                        help="never start Chrome; pages without product tiles end the crawl")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND,
+                        help="requests per second allowed for the site")
+    parser.add_argument("--fragments", action="store_true",
+                        help="request the load-more endpoint directly as tile fragments, several at a time")
+    parser.add_argument("--concurrency", type=int, default=MAX_IN_FLIGHT_PER_DOMAIN,
+                        help="fragments kept in flight at once (with --fragments)")
+    parser.add_argument("--delta", action="store_true",
+                        help="also write only new, changed and disappeared products to glasses_changes.json/csv")
+    parser.add_argument("--append-new", action="store_true",
+                        help="keep earlier runs' glasses_data files and append only records never written before")
+    parser.add_argument("--dedup-index", default=DEDUP_INDEX_PATH,
+                        help="SQLite file of records already written (can be shared between retailers)")
+    parser.add_argument("--no-blocking", action="store_true",
+                        help="let Chrome load images, fonts and trackers (to compare page times)")
+    parser.add_argument("--warm-browser", action="store_true",
+                        help="reuse a Chrome kept running between runs (stop it with browser_session.py stop)")
+    parser.add_argument("--no-parquet", action="store_true",
+                        help="do not write the partitioned Parquet copy of the records")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="do not keep raw HTML in the page cache")
+    parser.add_argument("--replay", action="store_true",
+                        help="re-extract cached pages and save them again (no browser, no network)")
+    parser.add_argument("--replay-date", default=None,
+                        help="only replay pages fetched on this date (YYYY-MM-DD)")
+    parser.add_argument("--profile", nargs="?", const="full", choices=PROFILE_MODES, default=None,
+                        help="profile each stage with cProfile and tracemalloc (saved to extracted_data/profile); "
+                             "'sample' profiles only some runs and pages")
+    parser.add_argument("--profile-rate", type=float, default=SAMPLE_RATE,
+                        help="share of runs profiled with --profile sample")
+    args = parser.parse_args()
+    if args.fragments and args.capture:
+        parser.error("--fragments reads the tile HTML; it cannot be combined with --capture")
+
+    base_url = os.environ.get("GLASSES_BASE_URL", "https://www.glasses.com")  # e.g. the mock server
+    DEDUP_INDEX_PATH = args.dedup_index
+    BLOCK_RESOURCES = not args.no_blocking
+    WARM_BROWSER = args.warm_browser
+    if args.no_parquet:
+        PARQUET_DIR = None
+    if PAGE_CACHE_DIR and not args.no_cache:
+        page_cache = PageCache(PAGE_CACHE_DIR)
+    if args.replay:
+        if page_cache is None:
+            sys.exit("The page cache is disabled, nothing to replay.")
+        replay_from_cache(f"{base_url}/gl-us/eyeglasses", args.replay_date)
+        sys.exit(0)
+
+    metrics.profiler = create_profiler('glasses', args.profile, args.profile_rate)
+    fetcher = create_fetcher(use_http=not args.browser_only, use_browser=not args.http_only)
+    # Timeouts and fetch errors are retried with backoff; pages that still fail
+    # are dead-lettered and tried again in a re-queue pass at the end
+    policy = RetryPolicy(metrics=metrics)
+    dead_letters = DeadLetterList(DEAD_LETTER_PATH)
+    driver = setup_webdriver(capture_network=True) if args.capture else None
+    # Each page reveals the next URL, so pages come one at a time, unless
+    # --fragments works out the offsets; the scheduler paces requests with
+    # its token bucket instead of fixed waits.
+    scheduler = CrawlScheduler(max_in_flight=args.concurrency, rate=args.rate)
     url = f"{base_url}/gl-us/eyeglasses?"
-    all_products_data = []
+    fields = CSV_FIELDS + ['sku', 'availability'] if args.capture else CSV_FIELDS
 
-    try:
-        while url:
-            print(f"Visiting URL: {url}")
-            driver.get(url)
-            
-            try:
-                print("Waiting for product tiles to load...")
-                WebDriverWait(driver, 15).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "catalog-page"))
-                )
-            except Exception as e:
-                print(f"Error waiting for page to load: {e}")
-                driver.quit()
-                exit()
-
-            # Get page source and extract data
-            html_source = driver.page_source
-            products_on_page = extract_product_data(html_source)
-            all_products_data.extend(products_on_page)
-            print(f"Extracted {len(products_on_page)} products. Total so far: {len(all_products_data)}")
-
-            # Find the next page link
-            soup = BeautifulSoup(html_source, "html.parser")
-            next_link_element = soup.find('div', class_='load-more-wrapper', attrs={'data-filter-url': True})
-            
-            if next_link_element and 'data-filter-url' in next_link_element.attrs:
-                next_url_path = next_link_element['data-filter-url']
-                url = f"{next_url_path}"
-                print(f"Found next page URL: {url}")
-                # Save the incremental progress
-                save_data_to_files(all_products_data)
+    def fetch_page(url):
+        """Returns (products, next_url) for one page."""
+        print(f"Visiting URL: {url}")
+        if args.capture:
+            return scrape_page_via_cdp(driver, url)
+        return scrape_page_via_html(fetcher, url)
+
+    def next_page(url, result, error):
+        """The next URL to fetch (None ends the crawl)."""
+        return None if error is not None else result[1]
+
+    def refetch(entry):
+        """Fetches a dead-lettered page or fragment again."""
+        if entry.get('kind') == 'fragment':
+            return scrape_fragment(fetcher, entry['url'])
+        return fetch_page(entry['url'])
+
+    def save_page(products_on_page):
+        save_new_records(pipeline, dedup, products_on_page)
+        if delta_index is not None:
+            changes.write(delta_index.changes(products_on_page))
+            delta_index.commit()
+        metrics.count('pages')
+        print(f"Extracted {len(products_on_page)} products. Total so far: {pipeline.records_written}")
+
+    def chain(url):
+        return scheduler.iter_chain(url, policy.wrap(fetch_page), next_page)
+
+    def fragments(url, offsets):
+        return iter_offsets(scheduler, fetcher, url, *offsets, policy)
+
+    def crawl(pages, offsets=None):
+        """Saves every page of a crawl; returns True when the last page was reached.
+
+        offsets is the (offset parameter, page size) of a fragment crawl, if
+        already known.
+        """
+        reached_end = False
+        failed = None
+        first_page = args.fragments and offsets is None
+        for page_url, result, error in pages:
+            if isinstance(error, RetryError):
+                print(f"Error waiting for page to load: {error}")
+                # Fragments go on with the next offset; in chain mode the next URL is unknown, so the
+                # chain ends here. Either way the crawl resumes from here if the re-queue pass recovers it.
+                if offsets is not None:
+                    details = dict(kind='fragment', offset_param=offsets[0], page_size=offsets[1])
+                else:
+                    details = dict(kind='page')
+                dead_letters.add(page_url, error.error, error.attempts, **details)
+                metrics.count('failed_pages')
+                failed = page_url
+                continue
+            if error is not None:
+                print(f"Error waiting for page to load: {error}")
+                metrics.count('failed_pages')
+                return False
+
+            products_on_page, next_url_path = result
+            save_page(products_on_page)
+            dead_letters.remove(page_url)  # a page that failed in an earlier run is done now
+            failed = None
+            if first_page and next_url_path:
+                offsets = offset_pattern(next_url_path, len(products_on_page))  # as iter_fragments works it out
+            first_page = False
+
+            if next_url_path:
+                print(f"Found next page URL: {next_url_path}")
             else:
                 print("No more pages found.")
-                url = None # End the loop
-                
-        # Final save after the loop completes
-        save_data_to_files(all_products_data)
+                reached_end = True
+        if failed is not None:
+            resume_points.add(failed)
+        return reached_end
+
+    def resume(entry, products_on_page, next_url_path):
+        """Goes on with the crawl after a recovered page it had stopped at."""
+        if entry['url'] not in resume_points:
+            return False
+        if entry.get('kind') != 'fragment':
+            if next_url_path is None:
+                return True
+            print(f"Resuming the crawl after {entry['url']}")
+            offsets = offset_pattern(next_url_path, len(products_on_page)) if args.fragments else None
+            if offsets is None:
+                return crawl(chain(next_url_path))
+            return crawl(fragments(next_url_path, offsets), offsets)
+        offsets = (entry['offset_param'], entry['page_size'])
+        if len(products_on_page) < offsets[1]:
+            return True  # a short fragment is the end of the catalogue
+        print(f"Resuming the crawl after {entry['url']}")
+        next_offset = fragment_offset(entry['url'], offsets[0]) + offsets[1]
+        return crawl(fragments(fragment_url(entry['url'], offsets[0], next_offset), offsets), offsets)
+
+    # Pages flow straight to the output files and nothing is kept between
+    # pages; duplicates are looked up in the on-disk dedup index.
+    pipeline = open_outputs(DATA_FILES, fields, append=args.append_new, parquet_at=datetime.now())
+    dedup = DedupIndex(DEDUP_INDEX_PATH, retailer='glasses', across_runs=args.append_new)
+    delta_index = None
+    changes = None
+    if args.delta:
+        delta_index = DeltaIndex(DELTA_INDEX_PATH, retailer="glasses", key_fields=("brand", "name"),
+                                 value_fields=("former_price", "current_price", "discount"))
+        changes = open_outputs(CHANGES_FILES, fields + [CHANGE_FIELD])
+
+    resume_points = set()  # pages/fragments the crawl stopped at, resumed from when re-queued
+    try:
+        if args.fragments:
+            reached_end = crawl(iter_fragments(scheduler, fetcher, url, policy.wrap(fetch_page), policy))
+        else:
+            reached_end = crawl(chain(url))
+
+        for entry, (products_on_page, next_url_path) in requeue(dead_letters, policy, refetch):
+            save_page(products_on_page)
+            reached_end = resume(entry, products_on_page, next_url_path) or reached_end
+
+        dedup.report()
+        if delta_index is not None:
+            reached_end = reached_end and not len(dead_letters)
+            if reached_end:
+                changes.write(delta_index.disappeared())
+                delta_index.commit()
+            delta_index.report(reached_end)
 
     finally:
-        driver.quit()
-        print("\nScraping complete. WebDriver closed.")
\ No newline at end of file
+        finish_outputs(pipeline, DATA_FILES)
+        dedup.close()
+        if delta_index is not None:
+            finish_outputs(changes, CHANGES_FILES)
+            delta_index.close()
+        fetcher.save_fetch_log('./extracted_data/fetch_log.json')
+        fetcher.close()
+        if driver is not None:
+            driver.quit()
+        metrics.save(METRICS_DIR)
+        print("\nScraping complete. WebDriver closed.")